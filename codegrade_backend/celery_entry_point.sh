@@ -5,15 +5,50 @@ set -o nounset
 
 : "${CELERY_GRADING_QUEUE:=grading}"
 : "${CELERY_DEFAULT_QUEUE:=default}"
+: "${CELERY_REPORTS_QUEUE:=reports}"
+: "${CELERY_EVENTS_QUEUE_PREFIX:=events}"
+: "${CELERY_EVENTS_PARTITIONS:=4}"
+: "${PROMETHEUS_MULTIPROC_DIR:=/tmp/prometheus}"
+export PROMETHEUS_MULTIPROC_DIR
+
+# Samples left by the processes of a previous run would be scraped again
+rm -rf "${PROMETHEUS_MULTIPROC_DIR}"
+mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
 
 # Ensure logs appear in Docker by running Celery in the foreground
-celery -A src.worker.celery_app multi start 2 \
+celery -A src.worker.celery_app multi start 3 \
     --loglevel=INFO \
     --pidfile=/var/run/celery/%n.pid \
     --logfile=/codegrade_backend/logs/%n.log \
     -Q:1 "${CELERY_GRADING_QUEUE}" \
+    -Q:3 "${CELERY_REPORTS_QUEUE}" \
     -Q "${CELERY_DEFAULT_QUEUE}"
 
+# One single process worker per lifecycle events partition, so the events of
+# a session are handled one at a time and in order
+partition=0
+while [ "${partition}" -lt "${CELERY_EVENTS_PARTITIONS}" ]; do
+    celery -A src.worker.celery_app worker \
+        --detach \
+        --concurrency=1 \
+        --loglevel=INFO \
+        --hostname="events-${partition}@%h" \
+        --pidfile="/var/run/celery/events-${partition}.pid" \
+        --logfile="/codegrade_backend/logs/events-${partition}.log" \
+        -Q "${CELERY_EVENTS_QUEUE_PREFIX}-${partition}"
+    partition=$((partition + 1))
+done
+
+# Periodic tasks, such as pruning the handled events ledger
+celery -A src.worker.celery_app beat \
+    --detach \
+    --loglevel=INFO \
+    --pidfile=/var/run/celery/beat.pid \
+    --logfile=/codegrade_backend/logs/beat.log \
+    --schedule=/var/run/celery/beat-schedule
+
+# Prometheus exporter of the samples written by every worker process
+python -m src.core.metrics >> /codegrade_backend/logs/metrics.log 2>&1 &
 
 # Keep the container running
 tail -f /codegrade_backend/logs/*.log
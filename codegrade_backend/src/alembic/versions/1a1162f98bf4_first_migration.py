@@ -40,7 +40,7 @@ def upgrade():
     sa.Column('instructions', sqlmodel.sql.sqltypes.AutoString(length=10000), nullable=True),
     sa.ForeignKeyConstraint(['session_id'], ['session.id'], ),
     sa.PrimaryKeyConstraint('id'),
-    sa.UniqueConstraint('session_id', 'external_id', name='session_id_unique_together_with_external_id')
+    sa.UniqueConstraint('session_id', 'external_id', name='exercise_session_id_unique_together_with_external_id')
     )
     op.create_index(op.f('ix_exercise_external_id'), 'exercise', ['external_id'], unique=False)
     op.create_table('group',
@@ -51,7 +51,7 @@ def upgrade():
     sa.Column('session_id', sa.Uuid(), nullable=False),
     sa.ForeignKeyConstraint(['session_id'], ['session.id'], ),
     sa.PrimaryKeyConstraint('id'),
-    sa.UniqueConstraint('session_id', 'external_id', name='session_id_unique_together_with_external_id')
+    sa.UniqueConstraint('session_id', 'external_id', name='group_session_id_unique_together_with_external_id')
     )
     op.create_index(op.f('ix_group_external_id'), 'group', ['external_id'], unique=False)
     op.create_table('evaluationflag',
@@ -89,7 +89,7 @@ def upgrade():
     sa.ForeignKeyConstraint(['group_id'], ['group.id'], ),
     sa.ForeignKeyConstraint(['session_id'], ['session.id'], ),
     sa.PrimaryKeyConstraint('id'),
-    sa.UniqueConstraint('session_id', 'external_id', name='session_id_unique_together_with_external_id')
+    sa.UniqueConstraint('session_id', 'external_id', name='user_session_id_unique_together_with_external_id')
     )
     op.create_index(op.f('ix_user_external_id'), 'user', ['external_id'], unique=False)
     op.create_table('submission',
@@ -172,3 +172,6 @@ def downgrade():
     op.drop_index(op.f('ix_session_external_id'), table_name='session')
     op.drop_table('session')
     # ### end Alembic commands ###
+    # PostgreSQL keeps the enum types around, a no-op on SQLite
+    sa.Enum(name='submissionstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='evaluationflagenum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,37 @@
+"""Nullable feedback columns and testcase title
+
+Revision ID: 5c3e8f2a9d41
+Revises: 1a1162f98bf4
+Create Date: 2026-10-18 09:12:40.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5c3e8f2a9d41'
+down_revision = '1a1162f98bf4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('testcase') as batch_op:
+        batch_op.add_column(sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False, server_default=''))
+
+    for table in ('submission', 'exercisesubmission'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('auto_generated_feedback', existing_type=sqlmodel.sql.sqltypes.AutoString(length=5000), nullable=True)
+            batch_op.alter_column('manual_feedback', existing_type=sqlmodel.sql.sqltypes.AutoString(length=5000), nullable=True)
+
+
+def downgrade():
+    for table in ('exercisesubmission', 'submission'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('manual_feedback', existing_type=sqlmodel.sql.sqltypes.AutoString(length=5000), nullable=False)
+            batch_op.alter_column('auto_generated_feedback', existing_type=sqlmodel.sql.sqltypes.AutoString(length=5000), nullable=False)
+
+    with op.batch_alter_table('testcase') as batch_op:
+        batch_op.drop_column('title')
@@ -0,0 +1,240 @@
+"""
+Compare sync and async database sessions under concurrent dashboard reads.
+
+Fires concurrent requests at the real submission details route of the app,
+once with its service swapped for the equivalent query on the sync session,
+run in the threadpool, once on the async session with the response cache
+bypassed and once as shipped, on the async session behind the response
+cache. All go through the app engines and their pool settings, on a throw
+away database. Reports the wall clock time of each burst.
+
+Run with `python -m src.benchmarks.request_concurrency`.
+"""
+
+import asyncio
+import os
+import tempfile
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import Engine
+from sqlmodel import Session as DbSession
+from sqlmodel import SQLModel, select
+from starlette.concurrency import run_in_threadpool
+
+from src.benchmarks.utils import report
+from src.enums import SubmissionStatus
+from src.models import (
+    Exercise,
+    ExerciseSubmission,
+    Session,
+    Submission,
+    TestCase,
+    TestCaseResult,
+    User,
+)
+
+SUBMISSIONS = 50
+EXERCISES = 5
+TEST_CASES_PER_EXERCISE = 5
+CONCURRENT_REQUESTS = (10, 40, 100, 200)
+SESSION_EXTERNAL_ID = "benchmark"
+
+
+def populate(engine: Engine) -> tuple[str, list[uuid.UUID]]:
+    """Create a session with graded submissions, returns its external and submission IDs."""
+    with DbSession(engine) as db_session:
+        session = Session(external_id=SESSION_EXTERNAL_ID, is_active=False)
+        exercises = [
+            Exercise(
+                external_id=f"exercise-{index}",
+                session_id=session.id,
+                question="Add two numbers.",
+            )
+            for index in range(EXERCISES)
+        ]
+        test_cases = {
+            exercise.id: [
+                TestCase(
+                    external_id=f"test-case-{index}",
+                    title=f"test case {index}",
+                    exercise_id=exercise.id,
+                    test_input="1 2",
+                    expected_output="3",
+                    score_percentage=20,
+                )
+                for index in range(TEST_CASES_PER_EXERCISE)
+            ]
+            for exercise in exercises
+        }
+        db_session.add(session)
+        db_session.add_all(exercises)
+        db_session.add_all(
+            test_case for cases in test_cases.values() for test_case in cases
+        )
+
+        submission_ids = []
+        for index in range(SUBMISSIONS):
+            user = User(external_id=f"student-{index}", session_id=session.id)
+            submission = Submission(
+                session_id=session.id,
+                user_id=user.id,
+                status=SubmissionStatus.GRADED,
+            )
+            db_session.add_all([user, submission])
+            submission_ids.append(submission.id)
+            for exercise in exercises:
+                exercise_submission = ExerciseSubmission(
+                    submission_id=submission.id, exercise_id=exercise.id
+                )
+                db_session.add(exercise_submission)
+                db_session.add_all(
+                    TestCaseResult(
+                        submission_id=exercise_submission.id,
+                        test_case_id=test_case.id,
+                        exit_code=0,
+                        std_out="3",
+                        passed=True,
+                        score=20,
+                    )
+                    for test_case in test_cases[exercise.id]
+                )
+        db_session.commit()
+
+    return SESSION_EXTERNAL_ID, submission_ids
+
+
+def sync_submission_service() -> Callable[..., Awaitable[Any]]:
+    """Serve the submission details from the sync session, as before the async port."""
+    from src.core.db import engine
+    from src.grading.schemas import SubmissionPublicSchema
+    from src.grading.services import SUBMISSION_LOADER_OPTIONS
+
+    def _get_submission(
+        session_id: uuid.UUID, submission_id: uuid.UUID
+    ) -> SubmissionPublicSchema:
+        with DbSession(engine) as db_session:
+            submission = db_session.exec(
+                select(Submission)
+                .where(
+                    Submission.session_id == session_id,
+                    Submission.id == submission_id,
+                )
+                .options(*SUBMISSION_LOADER_OPTIONS)
+            ).first()
+            if not submission:
+                raise HTTPException(status_code=404, detail="Submission not found")
+            return SubmissionPublicSchema.model_validate(
+                submission, from_attributes=True
+            )
+
+    async def _service(
+        _db_session: Any,
+        session: Session,
+        submission_id: uuid.UUID,
+        _if_none_match: str | None,
+    ) -> SubmissionPublicSchema:
+        # what FastAPI did with the sync dependency, a threadpool hop
+        return await run_in_threadpool(_get_submission, session.id, submission_id)
+
+    return _service
+
+
+async def burst(
+    app: FastAPI, urls: list[str], headers: dict[str, str], requests: int
+) -> tuple[float, int]:
+    """Send concurrent requests, returns the elapsed seconds and failures."""
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test", headers=headers, timeout=None
+    ) as client:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        responses = await asyncio.gather(
+            *(client.get(urls[index % len(urls)]) for index in range(requests))
+        )
+        elapsed = loop.time() - start
+
+    return elapsed, sum(response.status_code != 200 for response in responses)
+
+
+async def run(external_session_id: str, submission_ids: list[uuid.UUID]) -> None:
+    """Time bursts of growing size against each session kind."""
+    from src.core.config import settings
+    from src.core.db import async_engine
+    from src.main import app
+
+    urls = [
+        f"{settings.API_V1_STR}/grading/{external_session_id}/submissions/{submission_id}/"
+        for submission_id in submission_ids
+    ]
+    headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+    from src.grading.cache import MemoryResponseCache
+    from src.grading.services import get_submission_by_id_services
+
+    # the uncached modes never find an entry, every request builds its response
+    uncached = MemoryResponseCache(maxsize=0)
+    modes = {
+        "sync session": (sync_submission_service(), uncached),
+        "async session": (get_submission_by_id_services, uncached),
+        "async session, cached": (get_submission_by_id_services, None),
+    }
+    try:
+        for requests in CONCURRENT_REQUESTS:
+            results: dict[str, float] = {}
+            failures: dict[str, int] = {}
+            for mode, (service, cache) in modes.items():
+                with ExitStack() as stack:
+                    stack.enter_context(
+                        patch(
+                            "src.grading.routers.get_submission_by_id_services", service
+                        )
+                    )
+                    if cache:
+                        stack.enter_context(
+                            patch("src.grading.services.response_cache", cache)
+                        )
+                    elapsed, failed = await burst(app, urls, headers, requests)
+                results[mode] = elapsed
+                failures[mode] = failed
+
+            report(f"Submission details, {requests} concurrent requests", results)
+            print(
+                "  failed requests: "
+                + ", ".join(f"{name} {count}" for name, count in failures.items())
+            )
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory(prefix="codegrade-benchmark-") as directory:
+        # point the app engines at a throw away database before they are created
+        os.environ["ENVIRONMENT"] = "staging"
+        os.environ["TEST_DATABASE_PATH"] = str(Path(directory) / "benchmark.sqlite3")
+        from src.core.config import settings
+
+        # the app URI has three slashes, so the path resolves from the working
+        # directory, changed once the settings have read their env file
+        os.chdir("/")
+        from src.core.db import engine
+
+        print(
+            f"Pool: {settings.SQLITE_POOL_SIZE} + {settings.SQLITE_MAX_OVERFLOW} connections"
+        )
+
+        SQLModel.metadata.create_all(engine)
+        try:
+            asyncio.run(run(*populate(engine)))
+        finally:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Compare session creation costs for a 1,000 student session.
+
+Run with `python -m src.benchmarks.session_creation`.
+"""
+
+import uuid
+
+from sqlalchemy import Engine
+from sqlmodel import Session as DbSession
+
+from src.benchmarks.utils import report, temporary_engine, timed
+from src.events.handlers.schemas import (
+    ExerciseCreationSchema,
+    GroupCreationSchema,
+    SessionCreationEventData,
+    TestCaseCreationSchema,
+    UserCreationSchema,
+)
+from src.events.handlers.session_created_event import SessionCreatedEventHandler
+from src.models import Exercise, Group, Session, TestCase, User
+
+GROUPS = 50
+STUDENTS_PER_GROUP = 20
+EXERCISES = 20
+TEST_CASES_PER_EXERCISE = 5
+
+
+def build_payload() -> SessionCreationEventData:
+    """Build a session payload with 1,000 students spread over groups."""
+    return SessionCreationEventData(
+        session_title="benchmark session",
+        exercises=[
+            ExerciseCreationSchema(
+                external_id=f"exercise-{exercise}",
+                title=f"exercise {exercise}",
+                question="Add two numbers.",
+                test_cases=[
+                    TestCaseCreationSchema(
+                        external_id=f"test-case-{test_case}",
+                        title=f"test case {test_case}",
+                        test_input="1 2",
+                        expected_output="3",
+                        score_percentage=20,
+                    )
+                    for test_case in range(TEST_CASES_PER_EXERCISE)
+                ],
+            )
+            for exercise in range(EXERCISES)
+        ],
+        groups=[
+            GroupCreationSchema(
+                external_id=f"group-{group}",
+                students=[
+                    UserCreationSchema(external_id=f"student-{group}-{student}")
+                    for student in range(STUDENTS_PER_GROUP)
+                ],
+            )
+            for group in range(GROUPS)
+        ],
+    )
+
+
+def create_row_by_row(
+    db_session: DbSession,
+    external_session_id: str,
+    event_data: SessionCreationEventData,
+) -> None:
+    """Create the session the way the handler used to, committing per group."""
+    session = Session(external_id=external_session_id, is_active=True)
+    db_session.add(session)
+    db_session.commit()
+    db_session.refresh(session)
+
+    for exercise in event_data.exercises:
+        exercise_record = Exercise(
+            external_id=exercise.external_id,
+            session_id=session.id,
+            question=exercise.question,
+        )
+        db_session.add(exercise_record)
+        db_session.add_all(
+            TestCase(
+                external_id=test_case.external_id,
+                exercise_id=exercise_record.id,
+                title=test_case.title,
+                test_input=test_case.test_input,
+                expected_output=test_case.expected_output,
+                score_percentage=test_case.score_percentage,
+            )
+            for test_case in exercise.test_cases
+        )
+    db_session.commit()
+
+    for group in event_data.groups or []:
+        group_record = Group(external_id=group.external_id, session_id=session.id)
+        db_session.add(group_record)
+        db_session.add_all(
+            User(
+                external_id=student.external_id,
+                session_id=session.id,
+                group_id=group_record.id,
+            )
+            for student in group.students
+        )
+        db_session.commit()
+
+
+def run(engine: Engine, event_data: SessionCreationEventData) -> dict[str, float]:
+    """Time both creation paths against the engine."""
+    with DbSession(engine) as db_session:
+        row_by_row = timed(
+            lambda: create_row_by_row(db_session, str(uuid.uuid4()), event_data)
+        )
+
+    with DbSession(engine) as db_session:
+        handler = SessionCreatedEventHandler(db_session=db_session)
+        bulk = timed(
+            lambda: handler.handle_event(
+                external_session_id=str(uuid.uuid4()), event_data=event_data
+            )
+        )
+
+    return {"row by row commits": row_by_row, "bulk single commit": bulk}
+
+
+def main() -> None:
+    event_data = build_payload()
+    with temporary_engine() as engine:
+        results = run(engine, event_data)
+
+    report(
+        f"Session creation, {GROUPS * STUDENTS_PER_GROUP} students, "
+        f"{EXERCISES * TEST_CASES_PER_EXERCISE} test cases",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
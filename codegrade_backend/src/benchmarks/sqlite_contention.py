@@ -0,0 +1,184 @@
+"""
+Compare SQLite writer/reader throughput with and without the tuned profile.
+
+Writer processes update submission scores one short transaction at a time,
+the way grading workers do, while reader processes page through the session
+submissions, the way dashboard requests do. Every process opens its own
+engine on the same file, as the API and the Celery workers do.
+
+Run with `python -m src.benchmarks.sqlite_contention`.
+"""
+
+import multiprocessing
+import random
+import time
+import uuid
+from typing import Any
+
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import create_engine
+
+from src.benchmarks.utils import temporary_engine
+from src.core.db import apply_sqlite_pragmas, sqlite_pragmas
+
+SUBMISSIONS = 2_000
+WRITERS = 3
+READERS = 3
+DURATION = 5.0
+
+# SQLite defaults: rollback journal, full sync and the sqlite3 module 5 second
+# lock timeout
+DEFAULT_PROFILE: dict[str, str | int] = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+}
+
+
+def populate(engine: Engine) -> tuple[str, list[str]]:
+    """Create a session with submissions, returns the session and submission IDs."""
+    session_id = uuid.uuid4().hex
+    users = [
+        {"id": uuid.uuid4().hex, "external_id": f"student-{index}"}
+        for index in range(SUBMISSIONS)
+    ]
+    submissions = [{"id": uuid.uuid4().hex, "user_id": user["id"]} for user in users]
+
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO session (id, external_id, is_active) VALUES (:id, 'benchmark', 1)"
+            ),
+            {"id": session_id},
+        )
+        connection.execute(
+            text(
+                "INSERT INTO user (id, external_id, session_id) "
+                f"VALUES (:id, :external_id, '{session_id}')"
+            ),
+            users,
+        )
+        connection.execute(
+            text(
+                "INSERT INTO submission (id, session_id, user_id, status, reviewed) "
+                f"VALUES (:id, '{session_id}', :user_id, 'QUEUED', 0)"
+            ),
+            submissions,
+        )
+
+    return session_id, [submission["id"] for submission in submissions]
+
+
+def _open_engine(url: str, pragmas: dict[str, str | int]) -> Engine:
+    """Open an engine the way a single API or worker process would."""
+    engine = create_engine(url)
+    apply_sqlite_pragmas(engine, pragmas)
+    return engine
+
+
+def write(
+    url: str, pragmas: dict[str, str | int], submission_ids: list[str], results: Any
+) -> None:
+    """Update submission scores, one transaction per submission."""
+    engine = _open_engine(url, pragmas)
+    operations = errors = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        try:
+            with engine.begin() as connection:
+                connection.execute(
+                    text(
+                        "UPDATE submission SET overrall_total = :total, status = 'GRADED' WHERE id = :id"
+                    ),
+                    {
+                        "total": random.uniform(0, 100),
+                        "id": random.choice(submission_ids),
+                    },
+                )
+            operations += 1
+        except OperationalError:
+            errors += 1
+
+    engine.dispose()
+    results.put(("write", operations, errors))
+
+
+def read(
+    url: str, pragmas: dict[str, str | int], session_id: str, results: Any
+) -> None:
+    """Page through the session submissions."""
+    engine = _open_engine(url, pragmas)
+    operations = errors = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        try:
+            with engine.connect() as connection:
+                connection.execute(
+                    text(
+                        "SELECT submission.id, user.external_id, submission.overrall_total "
+                        "FROM submission JOIN user ON user.id = submission.user_id "
+                        "WHERE submission.session_id = :session_id "
+                        "ORDER BY submission.created_at, submission.id LIMIT 50 OFFSET :offset"
+                    ),
+                    {
+                        "session_id": session_id,
+                        "offset": random.randrange(0, SUBMISSIONS, 50),
+                    },
+                ).all()
+            operations += 1
+        except OperationalError:
+            errors += 1
+
+    engine.dispose()
+    results.put(("read", operations, errors))
+
+
+def run(pragmas: dict[str, str | int]) -> dict[str, tuple[float, int]]:
+    """Run writers and readers concurrently, returns operations per second and errors."""
+    context = multiprocessing.get_context("spawn")
+    with temporary_engine() as engine:
+        session_id, submission_ids = populate(engine)
+        # journal_mode is persistent, set it up front so every process agrees
+        with engine.connect() as connection:
+            connection.exec_driver_sql(f"PRAGMA journal_mode={pragmas['journal_mode']}")
+
+        url = str(engine.url)
+        results = context.Queue()
+        processes = [
+            context.Process(target=write, args=(url, pragmas, submission_ids, results))
+            for _ in range(WRITERS)
+        ] + [
+            context.Process(target=read, args=(url, pragmas, session_id, results))
+            for _ in range(READERS)
+        ]
+        for process in processes:
+            process.start()
+        totals: dict[str, tuple[float, int]] = {"write": (0, 0), "read": (0, 0)}
+        for _ in processes:
+            kind, operations, errors = results.get()
+            total_operations, total_errors = totals[kind]
+            totals[kind] = (
+                total_operations + operations / DURATION,
+                total_errors + errors,
+            )
+        for process in processes:
+            process.join()
+
+    return totals
+
+
+def main() -> None:
+    print(
+        f"SQLite contention, {WRITERS} writers and {READERS} readers for {DURATION:.0f} s"
+    )
+    for name, pragmas in (
+        ("default profile", DEFAULT_PROFILE),
+        ("tuned profile", sqlite_pragmas()),
+    ):
+        totals = run(pragmas)
+        for kind, (throughput, errors) in totals.items():
+            print(f"  {name:<16} {kind:<6} {throughput:>10.1f} ops/s  {errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import tempfile
+import time
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy import Engine
+from sqlmodel import SQLModel, create_engine
+
+import src.models  # noqa: F401  register the tables on the metadata
+
+
+@contextmanager
+def temporary_engine() -> Generator[Engine, None, None]:
+    """Create an engine on a throw away SQLite file with every table created."""
+    with tempfile.TemporaryDirectory(prefix="codegrade-benchmark-") as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'benchmark.sqlite3'}")
+        SQLModel.metadata.create_all(engine)
+        try:
+            yield engine
+        finally:
+            engine.dispose()
+
+
+def timed(function: Callable[[], object]) -> float:
+    """Run the function and return the elapsed wall clock time in seconds."""
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def report(title: str, results: dict[str, float]) -> None:
+    """Print benchmark results relative to the first (baseline) entry."""
+    baseline = next(iter(results.values()))
+    print(title)
+    for name, elapsed in results.items():
+        print(f"  {name:<24} {elapsed * 1000:>10.1f} ms  x{baseline / elapsed:.1f}")
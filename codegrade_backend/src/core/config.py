@@ -7,9 +7,11 @@ from pydantic import (
     AnyUrl,
     BeforeValidator,
     HttpUrl,
+    PostgresDsn,
     computed_field,
     model_validator,
 )
+from pydantic_core import MultiHostUrl
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing_extensions import Self
 
@@ -51,18 +53,86 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
+    # `postgresql` lets the API and every grading worker write concurrently,
+    # `sqlite` serializes them on the database file lock
+    DATABASE_BACKEND: Literal["sqlite", "postgresql"] = "sqlite"
+    # pool the async engine connections too, they are tied to the event loop
+    # that opened them so it is disabled where every request runs on its own
+    # loop, as the test client does
+    DATABASE_ASYNC_POOL: bool = True
     SQLITE_DATABASE_PATH: str
     TEST_DATABASE_PATH: str
 
-    @computed_field  # type: ignore[prop-decorator]
+    POSTGRES_SERVER: str = "localhost"
+    POSTGRES_PORT: int = 5432
+    POSTGRES_USER: str = "postgres"
+    POSTGRES_PASSWORD: str = ""
+    POSTGRES_DB: str = "codegrade"
+
     @property
-    def SQLALCHEMY_DATABASE_URI(self) -> str:
-        path = (
+    def _database_path(self) -> str:
+        return (
             os.path.realpath(self.SQLITE_DATABASE_PATH)
             if self.ENVIRONMENT in ["local", "production"]
             else os.path.realpath(self.TEST_DATABASE_PATH)
         )
-        return f"sqlite://{path}"
+
+    @property
+    def _postgres_uri(self) -> PostgresDsn:
+        # psycopg 3 serves both the sync and the async engines
+        return MultiHostUrl.build(
+            scheme="postgresql+psycopg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_DATABASE_URI(self) -> str:
+        if self.DATABASE_BACKEND == "postgresql":
+            return str(self._postgres_uri)
+        return f"sqlite://{self._database_path}"
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        if self.DATABASE_BACKEND == "postgresql":
+            return str(self._postgres_uri)
+        return f"sqlite+aiosqlite://{self._database_path}"
+
+    # SQLite settings, applied to every new connection
+    # WAL lets readers proceed while a writer commits
+    SQLITE_JOURNAL_MODE: Literal["WAL", "DELETE", "TRUNCATE", "MEMORY"] = "WAL"
+    # NORMAL only syncs on checkpoints, which is durable enough with WAL
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL"] = "NORMAL"
+    # milliseconds a connection waits on a lock before failing
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    # bytes of the database file memory mapped, 0 disables it
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # page cache per connection, negative values are KiB
+    SQLITE_CACHE_SIZE: int = -64000
+    # connections kept open per process, the API and every worker process
+    # hold their own pool on the same file so keep them small
+    SQLITE_POOL_SIZE: int = 5
+    SQLITE_MAX_OVERFLOW: int = 5
+    # seconds before a pooled connection is reopened
+    SQLITE_POOL_RECYCLE: int = 3600
+
+    # PostgreSQL settings, the pool is per process like the SQLite one but
+    # the server accepts concurrent writers so it can be larger
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 10
+    # seconds a request waits for a pooled connection before failing
+    POSTGRES_POOL_TIMEOUT: int = 30
+    # seconds before a pooled connection is reopened
+    POSTGRES_POOL_RECYCLE: int = 1800
+    # test connections on checkout, so a server restart does not fail requests
+    POSTGRES_POOL_PRE_PING: bool = True
+    # milliseconds a statement may run before the server cancels it, 0 disables it
+    POSTGRES_STATEMENT_TIMEOUT: int = 30000
 
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
@@ -79,6 +149,88 @@ class Settings(BaseSettings):
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379"
     CELERY_GRADING_QUEUE: str
     CELERY_DEFAULT_QUEUE: str
+    CELERY_REPORTS_QUEUE: str = "reports"
+    # lifecycle events are routed by session to one of these queues, each
+    # consumed by a single process so the events of a session keep their order
+    CELERY_EVENTS_QUEUE_PREFIX: str = "events"
+    CELERY_EVENTS_PARTITIONS: int = 4
+
+    # Event settings
+    # most lifecycle events accepted by a single batch request
+    EVENTS_MAX_BATCH_SIZE: int = 500
+    # days a handled event ID is remembered to drop redeliveries of it
+    EVENTS_LEDGER_RETENTION_DAYS: int = 7
+    # seconds between two prunings of the handled events ledger
+    EVENTS_LEDGER_PRUNE_INTERVAL: int = 60 * 60
+    # session, group and user ID lookups kept by each worker process, and the
+    # seconds they are trusted before being read again
+    EVENTS_LOOKUP_CACHE_SIZE: int = 4096
+    EVENTS_LOOKUP_CACHE_TTL: int = 5 * 60
+
+    # Grading settings
+    # executor running the submissions, `local` does not isolate them and
+    # refuses to run in production
+    GRADING_EXECUTOR: Literal["local"] = "local"
+    # number of test cases executed concurrently for a single submission
+    GRADING_MAX_WORKERS: int = 8
+    # number of submissions graded by a single task when a session ends
+    GRADING_BATCH_SIZE: int = 25
+    # wall clock limit (in seconds) for a single test case execution
+    GRADING_EXECUTION_TIMEOUT: float = 10.0
+    # directory the subprocess executor reads submitted sources from
+    GRADING_WORKSPACE_PATH: str = "/codegrade_backend/workspace"
+    # test case executions each worker process remembers, 0 disables the cache
+    GRADING_EXECUTION_CACHE_SIZE: int = 1024
+    # shares the execution results between the workers when set
+    GRADING_EXECUTION_CACHE_REDIS_URL: str | None = None
+    GRADING_EXECUTION_CACHE_KEY_PREFIX: str = "codegrade:executions"
+    # seconds an execution result is kept by redis
+    GRADING_EXECUTION_CACHE_TTL: int = 7 * 24 * 60 * 60
+
+    # Report settings
+    # directory generated PDF reports and archives are stored in, shared by
+    # the reports worker writing them and the server serving them
+    REPORTS_STORAGE_PATH: str = "/codegrade_backend/reports"
+    # seconds after which a report build that has not finished is enqueued again
+    REPORTS_PENDING_TTL: int = 600
+
+    # Analytics settings
+    # width of the bins of the session score histogram
+    ANALYTICS_HISTOGRAM_BIN_WIDTH: float = 10.0
+
+    # Session summary settings
+    # seconds between two rebuilds of every session submission counters
+    SESSION_SUMMARY_RECONCILE_INTERVAL: int = 24 * 60 * 60
+
+    # Response cache settings
+    # `memory` keeps the grading read responses in each process, `redis`
+    # shares them between every API process and worker
+    RESPONSE_CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/1"
+    RESPONSE_CACHE_KEY_PREFIX: str = "codegrade:responses"
+    # submissions whose responses the memory backend holds
+    RESPONSE_CACHE_SIZE: int = 1024
+    # seconds a submission responses are kept by the redis backend
+    RESPONSE_CACHE_TTL: int = 60 * 60
+
+    # Grading progress settings
+    # `redis` relays the grading workers progress to every API replica,
+    # `memory` only reaches the subscribers of the publishing process
+    PROGRESS_BROKER: Literal["memory", "redis"] = "memory"
+    PROGRESS_REDIS_URL: str = "redis://localhost:6379/0"
+    PROGRESS_CHANNEL_PREFIX: str = "codegrade:progress"
+    # seconds between two keep alive comments on an idle progress stream
+    PROGRESS_KEEPALIVE_INTERVAL: float = 15
+
+    # Metrics settings
+    # port the worker side exporter serves the Prometheus metrics on
+    METRICS_WORKER_PORT: int = 9808
+    # log the statements of every request and task, the ones repeated at least
+    # `SQL_REPEATED_STATEMENT_THRESHOLD` times and the ones slower than
+    # `SQL_SLOW_QUERY_THRESHOLD` seconds
+    SQL_PROFILING: bool = False
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 5
+    SQL_SLOW_QUERY_THRESHOLD: float = 0.1
 
     @model_validator(mode="after")
     def _set_default_emails_from(self) -> Self:
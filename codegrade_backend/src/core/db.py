@@ -1,12 +1,94 @@
 import logging
+from typing import Any
 
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from sqlmodel import Session, create_engine, select
 
 from src.core.config import settings
+from src.core.metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    """Get the SQLite performance profile from the settings."""
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+    }
+
+
+def sqlite_pool_options() -> dict[str, Any]:
+    """Get the SQLite connection pool policy from the settings."""
+    return {
+        "pool_size": settings.SQLITE_POOL_SIZE,
+        "max_overflow": settings.SQLITE_MAX_OVERFLOW,
+        "pool_recycle": settings.SQLITE_POOL_RECYCLE,
+    }
+
+
+def postgres_pool_options() -> dict[str, Any]:
+    """Get the PostgreSQL connection pool policy from the settings."""
+    return {
+        "pool_size": settings.POSTGRES_POOL_SIZE,
+        "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+        "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+        "pool_recycle": settings.POSTGRES_POOL_RECYCLE,
+        "pool_pre_ping": settings.POSTGRES_POOL_PRE_PING,
+    }
+
+
+def postgres_connect_args() -> dict[str, Any]:
+    """Get the session settings psycopg sends when connecting."""
+    return {"options": f"-c statement_timeout={settings.POSTGRES_STATEMENT_TIMEOUT}"}
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict[str, str | int]) -> None:
+    """Run the pragmas on every connection the engine opens."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+if settings.DATABASE_BACKEND == "postgresql":
+    pool_options, connect_args = postgres_pool_options(), postgres_connect_args()
+else:
+    pool_options, connect_args = sqlite_pool_options(), {}
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=QueuePool,
+    connect_args=connect_args,
+    **pool_options,
+)
+
+# used by the request path, so awaiting the database does not hold one of
+# the threads FastAPI runs sync dependencies on
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_ASYNC_DATABASE_URI),
+    connect_args=connect_args,
+    **(
+        {"poolclass": AsyncAdaptedQueuePool, **pool_options}
+        if settings.DATABASE_ASYNC_POOL
+        else {"poolclass": NullPool}
+    ),
+)
+
+if settings.DATABASE_BACKEND == "sqlite":
+    apply_sqlite_pragmas(engine, sqlite_pragmas())
+    apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas())
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
 
 
 # make sure all SQLModel models are imported (src.models) before initializing DB
@@ -1,11 +1,12 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.core.db import engine
+from src.core.db import async_engine, engine
 from src.core.security import SECURITY_HEADER, verify_api_key
 
 
@@ -16,6 +17,13 @@ def require_db_session() -> Generator[Session, None, None]:
         yield session
 
 
+async def require_async_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get a new async database session."""
+
+    async with AsyncSession(async_engine) as session:
+        yield session
+
+
 def require_authenticated_service(
     credentials: Annotated[HTTPAuthorizationCredentials, Depends(SECURITY_HEADER)],
 ) -> bool:
@@ -0,0 +1,191 @@
+"""
+Prometheus metrics of the API and the Celery workers.
+
+Both run several processes, when `PROMETHEUS_MULTIPROC_DIR` is set each of
+them writes its samples there and a scrape aggregates the directory: the API
+serves it on `/metrics` and the workers through the exporter started by
+`python -m src.core.metrics`.
+
+The database statements are counted per unit of work, a request or a task,
+by the engines cursor events into the `QueryStats` of the current context,
+which also profiles them when `src.core.profiling` is enabled.
+"""
+
+import contextvars
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    multiprocess,
+    start_http_server,
+)
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.profiling import QueryProfile, profiling_enabled
+
+# a database statement takes milliseconds, a grading task up to minutes
+QUERY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+http_request_duration = Histogram(
+    "codegrade_http_request_duration_seconds",
+    "Time spent handling a request, by route template.",
+    ["method", "route", "status"],
+)
+celery_task_duration = Histogram(
+    "codegrade_celery_task_duration_seconds",
+    "Time spent running a task, by task name and final state.",
+    ["task", "state"],
+    buckets=TASK_BUCKETS,
+)
+celery_task_queue_wait = Histogram(
+    "codegrade_celery_task_queue_wait_seconds",
+    "Time a task waited in its queue between publication and start.",
+    ["task"],
+    buckets=TASK_BUCKETS,
+)
+db_queries = Histogram(
+    "codegrade_db_queries",
+    "Database statements executed by a request or a task.",
+    ["unit", "name"],
+    buckets=COUNT_BUCKETS,
+)
+db_query_duration = Histogram(
+    "codegrade_db_query_duration_seconds",
+    "Time a request or a task spent executing database statements.",
+    ["unit", "name"],
+    buckets=QUERY_BUCKETS,
+)
+lifecycle_event_handler_duration = Histogram(
+    "codegrade_lifecycle_event_handler_duration_seconds",
+    "Time spent by the handler of a lifecycle event.",
+    ["event"],
+    buckets=TASK_BUCKETS,
+)
+event_lookup_cache_lookups = Counter(
+    "codegrade_event_lookup_cache_lookups",
+    "IDs looked up by the lifecycle event handlers in their cache, by kind and result.",
+    ["lookup", "result"],
+)
+execution_cache_lookups = Counter(
+    "codegrade_execution_cache_lookups",
+    "Test case executions looked up in the execution cache, by result.",
+    ["result"],
+)
+
+
+class QueryStats:
+    """The statements executed by a unit of work and the time they took."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.profile = QueryProfile() if profiling_enabled() else None
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record an executed statement."""
+        self.count += 1
+        self.duration += duration
+        if self.profile is not None:
+            self.profile.record(statement, duration)
+
+    def observe(self, unit: str, name: str) -> None:
+        """Record the statements of the finished unit of work."""
+        db_queries.labels(unit=unit, name=name).observe(self.count)
+        db_query_duration.labels(unit=unit, name=name).observe(self.duration)
+        if self.profile is not None:
+            self.profile.report(unit, name, self.count, self.duration)
+
+
+# a mutable holder, so the statements run in the threadpool or in the async
+# engine greenlets, which work on a copy of the context, are counted as well
+_query_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements executed by the current context inside the block."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Add the statements of the engine to the `QueryStats` being tracked."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn: Any, *_: Any) -> None:
+        # the statements of a connection run one after the other
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - conn.info["query_start"])
+
+
+class MetricsMiddleware:
+    """Time the HTTP requests and count their statements per route template."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def _send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                # the template, raw paths would make a series per submission
+                route = scope.get("route")
+                name = getattr(route, "path", "unmatched")
+                http_request_duration.labels(
+                    method=scope["method"], route=name, status=str(status)
+                ).observe(time.perf_counter() - start)
+                stats.observe("request", name)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """Get the registry to scrape, aggregating every process in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    return registry
+
+
+if __name__ == "__main__":
+    # the worker side exporter, the scraped samples are written by the worker
+    # processes to the multiprocess directory
+    start_http_server(settings.METRICS_WORKER_PORT, registry=metrics_registry())
+    while True:
+        time.sleep(60)
@@ -0,0 +1,140 @@
+"""
+Opt in profiling of the database statements of a request or a task.
+
+With `SQL_PROFILING` set, the statements tracked by `src.core.metrics` are
+also grouped by fingerprint, the statement with its parameter lists
+collapsed, and timed one by one. Once the unit of work is over, the
+fingerprints executed `SQL_REPEATED_STATEMENT_THRESHOLD` times or more, the
+signature of a lazy load per row, and the statements slower than
+`SQL_SLOW_QUERY_THRESHOLD` seconds are logged with the route or task name.
+
+Tests collect the reports with `collect_reports`, which profiles whatever
+the setting while it is active.
+"""
+
+import re
+import threading
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from src.core.config import settings
+from src.log import logger
+
+# the placeholders of the sqlite, psycopg and named paramstyles
+_PARAMETER = r"(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)"
+_PARAMETER_LIST = re.compile(rf"\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# the reports lists of the active `collect_reports` blocks, shared by every
+# thread as the test client serves the requests from its own
+_collectors: list[list["QueryReport"]] = []
+_collectors_lock = threading.Lock()
+
+
+def fingerprint(statement: str) -> str:
+    """Get the statement with its whitespace and `IN` parameter lists collapsed."""
+    return _PARAMETER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def profiling_enabled() -> bool:
+    """Whether the statements of the units of work starting now are profiled."""
+    return settings.SQL_PROFILING or bool(_collectors)
+
+
+@dataclass
+class QueryReport:
+    """The profiled statements of a finished request or task."""
+
+    unit: str
+    name: str
+    count: int
+    duration: float
+    repeated: dict[str, int] = field(default_factory=dict)
+    slow: list[tuple[float, str]] = field(default_factory=list)
+
+    def describe(self) -> str:
+        """Describe the report in a few lines, for logs and failed assertions."""
+        lines = [
+            f"{self.unit} {self.name}: {self.count} statements in {self.duration:.3f}s"
+        ]
+        lines += [
+            f"  {count}x {statement}" for statement, count in self.repeated.items()
+        ]
+        lines += [
+            f"  slow {duration:.3f}s {statement}" for duration, statement in self.slow
+        ]
+        return "\n".join(lines)
+
+
+class QueryProfile:
+    """The statements of a unit of work by fingerprint, and the slow ones."""
+
+    def __init__(self) -> None:
+        self.fingerprints: Counter[str] = Counter()
+        self.slow: list[tuple[float, str]] = []
+
+    def record(self, statement: str, duration: float) -> None:
+        """Record an executed statement."""
+        key = fingerprint(statement)
+        self.fingerprints[key] += 1
+        if duration >= settings.SQL_SLOW_QUERY_THRESHOLD:
+            self.slow.append((duration, key))
+
+    def report(self, unit: str, name: str, count: int, duration: float) -> QueryReport:
+        """Log the profile of the finished unit of work and hand it to the collectors."""
+        report = QueryReport(
+            unit=unit,
+            name=name,
+            count=count,
+            duration=duration,
+            repeated={
+                statement: times
+                for statement, times in self.fingerprints.most_common()
+                if times >= settings.SQL_REPEATED_STATEMENT_THRESHOLD
+            },
+            slow=sorted(self.slow, reverse=True),
+        )
+
+        # `name` is a reserved log record attribute, the unit kind is the key
+        context = {unit: name, "statements": count, "duration": duration}
+        logger.info(
+            f"src:core:profiling:: {unit} {name} executed {count} statements "
+            f"in {duration:.3f}s",
+            extra=context,
+        )
+        for statement, times in report.repeated.items():
+            logger.warning(
+                f"src:core:profiling:: {unit} {name} repeated a statement "
+                f"{times} times, likely an N+1 query: {statement}",
+                extra={**context, "times": times, "statement": statement},
+            )
+        for statement_duration, statement in report.slow:
+            logger.warning(
+                f"src:core:profiling:: {unit} {name} ran a slow statement "
+                f"({statement_duration:.3f}s): {statement}",
+                extra={
+                    **context,
+                    "statement_duration": statement_duration,
+                    "statement": statement,
+                },
+            )
+
+        with _collectors_lock:
+            for reports in _collectors:
+                reports.append(report)
+        return report
+
+
+@contextmanager
+def collect_reports() -> Iterator[list[QueryReport]]:
+    """Profile the units of work finished inside the block and collect their reports."""
+    reports: list[QueryReport] = []
+    with _collectors_lock:
+        _collectors.append(reports)
+    try:
+        yield reports
+    finally:
+        with _collectors_lock:
+            _collectors.remove(reports)
@@ -3,7 +3,8 @@ from typing import Annotated
 from fastapi import APIRouter, Depends
 
 from src.core.dependecies import require_authenticated_service
-from src.events.services import event_handler
+from src.events.schemas import LifeCycleEventBatchResultSchema
+from src.events.services import event_handler, events_batch_handler
 
 router = APIRouter()
 
@@ -14,3 +15,11 @@ def execute_lifecycle_event(
 ) -> dict[str, str]:
     """Execute the lifecycle event."""
     return {"message": "Lifecycle event executed"}
+
+
+@router.post("/lifecycle/batch/", dependencies=[Depends(require_authenticated_service)])
+def execute_lifecycle_events_batch(
+    result: Annotated[LifeCycleEventBatchResultSchema, Depends(events_batch_handler)],
+) -> LifeCycleEventBatchResultSchema:
+    """Execute a batch of lifecycle events, reporting which were accepted."""
+    return result
@@ -0,0 +1,98 @@
+"""
+Worker local cache of the external to internal ID lookups of the event handlers.
+
+A session, its groups and its users keep their IDs for the whole session, so
+the handlers resolve them once and reuse them for the following events. The
+lifecycle events of a session are all handled by the same single process
+worker, so the invalidations done by its `session_ended` and
+`user_joined_session` handlers are seen by every later lookup, the TTL only
+bounds how long a change made outside of the events goes unnoticed.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, NamedTuple, TypeVar, cast
+
+from src.core.config import settings
+from src.core.metrics import event_lookup_cache_lookups
+
+T = TypeVar("T")
+
+
+class UserRef(NamedTuple):
+    """The IDs of a user needed to create its submission."""
+
+    id: uuid.UUID
+    group_id: uuid.UUID | None
+
+
+class LookupCache:
+    """
+    LRU cache with a TTL, keyed by the external session ID first.
+
+    Keys are tuples starting with the external session ID, so every lookup
+    of a session is dropped at once by `invalidate_session`. Hits and misses
+    are also exported per kind of lookup, the second item of the key.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[Hashable, ...], tuple[float, Any]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: tuple[Hashable, ...], load: Callable[[], T]) -> T:
+        """Get the cached value of the key, loading and caching it on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                event_lookup_cache_lookups.labels(lookup=key[1], result="hit").inc()
+                return cast(T, entry[1])
+            self.misses += 1
+            event_lookup_cache_lookups.labels(lookup=key[1], result="miss").inc()
+
+        # loaders raise when nothing is found, misses are never cached
+        value = load()
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def invalidate_session(self, external_session_id: str) -> None:
+        """Forget every lookup of the session."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == external_session_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Forget every lookup and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Get the hit and miss counters and the number of cached lookups."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+            }
+
+
+lookup_cache = LookupCache(
+    maxsize=settings.EVENTS_LOOKUP_CACHE_SIZE, ttl=settings.EVENTS_LOOKUP_CACHE_TTL
+)
@@ -1,82 +1,126 @@
+import uuid
+from collections.abc import Sequence
+from typing import Any
+
 from sqlalchemy.exc import NoResultFound
-from sqlmodel import or_, select
+from sqlmodel import col, insert, select
 
 from src.enums import SubmissionStatus
+from src.events.cache import UserRef, lookup_cache
 from src.events.handlers.base import AbstractLifeCycleEventHandler
 from src.events.handlers.schemas import InidividualSubmissionEventData
+from src.grading.summary import record_changes, status_changes
 from src.log import logger
 from src.models import (
-    Session,
     Group,
+    Session,
     Submission,
     User,
 )
 
 
 class IndividualSubmissionEventHandler(AbstractLifeCycleEventHandler):
-    """Handler for individual submission events."""
-
-    def _get_session(self, external_session_id: str) -> Session:
-        """Get the session."""
-        return self.db_session.exec(
-            select(Session).where(
-                Session.external_id == external_session_id,
-                Session.is_active == True,  # Only active sessions are considered
-            )
-        ).one()
+    """
+    Handler for individual submission events.
+
+    The session, group and user lookups go through the worker lookup cache,
+    so the submissions of a known session cost only their own queries.
+    """
+
+    def _get_session_id(self, external_session_id: str) -> uuid.UUID:
+        """Get the ID of the active session."""
+        return lookup_cache.get_or_load(
+            (external_session_id, "session"),
+            lambda: self.db_session.exec(
+                select(Session.id).where(
+                    Session.external_id == external_session_id,
+                    Session.is_active == True,  # Only active sessions are considered
+                )
+            ).one(),
+        )
 
     def _get_group_students(
-        self, session: Session, external_group_id: str
-    ) -> list[User]:
+        self, external_session_id: str, session_id: uuid.UUID, external_group_id: str
+    ) -> tuple[UserRef, ...]:
         """Get the students in the group."""
-        group = self.db_session.exec(
-            select(Group).where(
-                Group.session_id == session.id,
-                Group.external_id == external_group_id,
-            )
-        ).one()
-        
-        students = self.db_session.exec(
-            select(User).where(User.group_id == group.id)
-        ).all()
-        return students
-
-    def _get_user(self, session: Session, external_user_id: str) -> User:
+
+        def _load() -> tuple[UserRef, ...]:
+            students = self.db_session.exec(
+                select(User.id, User.group_id)
+                .join(Group, col(User.group_id) == Group.id)
+                .where(
+                    Group.session_id == session_id,
+                    Group.external_id == external_group_id,
+                )
+            ).all()
+            if not students:
+                raise NoResultFound(f"No students found for group {external_group_id}")
+
+            return tuple(UserRef(*student) for student in students)
+
+        return lookup_cache.get_or_load(
+            (external_session_id, "group", external_group_id), _load
+        )
+
+    def _get_user(
+        self, external_session_id: str, session_id: uuid.UUID, external_user_id: str
+    ) -> UserRef:
         """Get the user."""
-        return self.db_session.exec(
-            select(User).where(
-                User.session_id == session.id,
-                User.external_id == external_user_id,
-            )
-        ).one()
+        return lookup_cache.get_or_load(
+            (external_session_id, "user", external_user_id),
+            lambda: UserRef(
+                *self.db_session.exec(
+                    select(User.id, User.group_id).where(
+                        User.session_id == session_id,
+                        User.external_id == external_user_id,
+                    )
+                ).one()
+            ),
+        )
 
-    def _create_submission(
+    def _create_submissions(
         self,
-        session: Session,
-        user: User,
-    ) -> Submission | None:
-        """Create the submission."""
-
-        submission = self.db_session.exec(
-            select(Submission)
-            .where(Submission.session_id == session.id)
-            .where(Submission.user_id == user.id)
-        ).first()
-
-        if submission:
-            return None
-
-        submission = Submission(
-            session_id=session.id,
-            status=SubmissionStatus.QUEUED,
-            group_id=user.group_id,
-            total_score=None,
-            user_id=user.id,
+        session_id: uuid.UUID,
+        users: Sequence[UserRef],
+    ) -> list[dict[str, Any]]:
+        """
+        Create the submissions of the users that have not submitted yet.
+
+        The existing submissions of all the users are fetched in one query and
+        the missing ones are written with one bulk insert in one transaction,
+        so a group costs the same round trips as a single student.
+        """
+
+        submitted = set(
+            self.db_session.exec(
+                select(Submission.user_id).where(
+                    Submission.session_id == session_id,
+                    col(Submission.user_id).in_([user.id for user in users]),
+                )
+            ).all()
         )
 
-        self.db_session.add(submission)
-        self.db_session.commit()
-        return submission
+        submissions = [
+            {
+                "id": uuid.uuid4(),
+                "session_id": session_id,
+                "status": SubmissionStatus.QUEUED,
+                "group_id": user.group_id,
+                "user_id": user.id,
+            }
+            for user in users
+            if user.id not in submitted
+        ]
+        if submissions:
+            self.db_session.execute(insert(Submission), submissions)
+            record_changes(
+                self.db_session,
+                session_id,
+                status_changes((None, SubmissionStatus.QUEUED) for _ in submissions),
+            )
+            self.db_session.commit()
+
+        return submissions
 
     def handle_event(
         self,
@@ -86,23 +130,23 @@ class IndividualSubmissionEventHandler(AbstractLifeCycleEventHandler):
         """Handle the event data."""
 
         try:
-            session = self._get_session(external_session_id)
-            group, user = None, None
+            session_id = self._get_session_id(external_session_id)
 
-            submissions = []
+            users: Sequence[UserRef]
             if event_data.external_group_id:
-                students = self._get_group_students(session, event_data.external_group_id)
-                for user in students:
-                    submission = self._create_submission(session, user, group)
-                    if submission:
-                        submissions.append(submission)
-
-            if event_data.external_student_id:
-                user = self._get_user(session, event_data.external_student_id)
-                submission = self._create_submission(session, user, group)
-                if submission:
-                    submissions.append(submission)
-
+                users = self._get_group_students(
+                    external_session_id, session_id, event_data.external_group_id
+                )
+            else:
+                users = [
+                    self._get_user(
+                        external_session_id,
+                        session_id,
+                        event_data.external_student_id,  # type: ignore
+                    )
+                ]
+
+            submissions = self._create_submissions(session_id, users)
             if submissions:
                 # TODO: send the submission into grading queue.
                 pass
@@ -1,102 +1,115 @@
+import uuid
+from typing import Any
+
+from sqlmodel import insert
+
 from src.events.handlers.base import AbstractLifeCycleEventHandler
 from src.events.handlers.schemas import (
     GroupCreationSchema,
     SessionCreationEventData,
     UserCreationSchema,
 )
-from src.models import Exercise, Session, Group, TestCase, User
+from src.models import Exercise, Group, Session, SessionSummary, TestCase, User
 
 
 class SessionCreatedEventHandler(AbstractLifeCycleEventHandler):
-    """Handler for session created events."""
+    """
+    Handler for session created events.
+
+    Every row is built in memory with its primary key generated up front, so
+    the whole session is written with one bulk insert per table inside a
+    single transaction, regardless of the number of groups and students.
+    """
 
     def _create_session(
         self,
         external_session_id: str,
         event_data: SessionCreationEventData,
-    ) -> Session:
+    ) -> dict[str, Any]:
         """Create a new session."""
-        session = Session(
-            external_id=external_session_id,
-            title=event_data.session_title,
-            description=event_data.session_description,
-            is_active=True,
-        )
-
-        self.db_session.add(session)
-        self.db_session.commit()
-        self.db_session.refresh(session)
-        return session
+        return {
+            "id": uuid.uuid4(),
+            "external_id": external_session_id,
+            "title": event_data.session_title,
+            "description": event_data.session_description,
+            "is_active": True,
+        }
 
     def _create_exercise(
-        self, session: Session, event_data: SessionCreationEventData
-    ) -> None:
+        self, session_id: uuid.UUID, event_data: SessionCreationEventData
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
         """Create exercises and its associated test cases."""
+        exercises: list[dict[str, Any]] = []
+        test_cases: list[dict[str, Any]] = []
         for exercise in event_data.exercises:
-            exercise_record = Exercise(
-                external_id=exercise.external_id,
-                session_id=session.id,
-                title=exercise.title,
-                question=exercise.question,
-                instructions=exercise.instructions,
+            exercise_id = uuid.uuid4()
+            exercises.append(
+                {
+                    "id": exercise_id,
+                    "external_id": exercise.external_id,
+                    "session_id": session_id,
+                    "question": exercise.question,
+                    "instructions": exercise.instructions,
+                }
             )
-
-            test_cases = [
-                TestCase(
-                    title=test_case.title,
-                    external_id=test_case.external_id,
-                    exercise_id=exercise_record.id,
-                    test_input=test_case.test_input,
-                    expected_output=test_case.expected_output,
-                    score_percentage=test_case.score_percentage,
-                )
+            test_cases.extend(
+                {
+                    "id": uuid.uuid4(),
+                    "title": test_case.title,
+                    "external_id": test_case.external_id,
+                    "exercise_id": exercise_id,
+                    "test_input": test_case.test_input,
+                    "expected_output": test_case.expected_output,
+                    "score_percentage": test_case.score_percentage,
+                }
                 for test_case in exercise.test_cases
-            ]
-
-            self.db_session.add_all([exercise_record, *test_cases])
+            )
 
-        self.db_session.commit()
+        return exercises, test_cases
 
     def _create_users(
         self,
-        session: Session,
+        session_id: uuid.UUID,
         user_data: list[UserCreationSchema],
-        group: Group | None = None,
-    ) -> list[User]:
+        group_id: uuid.UUID | None = None,
+    ) -> list[dict[str, Any]]:
         """Create new users."""
-        users = [
-            User(
-                external_id=user.external_id,
-                session_id=session.id,
-                group_id=group.id if group else None,
-            )
+        return [
+            {
+                "id": uuid.uuid4(),
+                "external_id": user.external_id,
+                "session_id": session_id,
+                "group_id": group_id,
+            }
             for user in user_data
         ]
 
-        self.db_session.add_all(users)
-        self.db_session.commit()
-        return users
-
     def _create_groups(
         self,
-        session: Session,
+        session_id: uuid.UUID,
         group_data: list[GroupCreationSchema],
-    ) -> None:
-        """Create new groups."""
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+        """Create new groups and their users."""
+        groups: list[dict[str, Any]] = []
+        users: list[dict[str, Any]] = []
         for group in group_data:
-            group_record = Group(
-                external_id=group.external_id,
-                session_id=session.id,
+            group_id = uuid.uuid4()
+            groups.append(
+                {
+                    "id": group_id,
+                    "external_id": group.external_id,
+                    "session_id": session_id,
+                }
             )
-
-            users = self._create_users(
-                session=session,
-                user_data=group.students,
-                group=group_record,
+            users.extend(
+                self._create_users(
+                    session_id=session_id,
+                    user_data=group.students,
+                    group_id=group_id,
+                )
             )
-            self.db_session.add_all([group_record, *users])
 
-        self.db_session.commit()
+        return groups, users
 
     def handle_event(
         self,
@@ -109,11 +122,27 @@ class SessionCreatedEventHandler(AbstractLifeCycleEventHandler):
         session = self._create_session(external_session_id, event_data)
 
         # create excesises and their associated test cases
-        self._create_exercise(session, event_data)
+        exercises, test_cases = self._create_exercise(session["id"], event_data)
 
         # finally create all users and groups
+        groups: list[dict[str, Any]] = []
+        users: list[dict[str, Any]] = []
         if event_data.students:
-            self._create_users(session, event_data.students)
+            users = self._create_users(session["id"], event_data.students)
 
         if event_data.groups:
-            self._create_groups(session, event_data.groups)
+            groups, users = self._create_groups(session["id"], event_data.groups)
+
+        # insert in foreign key order, each table is a single executemany
+        for model, rows in (
+            (Session, [session]),
+            (SessionSummary, [{"id": uuid.uuid4(), "session_id": session["id"]}]),
+            (Exercise, exercises),
+            (TestCase, test_cases),
+            (Group, groups),
+            (User, users),
+        ):
+            if rows:
+                self.db_session.execute(insert(model), rows)
+
+        self.db_session.commit()
@@ -1,13 +1,18 @@
 from collections.abc import Sequence
 
+from celery import chord
 from sqlalchemy.exc import NoResultFound
 from sqlmodel import col, select
 
+from src.core.config import settings
 from src.enums import SubmissionStatus
+from src.events.cache import lookup_cache
 from src.events.handlers.base import AbstractLifeCycleEventHandler
 from src.events.handlers.schemas import SessionEndedEventData
+from src.grading.summary import record_changes, status_changes
 from src.log import logger
 from src.models import Session, Submission, User
+from src.worker import celery_app
 
 
 class SessionEndedEventHandler(AbstractLifeCycleEventHandler):
@@ -49,14 +54,63 @@ class SessionEndedEventHandler(AbstractLifeCycleEventHandler):
         ]
 
         self.db_session.add_all(submissions)
+        record_changes(
+            self.db_session,
+            session.id,
+            status_changes((None, SubmissionStatus.QUEUED) for _ in submissions),
+        )
         self.db_session.commit()
         return submissions
 
+    def _get_queued_submissions(self, session: Session) -> Sequence[Submission]:
+        """Get the session submissions still waiting to be graded."""
+        return self.db_session.exec(
+            select(Submission).where(
+                Submission.session_id == session.id,
+                Submission.status == SubmissionStatus.QUEUED,
+            )
+        ).all()
+
     def _send_submissions_to_grading_queue(
-        self, submissions: Sequence[Submission]
+        self, session: Session, submissions: Sequence[Submission]
     ) -> None:
-        """Send submissions to grading queue."""
-        pass
+        """
+        Send submissions to grading queue.
+
+        Submissions are sent in batches of `GRADING_BATCH_SIZE` and grouped in a
+        chord, its callback records when the whole session has been graded.
+        The members of a group follow each other, so a batch grades the group
+        once rather than splitting it with another worker.
+        """
+        submission_ids = [
+            str(submission.id)
+            for submission in sorted(
+                submissions,
+                key=lambda submission: (
+                    submission.group_id is None,
+                    str(submission.group_id),
+                ),
+            )
+        ]
+        if not submission_ids:
+            return
+
+        batch_size = settings.GRADING_BATCH_SIZE
+        batches = [
+            celery_app.signature(
+                "grading_submissions_batch_task",
+                args=(submission_ids[index : index + batch_size],),
+                queue=settings.CELERY_GRADING_QUEUE,
+            )
+            for index in range(0, len(submission_ids), batch_size)
+        ]
+        chord(batches)(
+            celery_app.signature(
+                "session_grading_completed_task",
+                kwargs={"session_id": str(session.id)},
+                queue=settings.CELERY_DEFAULT_QUEUE,
+            )
+        )
 
     def _deactivate_session(self, session: Session) -> None:
         """Deactivate session."""
@@ -73,12 +127,15 @@ class SessionEndedEventHandler(AbstractLifeCycleEventHandler):
 
         try:
             session = self._get_session(external_session_id)
-            user_submissions = self._collect_user_submissions(session)
-            self._send_submissions_to_grading_queue(user_submissions)
+            self._collect_user_submissions(session)
+            self._send_submissions_to_grading_queue(
+                session, self._get_queued_submissions(session)
+            )
 
             # deactivate the session once all submissions have been sent to the grading queue.
             # to ensure that we cant take any more lifecycle events for this session
             self._deactivate_session(session)
+            lookup_cache.invalidate_session(external_session_id)
         except NoResultFound as error:
             self.db_session.rollback()
             logger.error(
@@ -1,13 +1,14 @@
+from sqlmodel import select
+
+from src.events.cache import lookup_cache
 from src.events.handlers.base import AbstractLifeCycleEventHandler
 from src.events.handlers.schemas import UserJoinedSessionEventData
-from sqlmodel import select
 from src.models import Session, User
 
 
-
 class UserJoinedSessionEventHandler(AbstractLifeCycleEventHandler):
     """Handler for user joined session events."""
-    
+
     def _get_session(self, external_session_id: str) -> Session:
         """Get the session."""
         return self.db_session.exec(
@@ -18,22 +19,22 @@ class UserJoinedSessionEventHandler(AbstractLifeCycleEventHandler):
         ).one()
 
     def _get_user(
-        self, 
+        self,
         session: Session,
         event_data: UserJoinedSessionEventData,
     ) -> User:
         """Get the user by external ID."""
         return self.db_session.exec(
             select(User).where(
-                external_id=event_data.external_user_id,
-                session_id=session.id,
+                User.external_id == event_data.external_user_id,
+                User.session_id == session.id,
             )
-        )
+        ).one()
 
     def handle_event(
         self,
         external_session_id: str,
-        event_data: UserJoinedSessionEventData,
+        event_data: UserJoinedSessionEventData,  # type: ignore
     ) -> None:
         """Handle the event data."""
         session = self._get_session(external_session_id)
@@ -41,3 +42,5 @@ class UserJoinedSessionEventHandler(AbstractLifeCycleEventHandler):
         user.fullname = event_data.fullname
         self.db_session.add(user)
         self.db_session.commit()
+        # the session users changed, its cached lookups are read again
+        lookup_cache.invalidate_session(external_session_id)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, PositiveFloat, model_validator
+from typing import Any
+
+from pydantic import BaseModel, Field, PositiveFloat, model_validator
 from src.enums import EvaluationFlagEnum, SubmissionStatus
 from typing_extensions import Self
 
@@ -13,6 +15,9 @@ from src.events.handlers.schemas import (
 
 
 class LifeCycleEventData(BaseModel):
+    # set by the client to dedupe its retries, generated on ingestion otherwise
+    # so broker redeliveries are deduped all the same
+    event_id: uuid.UUID = Field(default_factory=uuid.uuid4)
     event: LIfeCycleEvent
     external_session_id: str
     event_data: (
@@ -42,3 +47,15 @@ class LifeCycleEventData(BaseModel):
                 raise ValueError("Event data must be of type UserJoinedSessionEventData.")
 
         return self
+
+
+class LifeCycleEventStatusSchema(BaseModel):
+    index: int
+    accepted: bool
+    errors: list[dict[str, Any]] | None = None
+
+
+class LifeCycleEventBatchResultSchema(BaseModel):
+    accepted: int
+    rejected: int
+    results: list[LifeCycleEventStatusSchema]
@@ -1,11 +1,95 @@
-from typing import Annotated
+import zlib
+from collections import defaultdict
+from typing import Annotated, Any
 
 from fastapi import Body, Path
+from pydantic import ValidationError
 
-from src.events.schemas import LifeCycleEventData
-from src.events.tasks import lifecycle_event_handler_task
+from src.core.config import settings
+from src.events.schemas import (
+    LifeCycleEventBatchResultSchema,
+    LifeCycleEventData,
+    LifeCycleEventStatusSchema,
+)
+from src.events.tasks import (
+    lifecycle_event_handler_task,
+    lifecycle_events_batch_handler_task,
+)
+
+
+def event_queue(external_session_id: str) -> str:
+    """
+    Get the queue the events of the session are published to.
+
+    The partition is a stable hash of the session, so every API process
+    routes a session to the same single consumer queue and its events are
+    handled in the order they were sent, while sessions spread over the
+    partitions are handled in parallel.
+    """
+    partition = (
+        zlib.crc32(external_session_id.encode()) % settings.CELERY_EVENTS_PARTITIONS
+    )
+    return f"{settings.CELERY_EVENTS_QUEUE_PREFIX}-{partition}"
 
 
 def event_handler(event_data: Annotated[LifeCycleEventData, Body(...)]) -> None:
     """Handle the event data."""
-    lifecycle_event_handler_task.delay(event_data.model_dump(mode="json"))
+    lifecycle_event_handler_task.apply_async(
+        args=(event_data.model_dump(mode="json"),),
+        queue=event_queue(event_data.external_session_id),
+    )
+
+
+def events_batch_handler(
+    events: Annotated[
+        list[dict[str, Any]],
+        Body(min_length=1, max_length=settings.EVENTS_MAX_BATCH_SIZE),
+    ],
+) -> LifeCycleEventBatchResultSchema:
+    """
+    Validate a batch of events and queue the valid ones.
+
+    Invalid events are reported back without rejecting the whole batch, the
+    valid ones are published in one task per event queue they route to, so
+    the batch costs at most one broker round trip per partition and the
+    events of each session are handled in the order they were sent.
+    """
+
+    accepted: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    results: list[LifeCycleEventStatusSchema] = []
+    for index, event in enumerate(events):
+        try:
+            event_data = LifeCycleEventData.model_validate(event)
+        except ValidationError as error:
+            results.append(
+                LifeCycleEventStatusSchema(
+                    index=index,
+                    accepted=False,
+                    errors=[
+                        {
+                            "loc": detail["loc"],
+                            "msg": detail["msg"],
+                            "type": detail["type"],
+                        }
+                        for detail in error.errors(include_url=False)
+                    ],
+                )
+            )
+            continue
+
+        accepted[event_queue(event_data.external_session_id)].append(
+            event_data.model_dump(mode="json")
+        )
+        results.append(LifeCycleEventStatusSchema(index=index, accepted=True))
+
+    for queue, queue_events in accepted.items():
+        lifecycle_events_batch_handler_task.apply_async(
+            args=(queue_events,), queue=queue
+        )
+
+    accepted_count = sum(len(queue_events) for queue_events in accepted.values())
+    return LifeCycleEventBatchResultSchema(
+        accepted=accepted_count,
+        rejected=len(events) - accepted_count,
+        results=results,
+    )
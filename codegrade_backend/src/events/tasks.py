@@ -1,28 +1,71 @@
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from pydantic import UUID4, ValidationError
-from sqlmodel import Session
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, delete, select, update
 
 from src.core.config import settings
 from src.core.db import engine
+from src.core.metrics import lifecycle_event_handler_duration
+from src.enums import SubmissionStatus
 from src.events.handlers import MAP
 from src.events.schemas import LifeCycleEventData
+from src.grading.cache import response_cache
+from src.grading.engine import GradingEngine
+from src.grading.executors import get_executor
+from src.grading.progress import progress_broker
+from src.grading.schemas import SubmissionProgressSchema
+from src.grading.summary import record_changes, status_changes
 from src.log import logger
+from src.models import ProcessedEvent, Submission
+from src.models import Session as SessionModel
 from src.worker import celery_app
 
 
-@celery_app.task(name="lifecycle_event_handler_task")
-def lifecycle_event_handler_task(serialized_event_data: Any) -> None:
-    """Handle the lifecycle events in background."""
+def _record_processed_event(session: Session, event_data: LifeCycleEventData) -> None:
+    """
+    Add the event to the handled events ledger.
+
+    Handlers commit as they go, so the event is recorded once its handler
+    succeeded. A redelivery running concurrently may have recorded it first,
+    its handler already ran and so did this one, nothing is left to do.
+    """
+    session.add(ProcessedEvent(id=event_data.event_id, event=event_data.event.value))
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        logger.warning(
+            "src:events:tasks:lifecycle_event_handler_task:: Event handled concurrently",
+            extra={"event_id": str(event_data.event_id)},
+        )
+
+
+def _handle_lifecycle_event(serialized_event_data: Any) -> None:
+    """Validate the event and run its handler, invalid events are logged and dropped."""
 
     try:
         with Session(engine) as session:
             event_data = LifeCycleEventData.model_validate(serialized_event_data)
+            # a primary key lookup, so a replay is dropped before any handler work
+            if session.get(ProcessedEvent, event_data.event_id):
+                logger.info(
+                    "src:events:tasks:lifecycle_event_handler_task:: Duplicate event dropped",
+                    extra={"event_id": str(event_data.event_id)},
+                )
+                return
+
             handler = MAP[event_data.event](db_session=session)
-            handler.handle_event(
-                external_session_id=event_data.external_session_id,
-                event_data=event_data.event_data,
-            )
+            with lifecycle_event_handler_duration.labels(
+                event=event_data.event.value
+            ).time():
+                handler.handle_event(
+                    external_session_id=event_data.external_session_id,
+                    event_data=event_data.event_data,
+                )
+            _record_processed_event(session, event_data)
     except ValidationError as error:
         logger.info(str(error))
         logger.error(
@@ -48,14 +91,194 @@ def lifecycle_event_handler_task(serialized_event_data: Any) -> None:
         raise error
 
 
+# acknowledged once handled, a worker dying mid event gets it redelivered and
+# the handled events ledger drops the redeliveries of events that completed
+@celery_app.task(name="lifecycle_event_handler_task", acks_late=True)
+def lifecycle_event_handler_task(serialized_event_data: Any) -> None:
+    """Handle the lifecycle events in background."""
+    _handle_lifecycle_event(serialized_event_data)
+
+
+@celery_app.task(name="lifecycle_events_batch_handler_task", acks_late=True)
+def lifecycle_events_batch_handler_task(serialized_events: list[Any]) -> None:
+    """
+    Handle a batch of lifecycle events in background, in the order received.
+
+    An event failing does not stop the ones after it, it is logged and the
+    batch moves on.
+    """
+    for serialized_event_data in serialized_events:
+        try:
+            _handle_lifecycle_event(serialized_event_data)
+        except Exception:
+            logger.exception(
+                "src:events:tasks:lifecycle_events_batch_handler_task:: Failed to handle event",
+                extra={"serialized_event_data": serialized_event_data},
+            )
+
+
+@celery_app.task(name="prune_processed_events_task")
+def prune_processed_events_task() -> int:
+    """Forget the handled events older than the ledger retention, returns how many."""
+
+    # naive UTC, as stored by the database `CURRENT_TIMESTAMP` default
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(
+        days=settings.EVENTS_LEDGER_RETENTION_DAYS
+    )
+    with Session(engine) as session:
+        result = session.exec(
+            delete(ProcessedEvent).where(col(ProcessedEvent.created_at) < cutoff)  # type: ignore
+        )
+        session.commit()
+
+    return int(result.rowcount)
+
+
+def _invalidate_cached_responses(submission_id: str) -> None:
+    """Drop the cached responses of a submission once its grading is over."""
+    try:
+        response_cache.invalidate(uuid.UUID(submission_id))
+    except Exception:
+        # the submission version moved anyway, a failure only leaves unused entries
+        logger.exception(
+            "src:events:tasks:_invalidate_cached_responses:: Failed to invalidate cached responses",
+            extra={"submission_id": submission_id},
+        )
+
+
 @celery_app.task(
     name="grading_user_submission_task", queue=settings.CELERY_GRADING_QUEUE
 )
-def grading_user_submission_task(submission_id: UUID4) -> None:
+def grading_user_submission_task(submission_id: UUID4 | str) -> None:
     """Grade a users submission."""
 
-    # get the users submissin
-    # ensure that the state of the submission is queud
-    # for each test case send a request to codelab to excute the exercise with the required test case
-    # compare results and complete grading.
+    graded: list[uuid.UUID] = []
+    with Session(engine) as session:
+        try:
+            graded = GradingEngine(
+                db_session=session, executor=get_executor()
+            ).grade_with_group(uuid.UUID(str(submission_id)))
+        finally:
+            for graded_id in {str(submission_id), *map(str, graded)}:
+                _invalidate_cached_responses(graded_id)
+
+
+def _mark_submission_failed(session: Session, submission_id: str) -> None:
+    """Mark a submission whose grading broke down as failed."""
+    session.rollback()
+    row = session.exec(
+        select(
+            Submission.session_id, Submission.status, Submission.overrall_total
+        ).where(Submission.id == uuid.UUID(submission_id))
+    ).first()
+    if row is None or row[1] == SubmissionStatus.GRADED:
+        return
+
+    session_id, status, overrall_total = row
+    result = session.exec(
+        update(Submission)  # type: ignore
+        .where(
+            col(Submission.id) == uuid.UUID(submission_id),
+            # the status the counters are moved from
+            col(Submission.status) == status,
+        )
+        .values(status=SubmissionStatus.FAILED)
+    )
+    if not result.rowcount:
+        # moved on concurrently, left to whoever moved it
+        session.rollback()
+        return
+
+    record_changes(
+        session,
+        session_id,
+        status_changes([(SubmissionStatus(status), SubmissionStatus.FAILED)]),
+    )
+    session.commit()
+    progress_broker.publish(
+        session_id,
+        "submission",
+        SubmissionProgressSchema(
+            id=uuid.UUID(submission_id),
+            status=SubmissionStatus.FAILED,
+            overrall_total=overrall_total,
+        ).model_dump(mode="json"),
+    )
+
+
+@celery_app.task(
+    name="grading_submissions_batch_task", queue=settings.CELERY_GRADING_QUEUE
+)
+def grading_submissions_batch_task(submission_ids: list[str]) -> list[str]:
+    """Grade a batch of submissions, returns the IDs of the graded ones."""
+
+    graded: list[str] = []
+    with Session(engine) as session:
+        grading_engine = GradingEngine(db_session=session, executor=get_executor())
+        for submission_id in submission_ids:
+            if submission_id in graded:
+                # graded along with a member of its group earlier in the batch
+                continue
+
+            graded_with_group: list[str] = []
+            try:
+                graded_with_group = [
+                    str(graded_id)
+                    for graded_id in grading_engine.grade_with_group(
+                        uuid.UUID(submission_id)
+                    )
+                ]
+                graded += graded_with_group
+            except Exception as error:
+                logger.exception(
+                    "src:events:tasks:grading_submissions_batch_task:: Failed to grade submission",
+                    extra={"submission_id": submission_id, "error": str(error)},
+                )
+                # the engine may have failed before recording the failure,
+                # e.g. while loading the submission, make sure it is not left
+                # queued or grading, then carry on with the batch so the
+                # chord callback still fires.
+                try:
+                    _mark_submission_failed(session, submission_id)
+                except Exception:
+                    logger.exception(
+                        "src:events:tasks:grading_submissions_batch_task:: Failed to mark submission as failed",
+                        extra={"submission_id": submission_id},
+                    )
+            finally:
+                for graded_id in {submission_id, *graded_with_group}:
+                    _invalidate_cached_responses(graded_id)
+
+    return graded
+
+
+@celery_app.task(name="session_grading_completed_task")
+def session_grading_completed_task(
+    batch_results: list[list[str]], session_id: str
+) -> None:
+    """Record that every submission of a session went through grading."""
+
+    with Session(engine) as session:
+        session_record = session.get(SessionModel, uuid.UUID(session_id))
+        if not session_record:
+            logger.error(
+                "src:events:tasks:session_grading_completed_task:: Session not found",
+                extra={"session_id": session_id},
+            )
+            return
+
+        graded_at = datetime.now(timezone.utc)
+        session_record.graded_at = graded_at
+        session.add(session_record)
+        session.commit()
+
+    progress_broker.publish(
+        uuid.UUID(session_id),
+        "session",
+        {"id": session_id, "graded_at": graded_at.isoformat()},
+    )
 
+    logger.info(
+        f"Session {session_id} grading completed, "
+        f"{sum(len(batch) for batch in batch_results)} submissions graded"
+    )
@@ -0,0 +1,237 @@
+"""
+Statistics of the grading of a session.
+
+The per exercise, test case and evaluation flag figures are aggregated by
+the database, one statement each, driven from the session submissions so
+they only read the rows of the session. The score distribution needs the
+totals themselves, a single column of floats fetched in one statement, and
+is computed from them. A dashboard load costs the same statements whatever
+the size of the session.
+"""
+
+import math
+import uuid
+from collections import Counter
+from statistics import fmean
+
+from sqlalchemy import case, func
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.core.config import settings
+from src.enums import EvaluationFlagEnum, SubmissionStatus
+from src.grading.schemas import (
+    EvaluationFlagOutcomesSchema,
+    ExerciseStatisticsSchema,
+    HistogramBinSchema,
+    ScoreDistributionSchema,
+    SessionStatisticsSchema,
+    TestCaseStatisticsSchema,
+)
+from src.models import (
+    EvaluationFlag,
+    EvaluationFlagResult,
+    Exercise,
+    ExerciseSubmission,
+    Submission,
+    TestCase,
+    TestCaseResult,
+)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def percentile(values: list[float], rank: float) -> float:
+    """Get the percentile of sorted values, interpolated between the closest ranks."""
+    position = (len(values) - 1) * rank / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def score_distribution(totals: list[float]) -> ScoreDistributionSchema:
+    """Summarize the overall totals of the graded submissions."""
+    if not totals:
+        return ScoreDistributionSchema(count=0, percentiles={}, histogram=[])
+
+    totals = sorted(totals)
+    width = settings.ANALYTICS_HISTOGRAM_BIN_WIDTH
+    bins = Counter(math.floor(total / width) for total in totals)
+    return ScoreDistributionSchema(
+        count=len(totals),
+        mean=fmean(totals),
+        median=percentile(totals, 50),
+        minimum=totals[0],
+        maximum=totals[-1],
+        percentiles={f"p{rank}": percentile(totals, rank) for rank in PERCENTILES},
+        # every bin up to the highest total, empty ones included
+        histogram=[
+            HistogramBinSchema(
+                lower=index * width, upper=(index + 1) * width, count=bins[index]
+            )
+            for index in range(max(bins) + 1)
+        ],
+    )
+
+
+def _rate(count: int, total: int) -> float | None:
+    return count / total if total else None
+
+
+async def session_statistics(
+    db_session: AsyncSession, session_id: uuid.UUID
+) -> SessionStatisticsSchema:
+    """Compute the statistics of the grading of a session."""
+    in_session = col(Submission.session_id) == session_id
+
+    statuses = (
+        await db_session.exec(
+            select(Submission.status, func.count())
+            .where(in_session)
+            .group_by(col(Submission.status))
+        )
+    ).all()
+
+    totals = (
+        await db_session.exec(
+            select(Submission.overrall_total).where(
+                in_session, col(Submission.overrall_total).is_not(None)
+            )
+        )
+    ).all()
+
+    # an exercise submission passes when none of its test cases failed
+    exercise_submissions = (
+        select(
+            col(ExerciseSubmission.exercise_id).label("exercise_id"),
+            col(ExerciseSubmission.total_score).label("total_score"),
+            func.sum(case((~col(TestCaseResult.passed), 1), else_=0)).label("failed"),
+        )
+        .join(Submission, col(Submission.id) == ExerciseSubmission.submission_id)
+        .outerjoin(
+            TestCaseResult, col(TestCaseResult.submission_id) == ExerciseSubmission.id
+        )
+        .where(in_session, col(ExerciseSubmission.graded))
+        .group_by(col(ExerciseSubmission.id))
+        .subquery()
+    )
+    exercise_outcomes = (
+        select(
+            exercise_submissions.c.exercise_id,
+            func.count().label("graded"),
+            func.sum(case((exercise_submissions.c.failed == 0, 1), else_=0)).label(
+                "passed"
+            ),
+            func.avg(exercise_submissions.c.total_score).label("mean_score"),
+        )
+        .group_by(exercise_submissions.c.exercise_id)
+        .subquery()
+    )
+    exercises = (
+        await db_session.exec(
+            select(  # type: ignore[call-overload]
+                Exercise.id,
+                Exercise.external_id,
+                exercise_outcomes.c.graded,
+                exercise_outcomes.c.passed,
+                exercise_outcomes.c.mean_score,
+            )
+            .outerjoin(
+                exercise_outcomes, exercise_outcomes.c.exercise_id == Exercise.id
+            )
+            .where(Exercise.session_id == session_id)
+            .order_by(col(Exercise.external_id))
+        )
+    ).all()
+
+    test_case_outcomes = (
+        select(
+            col(TestCaseResult.test_case_id).label("test_case_id"),
+            func.count().label("results"),
+            func.sum(case((~col(TestCaseResult.passed), 1), else_=0)).label("failed"),
+        )
+        .join(
+            ExerciseSubmission,
+            col(ExerciseSubmission.id) == TestCaseResult.submission_id,
+        )
+        .join(Submission, col(Submission.id) == ExerciseSubmission.submission_id)
+        .where(in_session)
+        .group_by(col(TestCaseResult.test_case_id))
+        .subquery()
+    )
+    test_cases = (
+        await db_session.exec(
+            select(  # type: ignore[call-overload]
+                TestCase.id,
+                TestCase.exercise_id,
+                TestCase.external_id,
+                TestCase.title,
+                test_case_outcomes.c.results,
+                test_case_outcomes.c.failed,
+            )
+            .join(Exercise, col(Exercise.id) == TestCase.exercise_id)
+            .outerjoin(
+                test_case_outcomes, test_case_outcomes.c.test_case_id == TestCase.id
+            )
+            .where(Exercise.session_id == session_id)
+            .order_by(col(Exercise.external_id), col(TestCase.external_id))
+        )
+    ).all()
+
+    flag_outcomes = dict.fromkeys(EvaluationFlagEnum, (0, 0))
+    for flag, passed, failed in (
+        await db_session.exec(
+            select(
+                EvaluationFlag.flag,
+                func.sum(case((col(EvaluationFlagResult.passed), 1), else_=0)),
+                func.sum(case((~col(EvaluationFlagResult.passed), 1), else_=0)),
+            )
+            .join(
+                ExerciseSubmission,
+                col(ExerciseSubmission.id) == EvaluationFlagResult.submission_id,
+            )
+            .join(Submission, col(Submission.id) == ExerciseSubmission.submission_id)
+            .join(
+                EvaluationFlag,
+                col(EvaluationFlag.id) == EvaluationFlagResult.evaluation_flag_id,
+            )
+            .where(in_session)
+            .group_by(col(EvaluationFlag.flag))
+        )
+    ).all():
+        flag_outcomes[EvaluationFlagEnum(flag)] = (passed, failed)
+
+    return SessionStatisticsSchema(
+        submissions={
+            **dict.fromkeys(SubmissionStatus, 0),
+            **{SubmissionStatus(status): count for status, count in statuses},
+        },
+        scores=score_distribution([total for total in totals if total is not None]),
+        exercises=[
+            ExerciseStatisticsSchema(
+                id=exercise_id,
+                external_id=external_id,
+                graded=graded or 0,
+                passed=passed or 0,
+                pass_rate=_rate(passed or 0, graded or 0),
+                mean_score=mean_score,
+            )
+            for exercise_id, external_id, graded, passed, mean_score in exercises
+        ],
+        test_cases=[
+            TestCaseStatisticsSchema(
+                id=test_case_id,
+                exercise_id=exercise_id,
+                external_id=external_id,
+                title=title,
+                results=results or 0,
+                failed=failed or 0,
+                failure_rate=_rate(failed or 0, results or 0),
+            )
+            for test_case_id, exercise_id, external_id, title, results, failed in test_cases
+        ],
+        evaluation_flags=[
+            EvaluationFlagOutcomesSchema(flag=flag, passed=passed, failed=failed)
+            for flag, (passed, failed) in flag_outcomes.items()
+        ],
+    )
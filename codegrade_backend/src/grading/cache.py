@@ -0,0 +1,251 @@
+"""
+Cache of the serialized grading read responses.
+
+Entries are keyed by the submission, its version and the resource read from
+it, so a stale entry is never served once the submission changed. Writes and
+the grading tasks also invalidate every entry of the submission, which keeps
+a shared Redis cache tight even when the version stamp did not move.
+"""
+
+import hashlib
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import NamedTuple, cast
+
+import redis
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.log import logger
+
+
+class CachedResponse(NamedTuple):
+    """A serialized response body and its entity tag."""
+
+    etag: str
+    body: bytes
+
+
+def cached_response(body: bytes) -> CachedResponse:
+    """Tag a serialized response body with the hash of its content."""
+    return CachedResponse(hashlib.sha256(body).hexdigest()[:32], body)
+
+
+class ResponseCache(ABC):
+    """
+    Abstract base class for the response cache backends.
+
+    The backends are called from the API event loop and from the Celery
+    workers, the async variants run the blocking ones in the threadpool.
+    """
+
+    @abstractmethod
+    def get(
+        self, submission_id: uuid.UUID, version: str, resource: str
+    ) -> CachedResponse | None:
+        """Get the cached response of a submission version resource."""
+
+    @abstractmethod
+    def set(
+        self,
+        submission_id: uuid.UUID,
+        version: str,
+        resource: str,
+        response: CachedResponse,
+    ) -> None:
+        """Cache the response of a submission version resource."""
+
+    @abstractmethod
+    def invalidate(self, submission_id: uuid.UUID) -> None:
+        """Forget every cached response of the submission."""
+
+    async def aget(
+        self, submission_id: uuid.UUID, version: str, resource: str
+    ) -> CachedResponse | None:
+        return await run_in_threadpool(self.get, submission_id, version, resource)
+
+    async def aset(
+        self,
+        submission_id: uuid.UUID,
+        version: str,
+        resource: str,
+        response: CachedResponse,
+    ) -> None:
+        await run_in_threadpool(self.set, submission_id, version, resource, response)
+
+    async def ainvalidate(self, submission_id: uuid.UUID) -> None:
+        await run_in_threadpool(self.invalidate, submission_id)
+
+
+class MemoryResponseCache(ResponseCache):
+    """
+    Process local cache holding the latest version of the most recently read
+    submissions.
+
+    Each process owns its entries, a worker invalidating a submission only
+    reaches its own, the others stop serving it once its version changes.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[uuid.UUID, tuple[str, dict[str, CachedResponse]]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(
+        self, submission_id: uuid.UUID, version: str, resource: str
+    ) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(submission_id)
+            if not entry or entry[0] != version:
+                return None
+
+            self._entries.move_to_end(submission_id)
+            return entry[1].get(resource)
+
+    def set(
+        self,
+        submission_id: uuid.UUID,
+        version: str,
+        resource: str,
+        response: CachedResponse,
+    ) -> None:
+        with self._lock:
+            entry = self._entries.get(submission_id)
+            # a newer version supersedes every resource cached for the old one
+            if not entry or entry[0] != version:
+                entry = (version, {})
+            entry[1][resource] = response
+            self._entries[submission_id] = entry
+            self._entries.move_to_end(submission_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, submission_id: uuid.UUID) -> None:
+        with self._lock:
+            self._entries.pop(submission_id, None)
+
+    # nothing blocks, the event loop calls the backend directly
+    async def aget(
+        self, submission_id: uuid.UUID, version: str, resource: str
+    ) -> CachedResponse | None:
+        return self.get(submission_id, version, resource)
+
+    async def aset(
+        self,
+        submission_id: uuid.UUID,
+        version: str,
+        resource: str,
+        response: CachedResponse,
+    ) -> None:
+        self.set(submission_id, version, resource, response)
+
+    async def ainvalidate(self, submission_id: uuid.UUID) -> None:
+        self.invalidate(submission_id)
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Cache shared by every API process and worker.
+
+    The responses of a submission live in one hash, so invalidating it is a
+    single `DEL`, and the hash expires after `RESPONSE_CACHE_TTL` seconds
+    without writes. Like the memory cache, the hash only holds the latest
+    version written, a new one replaces the responses of the previous one.
+    Redis being unreachable only costs the cache, reads fall back to building
+    the response.
+    """
+
+    # the hash is dropped first when it holds another version, atomically
+    SET_SCRIPT = """
+    if redis.call('HGET', KEYS[1], 'version') ~= ARGV[1] then
+        redis.call('DEL', KEYS[1])
+    end
+    redis.call('HSET', KEYS[1], 'version', ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5])
+    redis.call('EXPIRE', KEYS[1], ARGV[6])
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int) -> None:
+        self.client = client
+        self.ttl = ttl
+        self._set = client.register_script(self.SET_SCRIPT)
+
+    @staticmethod
+    def _key(submission_id: uuid.UUID) -> str:
+        return f"{settings.RESPONSE_CACHE_KEY_PREFIX}:{submission_id}"
+
+    def get(
+        self, submission_id: uuid.UUID, version: str, resource: str
+    ) -> CachedResponse | None:
+        try:
+            etag, body = cast(
+                list[bytes | None],
+                self.client.hmget(
+                    self._key(submission_id),
+                    [f"{version}:{resource}:etag", f"{version}:{resource}:body"],
+                ),
+            )
+        except redis.RedisError:
+            logger.exception(
+                "src:grading:cache:: Failed to read cached response",
+                extra={"submission_id": str(submission_id)},
+            )
+            return None
+        if etag is None or body is None:
+            return None
+
+        return CachedResponse(etag.decode(), body)
+
+    def set(
+        self,
+        submission_id: uuid.UUID,
+        version: str,
+        resource: str,
+        response: CachedResponse,
+    ) -> None:
+        try:
+            self._set(
+                keys=[self._key(submission_id)],
+                args=[
+                    version,
+                    f"{version}:{resource}:etag",
+                    response.etag,
+                    f"{version}:{resource}:body",
+                    response.body,
+                    self.ttl,
+                ],
+            )
+        except redis.RedisError:
+            logger.exception(
+                "src:grading:cache:: Failed to cache response",
+                extra={"submission_id": str(submission_id)},
+            )
+
+    def invalidate(self, submission_id: uuid.UUID) -> None:
+        # a write bumps the submission version, so an entry left behind by a
+        # failure is never read again and expires with its hash
+        try:
+            self.client.delete(self._key(submission_id))
+        except redis.RedisError:
+            logger.exception(
+                "src:grading:cache:: Failed to invalidate cached responses",
+                extra={"submission_id": str(submission_id)},
+            )
+
+
+def _response_cache() -> ResponseCache:
+    """Build the response cache backend configured for this deployment."""
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        # connects lazily, on the first command
+        return RedisResponseCache(
+            redis.Redis.from_url(settings.RESPONSE_CACHE_REDIS_URL),
+            settings.RESPONSE_CACHE_TTL,
+        )
+
+    return MemoryResponseCache(settings.RESPONSE_CACHE_SIZE)
+
+
+response_cache = _response_cache()
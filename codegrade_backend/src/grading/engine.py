@@ -0,0 +1,546 @@
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import Session as DbSession
+from sqlmodel import col, select, update
+
+from src.core.config import settings
+from src.enums import EvaluationFlagEnum, SubmissionStatus
+from src.grading.executors import AbstractCodeExecutor, ExecutionResult, SourceCode
+from src.grading.progress import progress_broker
+from src.grading.schemas import SubmissionProgressSchema
+from src.grading.scoring import recompute_totals
+from src.grading.summary import record_changes, status_changes
+from src.log import logger
+from src.models import (
+    EvaluationFlag,
+    EvaluationFlagResult,
+    Exercise,
+    ExerciseSubmission,
+    Submission,
+    TestCase,
+    TestCaseResult,
+)
+
+# `TestCaseResult.std_out` column size
+STD_OUT_MAX_LENGTH = 1000
+
+
+def outputs_match(actual: str, expected: str) -> bool:
+    """Compare program output ignoring trailing whitespace."""
+    return [line.rstrip() for line in actual.rstrip().splitlines()] == [
+        line.rstrip() for line in expected.rstrip().splitlines()
+    ]
+
+
+class GradingEngine:
+    """
+    Grade submissions by running every test case of every exercise of the
+    session against a code executor.
+
+    Executions are independent of each other so they are dispatched to a
+    thread pool all at once, the database is only touched from the calling
+    thread once every result is in.
+    """
+
+    def __init__(
+        self,
+        db_session: DbSession,
+        executor: AbstractCodeExecutor,
+        max_workers: int = settings.GRADING_MAX_WORKERS,
+    ) -> None:
+        """Initialize the engine."""
+        self.db_session = db_session
+        self.executor = executor
+        self.max_workers = max_workers
+
+    def _get_submission(self, submission_id: uuid.UUID) -> Submission | None:
+        """Get the submission."""
+        return self.db_session.exec(
+            select(Submission).where(Submission.id == submission_id)
+        ).first()
+
+    def _get_queued_group_mates(self, submission: Submission) -> list[Submission]:
+        """Get the queued submissions of the other members of the submission group."""
+        return list(
+            self.db_session.exec(
+                select(Submission).where(
+                    Submission.session_id == submission.session_id,
+                    Submission.group_id == submission.group_id,
+                    Submission.status == SubmissionStatus.QUEUED,
+                    Submission.id != submission.id,
+                )
+            )
+        )
+
+    def _get_submissions(self, submission_ids: list[uuid.UUID]) -> list[Submission]:
+        """Get the submissions with their user, session and exercise submissions."""
+        submissions = {
+            submission.id: submission
+            for submission in self.db_session.exec(
+                select(Submission)
+                .where(col(Submission.id).in_(submission_ids))
+                .options(
+                    selectinload(Submission.user),  # type: ignore
+                    selectinload(Submission.session),  # type: ignore
+                    selectinload(Submission.exercise_submissions),  # type: ignore
+                )
+            )
+        }
+        return [submissions[submission_id] for submission_id in submission_ids]
+
+    def _get_exercises(
+        self, submission: Submission
+    ) -> tuple[
+        list[Exercise],
+        dict[uuid.UUID, list[TestCase]],
+        dict[uuid.UUID, list[EvaluationFlag]],
+    ]:
+        """Get the session exercises with their test cases and evaluation flags."""
+        exercises = self.db_session.exec(
+            select(Exercise).where(Exercise.session_id == submission.session_id)
+        ).all()
+        exercise_ids = [exercise.id for exercise in exercises]
+
+        test_cases: dict[uuid.UUID, list[TestCase]] = defaultdict(list)
+        for test_case in self.db_session.exec(
+            select(TestCase).where(col(TestCase.exercise_id).in_(exercise_ids))
+        ):
+            test_cases[test_case.exercise_id].append(test_case)
+
+        evaluation_flags: dict[uuid.UUID, list[EvaluationFlag]] = defaultdict(list)
+        for evaluation_flag in self.db_session.exec(
+            select(EvaluationFlag).where(
+                col(EvaluationFlag.exercise_id).in_(exercise_ids)
+            )
+        ):
+            evaluation_flags[evaluation_flag.exercise_id].append(evaluation_flag)
+
+        return list(exercises), test_cases, evaluation_flags
+
+    def _get_or_create_exercise_submissions(
+        self, submission: Submission, exercises: list[Exercise]
+    ) -> dict[uuid.UUID, ExerciseSubmission]:
+        """Get the exercise submissions, creating the missing ones."""
+        exercise_submissions = {
+            exercise_submission.exercise_id: exercise_submission
+            for exercise_submission in submission.exercise_submissions
+        }
+
+        for exercise in exercises:
+            if exercise.id not in exercise_submissions:
+                exercise_submission = ExerciseSubmission(
+                    submission_id=submission.id,
+                    exercise_id=exercise.id,
+                )
+                self.db_session.add(exercise_submission)
+                exercise_submissions[exercise.id] = exercise_submission
+
+        return exercise_submissions
+
+    def _get_existing_results(
+        self, exercise_submissions: list[ExerciseSubmission]
+    ) -> tuple[
+        dict[tuple[uuid.UUID, uuid.UUID], TestCaseResult],
+        dict[tuple[uuid.UUID, uuid.UUID], EvaluationFlagResult],
+    ]:
+        """Get results already recorded for the exercise submissions."""
+        ids = [exercise_submission.id for exercise_submission in exercise_submissions]
+
+        test_case_results = {
+            (result.submission_id, result.test_case_id): result
+            for result in self.db_session.exec(
+                select(TestCaseResult).where(col(TestCaseResult.submission_id).in_(ids))
+            )
+        }
+        evaluation_flag_results = {
+            (result.submission_id, result.evaluation_flag_id): result
+            for result in self.db_session.exec(
+                select(EvaluationFlagResult).where(
+                    col(EvaluationFlagResult.submission_id).in_(ids)
+                )
+            )
+        }
+        return test_case_results, evaluation_flag_results
+
+    def _evaluate_flag(
+        self,
+        flag: EvaluationFlagEnum,
+        source: SourceCode | None,
+        compiled: bool,
+        code_quality: bool,
+        execution_results: list[ExecutionResult],
+    ) -> bool:
+        """Evaluate a flag for an exercise submission."""
+        if source is None:
+            return False
+
+        if flag == EvaluationFlagEnum.compilation:
+            return compiled
+
+        if flag == EvaluationFlagEnum.code_quality:
+            return code_quality
+
+        return all(
+            not result.timed_out and result.exit_code == 0
+            for result in execution_results
+        )
+
+    def _recompute_totals(self, submissions: list[Submission]) -> None:
+        """
+        Total the flushed results of the submissions with the statements of
+        `recompute_totals`, the ones adjustments are totalled with.
+        """
+        submission_ids = [submission.id for submission in submissions]
+        recompute_totals(self.db_session, submission_ids=submission_ids)
+
+        # the statements leave the loaded submissions as they were, their
+        # totals are read back in one go for the progress to publish
+        totals = dict(
+            self.db_session.exec(
+                select(Submission.id, Submission.overrall_total).where(
+                    col(Submission.id).in_(submission_ids)
+                )
+            ).all()
+        )
+        for submission in submissions:
+            set_committed_value(submission, "overrall_total", totals[submission.id])  # type: ignore[no-untyped-call]
+
+    def _save_status(
+        self, submissions: list[Submission], status: SubmissionStatus
+    ) -> None:
+        """
+        Save the submissions status along with the counters of their session,
+        bump their version and publish the progress.
+
+        The timestamp is set from Python rather than the database so a
+        submission graded within a second still gets a version per status, and
+        the responses cached for the previous one are never served again.
+        """
+        updated_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        progress: list[tuple[uuid.UUID, SubmissionProgressSchema]] = []
+        transitions: dict[
+            uuid.UUID, list[tuple[SubmissionStatus, SubmissionStatus]]
+        ] = defaultdict(list)
+        for submission in submissions:
+            transitions[submission.session_id].append((submission.status, status))
+            submission.status = status
+            submission.updated_at = updated_at
+            # read before the commit expires the submission
+            progress.append(
+                (
+                    submission.session_id,
+                    SubmissionProgressSchema.model_validate(
+                        submission, from_attributes=True
+                    ),
+                )
+            )
+            self.db_session.add(submission)
+        for session_id, session_transitions in transitions.items():
+            record_changes(
+                self.db_session, session_id, status_changes(session_transitions)
+            )
+        self.db_session.commit()
+        self._publish(progress)
+
+    def _publish(
+        self, progress: list[tuple[uuid.UUID, SubmissionProgressSchema]]
+    ) -> None:
+        """Publish the progress of submissions, once their status is committed."""
+        for session_id, submission_progress in progress:
+            progress_broker.publish(
+                session_id, "submission", submission_progress.model_dump(mode="json")
+            )
+
+    def _claim(
+        self, session_id: uuid.UUID, submission_ids: list[uuid.UUID]
+    ) -> list[uuid.UUID]:
+        """
+        Move the submissions still queued to grading, returns the IDs of the
+        ones claimed.
+
+        The status is checked and set by a single statement, a submission
+        claimed meanwhile by another worker, e.g. a batch holding another member
+        of the group, is left to it rather than graded twice.
+        """
+        claimed = self.db_session.exec(
+            update(Submission)  # type: ignore
+            .where(
+                col(Submission.id).in_(submission_ids),
+                col(Submission.status) == SubmissionStatus.QUEUED,
+            )
+            .values(
+                status=SubmissionStatus.GRADING,
+                # a version per status, as set by `_save_status`
+                updated_at=datetime.now(timezone.utc).replace(tzinfo=None),
+            )
+            .returning(col(Submission.id), col(Submission.overrall_total))
+            .execution_options(synchronize_session=False)
+        ).all()
+        if claimed:
+            record_changes(
+                self.db_session,
+                session_id,
+                status_changes(
+                    (SubmissionStatus.QUEUED, SubmissionStatus.GRADING) for _ in claimed
+                ),
+            )
+        self.db_session.commit()
+        self._publish(
+            [
+                (
+                    session_id,
+                    SubmissionProgressSchema(
+                        id=claimed_id,
+                        status=SubmissionStatus.GRADING,
+                        overrall_total=overrall_total,
+                    ),
+                )
+                for claimed_id, overrall_total in claimed
+            ]
+        )
+
+        claimed_ids = {claimed_id for claimed_id, _ in claimed}
+        return [
+            submission_id
+            for submission_id in submission_ids
+            if submission_id in claimed_ids
+        ]
+
+    def grade(self, submission_id: uuid.UUID) -> Submission | None:
+        """Grade the submission, only queued submissions are graded."""
+        if not self.grade_with_group(submission_id):
+            return None
+
+        return self.db_session.get(Submission, submission_id)
+
+    def grade_with_group(self, submission_id: uuid.UUID) -> list[uuid.UUID]:
+        """
+        Grade the submission along with the queued submissions of its group.
+
+        The members of a group usually submit the same programs, each distinct
+        program is run once and its results are recorded for every member who
+        submitted it. Returns the IDs of the graded submissions, the requested
+        one first.
+        """
+        submission = self._get_submission(submission_id)
+        if not submission:
+            logger.error(
+                "src:grading:engine:: Submission not found",
+                extra={"submission_id": str(submission_id)},
+            )
+            return []
+
+        if submission.status != SubmissionStatus.QUEUED:
+            logger.info(
+                f"src:grading:engine:: Skipping submission {submission.id} "
+                f"with status {submission.status}"
+            )
+            return []
+
+        submissions = [submission]
+        if submission.group_id is not None:
+            submissions += self._get_queued_group_mates(submission)
+        # read before the commits expire the submissions
+        candidates = {graded.id: graded for graded in submissions}
+        submission_ids = self._claim(submission.session_id, list(candidates))
+        if not submission_ids:
+            logger.info(
+                "src:grading:engine:: Submission claimed by another worker",
+                extra={"submission_id": str(submission_id)},
+            )
+            return []
+        # the claimed ones only, marked failed should the loading break down
+        submissions = [candidates[graded_id] for graded_id in submission_ids]
+
+        try:
+            # loaded again in one go, rather than one member at a time once the
+            # commit expired them
+            submissions = self._get_submissions(submission_ids)
+            self._grade(submissions)
+        except Exception as error:
+            self.db_session.rollback()
+            self._save_status(submissions, SubmissionStatus.FAILED)
+            logger.error(
+                "src:grading:engine:: Failed to grade submissions",
+                extra={
+                    "submission_ids": [str(graded_id) for graded_id in submission_ids],
+                    "error": str(error),
+                },
+            )
+            raise error
+
+        return submission_ids
+
+    def _run(
+        self,
+        submissions: list[Submission],
+        exercises: list[Exercise],
+        test_cases: dict[uuid.UUID, list[TestCase]],
+    ) -> tuple[
+        dict[tuple[uuid.UUID, uuid.UUID], SourceCode | None],
+        dict[tuple[uuid.UUID, str, str, uuid.UUID], ExecutionResult],
+        dict[tuple[uuid.UUID, str, str], tuple[bool, bool]],
+    ]:
+        """
+        Run every test case of every distinct program of the submissions.
+
+        Returns the sources by submission and exercise, the execution results
+        by program and test case, and the compilation and code quality checks
+        by program, a program being keyed by its exercise, language and code.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            source_futures = {
+                (submission.id, exercise.id): pool.submit(
+                    self.executor.get_source,
+                    submission.session,
+                    submission.user,
+                    exercise,
+                )
+                for submission in submissions
+                for exercise in exercises
+            }
+            sources = {key: future.result() for key, future in source_futures.items()}
+
+            programs: dict[tuple[uuid.UUID, str, str], SourceCode] = {}
+            for (_, exercise_id), source in sources.items():
+                if source is not None:
+                    programs.setdefault(
+                        (exercise_id, source.language, source.code), source
+                    )
+
+            execution_futures: dict[
+                tuple[uuid.UUID, str, str, uuid.UUID], Future[ExecutionResult]
+            ] = {}
+            check_futures: dict[
+                tuple[uuid.UUID, str, str], tuple[Future[bool], Future[bool]]
+            ] = {}
+            for program, source in programs.items():
+                check_futures[program] = (
+                    pool.submit(self.executor.check_compilation, source),
+                    pool.submit(self.executor.check_code_quality, source),
+                )
+                for test_case in test_cases[program[0]]:
+                    execution_futures[(*program, test_case.id)] = pool.submit(
+                        self.executor.execute, source, test_case.test_input
+                    )
+
+            execution_results = {
+                key: future.result() for key, future in execution_futures.items()
+            }
+            checks = {
+                program: (compiled.result(), code_quality.result())
+                for program, (compiled, code_quality) in check_futures.items()
+            }
+
+        return sources, execution_results, checks
+
+    def _grade(self, submissions: list[Submission]) -> None:
+        """Run every test case of the session and record the results."""
+        exercises, test_cases, evaluation_flags = self._get_exercises(submissions[0])
+        exercise_submissions = {
+            submission.id: self._get_or_create_exercise_submissions(
+                submission, exercises
+            )
+            for submission in submissions
+        }
+        self.db_session.flush()
+        # one query for the results of every member
+        existing_test_case_results, existing_flag_results = self._get_existing_results(
+            [
+                exercise_submission
+                for by_exercise in exercise_submissions.values()
+                for exercise_submission in by_exercise.values()
+            ]
+        )
+        sources, execution_results, checks = self._run(
+            submissions, exercises, test_cases
+        )
+
+        for submission in submissions:
+            for exercise in exercises:
+                exercise_submission = exercise_submissions[submission.id][exercise.id]
+                source = sources[(submission.id, exercise.id)]
+                program = (
+                    (exercise.id, source.language, source.code) if source else None
+                )
+                results: list[ExecutionResult] = []
+                passed_count = 0
+
+                for test_case in test_cases[exercise.id]:
+                    result = (
+                        program and execution_results.get((*program, test_case.id))
+                    ) or ExecutionResult(exit_code=-1, std_out="")
+                    results.append(result)
+                    passed = (
+                        source is not None
+                        and not result.timed_out
+                        and outputs_match(result.std_out, test_case.expected_output)
+                    )
+
+                    # every member has its own rows, adjusting one leaves the
+                    # others untouched
+                    test_case_result = existing_test_case_results.get(
+                        (exercise_submission.id, test_case.id)
+                    )
+                    if test_case_result is None:
+                        test_case_result = TestCaseResult(
+                            submission_id=exercise_submission.id,
+                            test_case_id=test_case.id,
+                        )
+
+                    if not test_case_result.adjusted:
+                        test_case_result.passed = passed
+                        test_case_result.score = (
+                            test_case.score_percentage if passed else 0.0
+                        )
+                        test_case_result.exit_code = result.exit_code
+                        test_case_result.std_out = result.std_out[:STD_OUT_MAX_LENGTH]
+
+                    self.db_session.add(test_case_result)
+                    passed_count += test_case_result.passed
+
+                compiled, code_quality = (
+                    checks.get(program, (False, False)) if program else (False, False)
+                )
+                for evaluation_flag in evaluation_flags[exercise.id]:
+                    flag_result = existing_flag_results.get(
+                        (exercise_submission.id, evaluation_flag.id)
+                    )
+                    if flag_result is None:
+                        flag_result = EvaluationFlagResult(
+                            submission_id=exercise_submission.id,
+                            evaluation_flag_id=evaluation_flag.id,
+                        )
+
+                    if not flag_result.adjusted:
+                        passed = self._evaluate_flag(
+                            evaluation_flag.flag,
+                            source,
+                            compiled,
+                            code_quality,
+                            results,
+                        )
+                        flag_result.passed = passed
+                        flag_result.score = (
+                            evaluation_flag.score_percentage if passed else 0.0
+                        )
+
+                    self.db_session.add(flag_result)
+
+                exercise_submission.graded = True
+                exercise_submission.auto_generated_feedback = (
+                    "No source code submitted."
+                    if source is None
+                    else f"{passed_count} of {len(test_cases[exercise.id])} test cases passed."
+                )
+                self.db_session.add(exercise_submission)
+
+        # the rows of every member are flushed together, in bulk inserts
+        self.db_session.flush()
+        self._recompute_totals(submissions)
+        self._save_status(submissions, SubmissionStatus.GRADED)
@@ -0,0 +1,29 @@
+from src.core.config import settings
+
+from .base import AbstractCodeExecutor
+from .cache import CachingExecutor, execution_cache
+from .local_executor import LocalSubprocessExecutor
+from .schemas import ExecutionResult, SourceCode
+
+MAP: dict[str, type[AbstractCodeExecutor]] = {
+    "local": LocalSubprocessExecutor,
+}
+
+
+def get_executor() -> AbstractCodeExecutor:
+    """Get the executor configured for this deployment."""
+    executor = MAP[settings.GRADING_EXECUTOR]()
+    if settings.GRADING_EXECUTION_CACHE_SIZE <= 0:
+        return executor
+
+    return CachingExecutor(executor, execution_cache)
+
+
+__all__ = [
+    "MAP",
+    "AbstractCodeExecutor",
+    "CachingExecutor",
+    "ExecutionResult",
+    "SourceCode",
+    "get_executor",
+]
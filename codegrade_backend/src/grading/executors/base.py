@@ -0,0 +1,38 @@
+from abc import ABC, abstractmethod
+
+from src.grading.executors.schemas import ExecutionResult, SourceCode
+from src.models import Exercise, Session, User
+
+
+class AbstractCodeExecutor(ABC):
+    """Abstract base class for code executors used by the grading engine."""
+
+    @abstractmethod
+    def get_source(
+        self,
+        session: Session,
+        user: User,
+        exercise: Exercise,
+    ) -> SourceCode | None:
+        """Get the source code a user submitted for an exercise."""
+
+    @abstractmethod
+    def execute(self, source: SourceCode, test_input: str) -> ExecutionResult:
+        """Run the source code with the test input on its standard input."""
+
+    @abstractmethod
+    def check_compilation(self, source: SourceCode) -> bool:
+        """Check that the source code compiles."""
+
+    @abstractmethod
+    def check_code_quality(self, source: SourceCode) -> bool:
+        """Check that the source code passes the code quality checks."""
+
+    def fingerprint(self) -> str:
+        """
+        Describe the configuration the execution results depend on.
+
+        Part of the execution cache keys, so changing the runtimes or the
+        limits never serves a result produced under the previous ones.
+        """
+        return type(self).__name__
@@ -0,0 +1,170 @@
+"""
+Content addressed cache of the test case executions.
+
+A run only depends on the program, its language, its standard input and the
+executor configuration, so identical programs, such as the starter code left
+unchanged, a resubmission or the members of a group sharing one solution,
+are only run once. Entries are keyed by a hash of all of them, a worker keeps
+the most recent ones in memory and Redis, when configured, shares them with
+every other worker.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import redis
+from pydantic import ValidationError
+
+from src.core.config import settings
+from src.core.metrics import execution_cache_lookups
+from src.grading.executors.base import AbstractCodeExecutor
+from src.grading.executors.schemas import ExecutionResult, SourceCode
+from src.log import logger
+from src.models import Exercise, Session, User
+
+
+class ExecutionCache:
+    """
+    LRU cache of the execution results, in front of an optional Redis tier.
+
+    Redis being unreachable only costs the cache, executions fall back to
+    running the program.
+    """
+
+    def __init__(
+        self, maxsize: int, client: redis.Redis | None = None, ttl: int | None = None
+    ) -> None:
+        self.maxsize = maxsize
+        self.client = client
+        self.ttl = ttl
+        self._entries: OrderedDict[str, ExecutionResult] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(fingerprint: str, source: SourceCode, test_input: str) -> str:
+        """Hash everything an execution result depends on."""
+        content = json.dumps([fingerprint, source.language, source.code, test_input])
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _redis_key(self, key: str) -> str:
+        return f"{settings.GRADING_EXECUTION_CACHE_KEY_PREFIX}:{key}"
+
+    def _remember(self, key: str, result: ExecutionResult) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> ExecutionResult | None:
+        """Get the cached result of the execution."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                return result
+
+        if self.client is None:
+            return None
+
+        try:
+            cached = self.client.get(self._redis_key(key))
+        except redis.RedisError:
+            logger.exception(
+                "src:grading:executors:cache:: Failed to read cached execution",
+                extra={"key": key},
+            )
+            return None
+        if cached is None:
+            return None
+
+        try:
+            result = ExecutionResult.model_validate_json(cached)
+        except ValidationError:
+            # written by a version with another result schema
+            return None
+        self._remember(key, result)
+        return result
+
+    def set(self, key: str, result: ExecutionResult) -> None:
+        """Cache the result of the execution."""
+        self._remember(key, result)
+        if self.client is None:
+            return
+
+        try:
+            self.client.set(self._redis_key(key), result.model_dump_json(), ex=self.ttl)
+        except redis.RedisError:
+            logger.exception(
+                "src:grading:executors:cache:: Failed to cache execution",
+                extra={"key": key},
+            )
+
+    def clear(self) -> None:
+        """Forget the results held in memory."""
+        with self._lock:
+            self._entries.clear()
+
+
+class CachingExecutor(AbstractCodeExecutor):
+    """Executor serving the test case executions from the cache when it can."""
+
+    def __init__(self, executor: AbstractCodeExecutor, cache: ExecutionCache) -> None:
+        """Initialize the executor."""
+        self.executor = executor
+        self.cache = cache
+
+    def get_source(
+        self,
+        session: Session,
+        user: User,
+        exercise: Exercise,
+    ) -> SourceCode | None:
+        """Get the source code a user submitted for an exercise."""
+        return self.executor.get_source(session, user, exercise)
+
+    def execute(self, source: SourceCode, test_input: str) -> ExecutionResult:
+        """Run the source code with the test input, unless it already ran."""
+        key = self.cache.key(self.executor.fingerprint(), source, test_input)
+        result = self.cache.get(key)
+        if result is not None:
+            execution_cache_lookups.labels(result="hit").inc()
+            return result
+
+        execution_cache_lookups.labels(result="miss").inc()
+        result = self.executor.execute(source, test_input)
+        # a timeout may come from a loaded worker rather than the program
+        if not result.timed_out:
+            self.cache.set(key, result)
+        return result
+
+    def check_compilation(self, source: SourceCode) -> bool:
+        """Check that the source code compiles."""
+        return self.executor.check_compilation(source)
+
+    def check_code_quality(self, source: SourceCode) -> bool:
+        """Check that the source code passes the code quality checks."""
+        return self.executor.check_code_quality(source)
+
+    def fingerprint(self) -> str:
+        return self.executor.fingerprint()
+
+
+def _execution_cache() -> ExecutionCache:
+    """Build the execution cache configured for this deployment."""
+    client = (
+        # connects lazily, on the first command
+        redis.Redis.from_url(settings.GRADING_EXECUTION_CACHE_REDIS_URL)
+        if settings.GRADING_EXECUTION_CACHE_REDIS_URL
+        else None
+    )
+    return ExecutionCache(
+        settings.GRADING_EXECUTION_CACHE_SIZE,
+        client,
+        settings.GRADING_EXECUTION_CACHE_TTL,
+    )
+
+
+execution_cache = _execution_cache()
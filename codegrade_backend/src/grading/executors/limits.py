@@ -0,0 +1,25 @@
+"""
+Apply resource limits, then replace this process with the given command.
+
+Run as `python -I -S limits.py <cpu seconds> <memory bytes> <file bytes> <command...>`.
+Setting the limits here rather than in a `preexec_fn` keeps spawning safe
+from the grading engine threads.
+"""
+
+import os
+import resource
+import sys
+
+
+def main() -> None:
+    cpu_seconds, memory_bytes, file_bytes = (int(value) for value in sys.argv[1:4])
+    command = sys.argv[4:]
+
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_bytes, file_bytes))
+    os.execv(command[0], command)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import contextlib
+import os
+import selectors
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.core.config import settings
+from src.grading.executors import limits
+from src.grading.executors.base import AbstractCodeExecutor
+from src.grading.executors.schemas import ExecutionResult, SourceCode
+from src.models import Exercise, Session, User
+
+# language -> (file extension, command used to run the file)
+RUNTIMES: dict[str, tuple[str, list[str]]] = {
+    "python": ("py", [sys.executable, "-I", "-S"]),
+}
+
+# hard limits applied to every process, the output limit is enforced while
+# reading the pipes and the file limit by the kernel
+MAX_MEMORY_BYTES = 256 * 1024 * 1024
+MAX_OUTPUT_BYTES = 64 * 1024
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class LocalSubprocessExecutor(AbstractCodeExecutor):
+    """
+    Execute submissions as local subprocesses.
+
+    Sources are read from the workspace directory using the layout
+    `<session external id>/<user external id>/<exercise external id>.<ext>`.
+    Each run happens in a throw away directory with a clean environment and
+    resource limits, but as the worker user with its file system and network
+    access. It is NOT a sandbox: it is meant for tests and offline grading of
+    trusted code, and refuses to run in production.
+    """
+
+    def __init__(
+        self,
+        workspace_path: str = settings.GRADING_WORKSPACE_PATH,
+        timeout: float = settings.GRADING_EXECUTION_TIMEOUT,
+    ) -> None:
+        """Initialize the executor."""
+        if settings.ENVIRONMENT == "production":
+            raise RuntimeError(
+                "The local executor does not isolate submissions, "
+                "configure a sandboxed GRADING_EXECUTOR in production"
+            )
+
+        self.workspace_path = Path(workspace_path)
+        self.timeout = timeout
+
+    def get_source(
+        self,
+        session: Session,
+        user: User,
+        exercise: Exercise,
+    ) -> SourceCode | None:
+        """Get the source code a user submitted for an exercise."""
+        directory = self.workspace_path / session.external_id / user.external_id
+        for language, (extension, _) in RUNTIMES.items():
+            path = directory / f"{exercise.external_id}.{extension}"
+            if path.is_file():
+                return SourceCode(language=language, code=path.read_text())
+
+        return None
+
+    def fingerprint(self) -> str:
+        return (
+            f"{type(self).__name__}:{sys.version}:{self.timeout}:"
+            f"{MAX_MEMORY_BYTES}:{MAX_OUTPUT_BYTES}"
+        )
+
+    def _command(self, source_path: Path, language: str) -> list[str]:
+        """Build the command running the source under the resource limits."""
+        _, command = RUNTIMES[language]
+        cpu_seconds = int(self.timeout) + 1
+        return [
+            sys.executable,
+            "-I",
+            "-S",
+            limits.__file__,
+            str(cpu_seconds),
+            str(MAX_MEMORY_BYTES),
+            str(MAX_OUTPUT_BYTES),
+            *command,
+            str(source_path),
+        ]
+
+    def _read_output(
+        self, process: subprocess.Popen[bytes], deadline: float
+    ) -> tuple[bytes, bytes, bool]:
+        """
+        Read both pipes until they close, the deadline passes or the output
+        grows past the limit. Returns the outputs and whether it timed out.
+        """
+        assert process.stdout is not None and process.stderr is not None
+        std_out, std_err = bytearray(), bytearray()
+        outputs = {process.stdout.fileno(): std_out, process.stderr.fileno(): std_err}
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(process.stdout, selectors.EVENT_READ)
+            selector.register(process.stderr, selectors.EVENT_READ)
+
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return bytes(std_out), bytes(std_err), True
+
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, READ_CHUNK_BYTES)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+
+                    output = outputs[key.fd]
+                    output.extend(chunk[: MAX_OUTPUT_BYTES - len(output)])
+                    if len(output) >= MAX_OUTPUT_BYTES:
+                        # stop the process rather than buffering the rest
+                        _kill_process_group(process)
+
+        return bytes(std_out), bytes(std_err), False
+
+    def execute(self, source: SourceCode, test_input: str) -> ExecutionResult:
+        """Run the source code with the test input on its standard input."""
+        extension, _ = RUNTIMES[source.language]
+
+        with tempfile.TemporaryDirectory(prefix="codegrade-") as directory:
+            path = Path(directory) / f"main.{extension}"
+            path.write_text(source.code)
+            input_path = Path(directory) / "input.txt"
+            input_path.write_text(test_input)
+
+            deadline = time.monotonic() + self.timeout
+            with input_path.open("rb") as stdin:
+                process = subprocess.Popen(
+                    self._command(path, source.language),
+                    stdin=stdin,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    cwd=directory,
+                    env={"PATH": os.environ.get("PATH", ""), "LANG": "C.UTF-8"},
+                    # own process group, so forked children are killed with it
+                    start_new_session=True,
+                )
+
+            try:
+                std_out, std_err, timed_out = self._read_output(process, deadline)
+                if not timed_out:
+                    try:
+                        process.wait(max(deadline - time.monotonic(), 0))
+                    except subprocess.TimeoutExpired:
+                        timed_out = True
+            finally:
+                # also reaps whatever the submission left running
+                _kill_process_group(process)
+                process.wait()
+                for stream in (process.stdout, process.stderr):
+                    if stream is not None:
+                        stream.close()
+
+        return ExecutionResult(
+            exit_code=-1 if timed_out else process.returncode,
+            std_out=std_out.decode(errors="replace"),
+            std_err=std_err.decode(errors="replace"),
+            timed_out=timed_out,
+        )
+
+    def check_compilation(self, source: SourceCode) -> bool:
+        """Check that the source code compiles."""
+        if source.language == "python":
+            try:
+                compile(source.code, "<submission>", "exec")
+            except (SyntaxError, ValueError):
+                return False
+
+        return True
+
+    def check_code_quality(self, source: SourceCode) -> bool:
+        """Check that the source code passes the code quality checks."""
+        ruff = shutil.which("ruff")
+        if source.language != "python" or ruff is None:
+            return True
+
+        try:
+            process = subprocess.run(
+                [ruff, "check", "--quiet", "--stdin-filename", "main.py", "-"],
+                input=source.code.encode(),
+                capture_output=True,
+                timeout=self.timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return False
+
+        return process.returncode == 0
+
+
+def _kill_process_group(process: subprocess.Popen[bytes]) -> None:
+    """Kill the process and every process it started."""
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class SourceCode(BaseModel):
+    language: str
+    code: str
+
+
+class ExecutionResult(BaseModel):
+    exit_code: int
+    std_out: str
+    std_err: str = ""
+    timed_out: bool = False
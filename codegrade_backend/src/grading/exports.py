@@ -0,0 +1,121 @@
+import csv
+import io
+import json
+import uuid
+from collections.abc import Generator, Iterator
+from typing import Any
+
+from sqlalchemy.orm import aliased
+from sqlmodel import Session as DbSession
+from sqlmodel import col, select
+
+from src.core.db import engine
+from src.models import Exercise, ExerciseSubmission, Group, Submission, User
+
+GRADEBOOK_COLUMNS = (
+    "submission_id",
+    "user_external_id",
+    "user_fullname",
+    "group_external_id",
+    "status",
+    "overrall_total",
+    "reviewed",
+    "exercise_external_id",
+    "exercise_graded",
+    "exercise_total_score",
+)
+
+# rows fetched per round trip from the server side cursor, and per chunk
+# written to the response
+EXPORT_BATCH_SIZE = 500
+
+
+def iter_gradebook_rows(
+    session_id: uuid.UUID,
+) -> Generator[dict[str, Any], None, None]:
+    """
+    Iterate one gradebook row per exercise submission of the session.
+
+    Submissions without exercise submissions still produce a single row. The
+    rows are streamed from a server side cursor on a session owned by the
+    iterator, so memory use does not depend on the session size. The
+    connection is only released once the iterator is exhausted or closed, see
+    `close_iterators`.
+    """
+    exercise = aliased(Exercise)
+    statement = (
+        select(  # type: ignore[call-overload]
+            Submission.id,
+            User.external_id,
+            User.fullname,
+            Group.external_id,
+            Submission.status,
+            Submission.overrall_total,
+            Submission.reviewed,
+            exercise.external_id,
+            ExerciseSubmission.graded,
+            ExerciseSubmission.total_score,
+        )
+        .join(User, col(User.id) == Submission.user_id)
+        .outerjoin(Group, col(Group.id) == Submission.group_id)
+        .outerjoin(
+            ExerciseSubmission,
+            col(ExerciseSubmission.submission_id) == Submission.id,
+        )
+        .outerjoin(exercise, exercise.id == ExerciseSubmission.exercise_id)
+        .where(Submission.session_id == session_id)
+        .order_by(col(Submission.created_at), col(Submission.id), exercise.external_id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    with DbSession(engine) as db_session:
+        for row in db_session.exec(statement):
+            yield dict(zip(GRADEBOOK_COLUMNS, row, strict=True))
+
+
+def _serialize(value: Any) -> Any:
+    """Convert a row value to a JSON/CSV friendly value."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def iter_ndjson(rows: Iterator[dict[str, Any]]) -> Generator[str, None, None]:
+    """Encode rows as newline delimited JSON, a chunk at a time."""
+    chunk: list[str] = []
+    for row in rows:
+        chunk.append(json.dumps({key: _serialize(value) for key, value in row.items()}))
+        if len(chunk) == EXPORT_BATCH_SIZE:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def iter_csv(rows: Iterator[dict[str, Any]]) -> Generator[str, None, None]:
+    """Encode rows as CSV with a header line, a chunk at a time."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=GRADEBOOK_COLUMNS)
+    writer.writeheader()
+
+    for index, row in enumerate(rows, start=1):
+        writer.writerow({key: _serialize(value) for key, value in row.items()})
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def close_iterators(*iterators: Generator[Any, None, None]) -> None:
+    """
+    Close the export generators once the response is over.
+
+    A client disconnecting mid stream leaves the generators suspended, so
+    their database session would only be released when they are garbage
+    collected.
+    """
+    for iterator in iterators:
+        iterator.close()
@@ -0,0 +1,144 @@
+"""
+Grading progress pushed to the dashboards.
+
+The grading workers publish every status and score they write to a channel
+per session, the API relays the channel of a session to its Server-Sent
+Events subscribers. Redis pub/sub carries the messages between the workers
+and every API replica, the memory broker stands in for it when everything
+runs in one process, as in development and tests.
+"""
+
+import asyncio
+import json
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+from typing import Any
+
+import redis
+import redis.asyncio
+
+from src.core.config import settings
+from src.log import logger
+
+
+class ProgressBroker(ABC):
+    """Abstract base class for the grading progress brokers."""
+
+    @abstractmethod
+    def publish(self, session_id: uuid.UUID, event: str, data: dict[str, Any]) -> None:
+        """
+        Publish a progress event to the session subscribers.
+
+        Publishing is best effort, a failure is logged and never reaches the
+        grading that produced the event.
+        """
+
+    @abstractmethod
+    def listen(
+        self, session_id: uuid.UUID, timeout: float
+    ) -> AsyncIterator[str | None]:
+        """
+        Listen to the progress events of the session, as JSON messages.
+
+        `None` is yielded once subscribed, and then whenever nothing was
+        published for `timeout` seconds, so the caller can tell the client it
+        is connected and keep the connection alive.
+        """
+
+
+def _message(event: str, data: dict[str, Any]) -> str:
+    return json.dumps({"event": event, "data": data})
+
+
+class MemoryProgressBroker(ProgressBroker):
+    """Broker reaching the subscribers of the current process only."""
+
+    def __init__(self) -> None:
+        self._subscribers: dict[
+            uuid.UUID, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue[str]]]
+        ] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, session_id: uuid.UUID, event: str, data: dict[str, Any]) -> None:
+        message = _message(event, data)
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+        # publishers run in worker threads, each queue is fed from its own loop
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, message)
+            except RuntimeError:
+                # the subscriber loop closed before it could unsubscribe
+                continue
+
+    async def listen(
+        self, session_id: uuid.UUID, timeout: float
+    ) -> AsyncIterator[str | None]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue[str]())
+        with self._lock:
+            self._subscribers.setdefault(session_id, set()).add(subscriber)
+        try:
+            yield None
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers[session_id]
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[session_id]
+
+
+class RedisProgressBroker(ProgressBroker):
+    """Broker publishing on a Redis channel per session."""
+
+    def __init__(self, url: str) -> None:
+        # both clients connect lazily, the async one is only used by the API
+        self.client = redis.Redis.from_url(url)
+        self.async_client = redis.asyncio.Redis.from_url(url)
+
+    @staticmethod
+    def _channel(session_id: uuid.UUID) -> str:
+        return f"{settings.PROGRESS_CHANNEL_PREFIX}:{session_id}"
+
+    def publish(self, session_id: uuid.UUID, event: str, data: dict[str, Any]) -> None:
+        try:
+            self.client.publish(self._channel(session_id), _message(event, data))
+        except redis.RedisError:
+            logger.exception(
+                "src:grading:progress:: Failed to publish progress",
+                extra={"session_id": str(session_id), "event": event},
+            )
+
+    async def listen(
+        self, session_id: uuid.UUID, timeout: float
+    ) -> AsyncIterator[str | None]:
+        pubsub = self.async_client.pubsub()
+        try:
+            await pubsub.subscribe(self._channel(session_id))
+            # the confirmation, nothing published from then on is missed
+            await pubsub.get_message(timeout=timeout)
+            yield None
+            while True:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=timeout
+                )
+                yield message["data"].decode() if message else None
+        finally:
+            await pubsub.aclose()  # type: ignore[no-untyped-call]
+
+
+def _progress_broker() -> ProgressBroker:
+    """Build the progress broker configured for this deployment."""
+    if settings.PROGRESS_BROKER == "redis":
+        return RedisProgressBroker(settings.PROGRESS_REDIS_URL)
+
+    return MemoryProgressBroker()
+
+
+progress_broker = _progress_broker()
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+import zipfile
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.core.config import settings
+from src.grading.schemas import SubmissionPublicSchema
+
+TEMPLATES_PATH = Path(__file__).parent.parent / "report-templates"
+
+templates = Environment(
+    loader=FileSystemLoader(TEMPLATES_PATH),
+    autoescape=select_autoescape(["html"]),
+)
+
+
+def submission_version(
+    submission_id: uuid.UUID,
+    created_at: datetime,
+    updated_at: datetime | None,
+) -> str:
+    """Identify a version of a submission, it changes whenever it is updated."""
+    stamp = (updated_at or created_at).isoformat()
+    return hashlib.sha256(f"{submission_id}:{stamp}".encode()).hexdigest()
+
+
+def session_version(
+    session_id: uuid.UUID, submissions: int, updated_at: datetime | None
+) -> str:
+    """
+    Identify a state of the submissions of a session from their count and their
+    latest update, a submission added or updated changes it.
+    """
+    stamp = updated_at.isoformat() if updated_at else ""
+    return hashlib.sha256(f"{session_id}:{submissions}:{stamp}".encode()).hexdigest()
+
+
+def session_reports_version(submission_versions: Iterable[str]) -> str:
+    """Identify the set of submission versions bundled in a session archive."""
+    digest = hashlib.sha256()
+    for version in sorted(submission_versions):
+        digest.update(version.encode())
+    return digest.hexdigest()
+
+
+def report_path(submission_id: uuid.UUID, version: str) -> Path:
+    """Get the location of a submission report version."""
+    return (
+        Path(settings.REPORTS_STORAGE_PATH)
+        / "submissions"
+        / str(submission_id)
+        / f"{version}.pdf"
+    )
+
+
+def archive_path(session_id: uuid.UUID, version: str) -> Path:
+    """Get the location of a session reports archive version."""
+    return (
+        Path(settings.REPORTS_STORAGE_PATH)
+        / "sessions"
+        / str(session_id)
+        / f"{version}.zip"
+    )
+
+
+def _pending_marker(path: Path) -> Path:
+    return path.with_name(f"{path.name}.pending")
+
+
+def claim_build(path: Path) -> bool:
+    """
+    Mark the file as being built, returns False if a build is already in flight.
+
+    The marker is created atomically so only one of the concurrent requests
+    missing the file enqueues its build. A marker older than the pending TTL
+    is left by a build that died and is claimed again.
+    """
+    marker = _pending_marker(path)
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        pass
+
+    try:
+        age = time.time() - marker.stat().st_mtime
+    except FileNotFoundError:
+        # the build finished in the meantime
+        return False
+    if age < settings.REPORTS_PENDING_TTL:
+        return False
+
+    os.utime(marker)
+    return True
+
+
+def release_build(path: Path) -> None:
+    """Remove the in flight marker of the file."""
+    _pending_marker(path).unlink(missing_ok=True)
+
+
+def _evict_superseded(path: Path) -> None:
+    """Delete the other versions stored next to the given one, with their markers."""
+    # a build claimed for a version superseded before it ran builds the current
+    # one instead, and never releases the marker of the version it was claimed for
+    for sibling in (
+        *path.parent.glob(f"*{path.suffix}"),
+        *path.parent.glob(f"*{path.suffix}.pending"),
+    ):
+        if sibling not in (path, _pending_marker(path)):
+            sibling.unlink(missing_ok=True)
+
+
+def render_submission_report(submission: SubmissionPublicSchema) -> str:
+    """Render the HTML report of a submission."""
+    return templates.get_template("submission_report.html").render(
+        project_name=settings.PROJECT_NAME,
+        submission=submission,
+    )
+
+
+def html_to_pdf(html: str) -> bytes:
+    """Convert an HTML document to PDF."""
+    # imported lazily, weasyprint needs pango which only the worker image has
+    from weasyprint import HTML  # type: ignore
+
+    return HTML(string=html).write_pdf()  # type: ignore
+
+
+def _write_atomically(path: Path, content: bytes) -> None:
+    """Write the file so readers never observe a partially written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=path.parent)
+    with os.fdopen(file_descriptor, "wb") as file:
+        file.write(content)
+    os.replace(temporary_path, path)
+
+
+def build_submission_report(submission: SubmissionPublicSchema, version: str) -> Path:
+    """
+    Build the PDF report of the submission version unless it already exists.
+
+    The reports of the previous versions of the submission are evicted.
+    """
+    path = report_path(submission.id, version)
+    try:
+        if not path.is_file():
+            _write_atomically(path, html_to_pdf(render_submission_report(submission)))
+        _evict_superseded(path)
+    finally:
+        release_build(path)
+
+    return path
+
+
+def build_reports_archive(
+    reports: Iterable[tuple[str, str]], session_id: uuid.UUID, version: str
+) -> Path:
+    """
+    Bundle `(path, name)` reports in a zip archive unless it already exists.
+
+    The archives of the previous versions of the session are evicted.
+    """
+    path = archive_path(session_id, version)
+    try:
+        if not path.is_file():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(file_descriptor, "wb") as file:
+                with zipfile.ZipFile(
+                    file, "w", compression=zipfile.ZIP_DEFLATED
+                ) as archive:
+                    for report, name in reports:
+                        archive.write(report, arcname=name)
+            os.replace(temporary_path, path)
+        _evict_superseded(path)
+    finally:
+        release_build(path)
+
+    return path
@@ -1,45 +1,100 @@
-from fastapi import APIRouter, Depends
-from fastapi.responses import FileResponse
+import uuid
+from fastapi import APIRouter, Depends, Header, Path, Query
+from fastapi.responses import Response, StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.core.dependecies import require_async_db_session
 from src.grading.services import (
+    export_gradebook_service,
+    get_session_by_external_id_service,
+    get_session_reports_service,
+    get_session_statistics_service,
+    get_session_summary_service,
+    get_submission_report_service,
     list_submissions_services, 
     get_submission_by_id_services, 
     mark_submission_as_reviewed_services,
+    stream_progress_service,
     get_exercise_submission_by_id_service,
     update_execution_flag_result_service,
     update_exercise_submission_service,
     update_testcases_result_service,
 )
-from src.grading.schemas import EvaluationFlagResultUpdateSchema, ExerciseSubmissionPublicSchema, SubmissionPublicSchema, TestCaseResultPublicSchema
-from typing import Annotated
+from src.grading.schemas import EvaluationFlagResultUpdateSchema, ExerciseSubmissionPublicSchema, SessionStatisticsSchema, SessionSummaryPublicSchema, SubmissionPageSchema, SubmissionPublicSchema, TestCaseResultPublicSchema
+from src.models import Session
+from typing import Annotated, Literal
 
 
 router = APIRouter()
 
 
 @router.get('/{external_session_id}/submissions/')
-def list_submissions(
+async def list_submissions(
     submissions: Annotated[
-        list[SubmissionPublicSchema],
+        SubmissionPageSchema,
         Depends(list_submissions_services)
     ]
-) -> list[SubmissionPublicSchema]:
-    """List submissions for a given session."""
+) -> SubmissionPageSchema:
+    """List submissions for a given session, a page at a time."""
     return submissions
 
 
-@router.get('/{external_session_id}/submissions/{submission_id}/')
-def get_submission_details(
-    submission: Annotated[
-        SubmissionPublicSchema,
-        Depends(get_submission_by_id_services),
+@router.get('/{external_session_id}/export/', response_class=StreamingResponse)
+async def export_gradebook(
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+    export_format: Annotated[Literal['ndjson', 'csv'], Query(alias='format')] = 'ndjson',
+) -> StreamingResponse:
+    """Export the session gradebook as NDJSON or CSV."""
+    return export_gradebook_service(session, export_format)
+
+
+@router.get(
+    '/{external_session_id}/statistics/',
+    response_model=SessionStatisticsSchema,
+)
+async def get_session_statistics(
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get the grading statistics of the session, revalidated with their ETag."""
+    return await get_session_statistics_service(db_session, session, if_none_match)
+
+
+@router.get('/{external_session_id}/summary/')
+async def get_session_summary(
+    summary: Annotated[
+        SessionSummaryPublicSchema,
+        Depends(get_session_summary_service),
     ]
-) -> SubmissionPublicSchema:
-    """Get submission by ID."""
-    return submission
+) -> SessionSummaryPublicSchema:
+    """Get the submission counters of the session."""
+    return summary
+
+
+@router.get('/{external_session_id}/progress/', response_class=StreamingResponse)
+async def stream_progress(
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+) -> StreamingResponse:
+    """Stream the grading progress of the session as Server-Sent Events."""
+    return stream_progress_service(session)
+
+
+@router.get(
+    '/{external_session_id}/submissions/{submission_id}/',
+    response_model=SubmissionPublicSchema,
+)
+async def get_submission_details(
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+    submission_id: Annotated[uuid.UUID, Path()],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get submission by ID, revalidated with its ETag."""
+    return await get_submission_by_id_services(db_session, session, submission_id, if_none_match)
 
 
 @router.post('/{external_session_id}/submissions/{submission_id}/')
-def mark_submission_as_reviewed(
+async def mark_submission_as_reviewed(
     submission: Annotated[
         SubmissionPublicSchema,
         Depends(mark_submission_as_reviewed_services),
@@ -50,22 +105,26 @@ def mark_submission_as_reviewed(
 
 
 @router.get(
-    '/{external_session_id}/submissions/{submission_id}/exercises/{exercise_id}/'
+    '/{external_session_id}/submissions/{submission_id}/exercises/{exercise_id}/',
+    response_model=ExerciseSubmissionPublicSchema,
 )
-def get_exercise_submission(
-    exercise_submission: Annotated[
-        ExerciseSubmissionPublicSchema,
-        Depends(get_exercise_submission_by_id_service),
-    ]
-) -> ExerciseSubmissionPublicSchema:
-    """Get exercise submission by ID."""
-    return exercise_submission
+async def get_exercise_submission(
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+    submission_id: Annotated[uuid.UUID, Path()],
+    exercise_id: Annotated[uuid.UUID, Path()],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get exercise submission by ID, revalidated with its ETag."""
+    return await get_exercise_submission_by_id_service(
+        db_session, session, submission_id, exercise_id, if_none_match
+    )
 
 
 @router.put(
     '/{external_session_id}/submissions/{submission_id}/exercises/{exercise_id}/'
 )
-def update_exercise_submission(
+async def update_exercise_submission(
     exercise_submission: Annotated[
         ExerciseSubmissionPublicSchema,
         Depends(update_exercise_submission_service),
@@ -79,7 +138,7 @@ def update_exercise_submission(
     '/{external_session_id}/submissions/'
     '{submission_id}/exercises/{exercise_id}/testcases/{testcase_id}'
 )
-def update_testcase_submission(
+async def update_testcase_submission(
     testcase_result: Annotated[
         TestCaseResultPublicSchema,
         Depends(update_testcases_result_service),
@@ -93,7 +152,7 @@ def update_testcase_submission(
     '/{external_session_id}/submissions/'
     '{submission_id}/exercises/{exercise_id}/flags/{executionflag_id}'
 )
-def update_evaluation_flag_submission(
+async def update_evaluation_flag_submission(
     executionflag_result: Annotated[
         EvaluationFlagResultUpdateSchema,
         Depends(update_execution_flag_result_service),
@@ -103,9 +162,22 @@ def update_evaluation_flag_submission(
     return executionflag_result
 
 
-@router.post('/{external_session_id}/submissions/{submission_id}/report')
-def generate_student_report() -> FileResponse:
-    """Generate student report."""
-    # TODO: Use the report service to build the HTML report
-    # convert it to PDF format and return it here 
-    return FileResponse('report.pdf')
+@router.get('/{external_session_id}/submissions/{submission_id}/report')
+async def get_student_report(
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+    submission_id: Annotated[uuid.UUID, Path()],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get the PDF report of a submission, generating it when missing."""
+    return await get_submission_report_service(db_session, session, submission_id, if_none_match)
+
+
+@router.get('/{external_session_id}/reports/')
+async def get_session_reports(
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Get a zip archive of the reports of the session, generating it when missing."""
+    return await get_session_reports_service(db_session, session, if_none_match)
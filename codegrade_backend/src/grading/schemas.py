@@ -1,4 +1,6 @@
-from pydantic import BaseModel, PositiveFloat
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, Field, NonNegativeFloat, PositiveFloat
 from src.enums import EvaluationFlagEnum, SubmissionStatus
 import uuid
 
@@ -12,7 +14,7 @@ class GroupPublicSchema(BaseModel):
 class UserPublicSchema(BaseModel):
     id: uuid.UUID
     external_id: str
-    fullname: str
+    fullname: str | None = None
     group: GroupPublicSchema | None = None
 
 
@@ -34,7 +36,8 @@ class TestCasePublicSchema(BaseModel):
 
 class TestCaseResultPublicSchema(BaseModel):
     id: uuid.UUID
-    score: PositiveFloat
+    passed: bool
+    score: NonNegativeFloat
     exit_code: int
     std_out: str
     adjusted: bool
@@ -46,18 +49,18 @@ class EvaluationFlagPublicSchema(BaseModel):
     score_percentage: PositiveFloat
 
 
-class EvaluationFlagResultPublicSchema(TestCasePublicSchema):
+class EvaluationFlagResultPublicSchema(BaseModel):
     id: uuid.UUID
     passed: bool
     adjusted: bool
-    score: PositiveFloat
+    score: NonNegativeFloat
     evaluation_flag: EvaluationFlagPublicSchema
 
 
 class ExerciseSubmissionPublicSchema(BaseModel):
     id: uuid.UUID
     graded: bool
-    total_score: PositiveFloat | None
+    total_score: NonNegativeFloat | None
     auto_generated_feedback: str | None
     manual_feedback: str | None
     exercise: ExercisePublicSchema
@@ -70,7 +73,7 @@ class SubmissionPublicSchema(BaseModel):
     user: UserPublicSchema
     group: GroupPublicSchema | None = None
     status: SubmissionStatus
-    overrall_total: PositiveFloat | None = None
+    overrall_total: NonNegativeFloat | None = None
     reviewed: bool
     auto_generated_feedback: str | None
     manual_feedback: str | None
@@ -83,11 +86,104 @@ class ExerciseSubmissionUpdateSchema(BaseModel):
 
 class TestCaseResultUpdateSchema(BaseModel):
     passed: bool | None = None
-    score: PositiveFloat | None = None
+    score: NonNegativeFloat | None = None
 
 
 class EvaluationFlagResultUpdateSchema(BaseModel):
     passed: bool | None = None
-    score: PositiveFloat | None = None
+    score: NonNegativeFloat | None = None
+
+
+
+
+class SubmissionListQuerySchema(BaseModel):
+    cursor: uuid.UUID | None = Field(
+        default=None,
+        description="ID of the last submission of the previous page.",
+    )
+    limit: int = Field(default=50, ge=1, le=200)
+    view: Literal["full", "summary"] = "full"
+    status: SubmissionStatus | None = None
+    reviewed: bool | None = None
+    group_id: uuid.UUID | None = None
+    min_score: NonNegativeFloat | None = None
+    max_score: NonNegativeFloat | None = None
+
+
+class SubmissionSummarySchema(BaseModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    user_external_id: str
+    group_id: uuid.UUID | None = None
+    status: SubmissionStatus
+    overrall_total: NonNegativeFloat | None = None
+    reviewed: bool
+    created_at: datetime
+
+
+class SubmissionProgressSchema(BaseModel):
+    id: uuid.UUID
+    status: SubmissionStatus
+    overrall_total: NonNegativeFloat | None = None
+
+
+class SubmissionPageSchema(BaseModel):
+    items: list[SubmissionPublicSchema] | list[SubmissionSummarySchema]
+    next_cursor: uuid.UUID | None = None
+
+
+class HistogramBinSchema(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class ScoreDistributionSchema(BaseModel):
+    count: int
+    mean: float | None = None
+    median: float | None = None
+    minimum: float | None = None
+    maximum: float | None = None
+    percentiles: dict[str, float]
+    histogram: list[HistogramBinSchema]
+
+
+class ExerciseStatisticsSchema(BaseModel):
+    id: uuid.UUID
+    external_id: str
+    graded: int
+    passed: int
+    pass_rate: float | None = None
+    mean_score: float | None = None
+
+
+class TestCaseStatisticsSchema(BaseModel):
+    id: uuid.UUID
+    exercise_id: uuid.UUID
+    external_id: str
+    title: str
+    results: int
+    failed: int
+    failure_rate: float | None = None
+
+
+class EvaluationFlagOutcomesSchema(BaseModel):
+    flag: EvaluationFlagEnum
+    passed: int
+    failed: int
+
+
+class SessionStatisticsSchema(BaseModel):
+    submissions: dict[SubmissionStatus, int]
+    scores: ScoreDistributionSchema
+    exercises: list[ExerciseStatisticsSchema]
+    test_cases: list[TestCaseStatisticsSchema]
+    evaluation_flags: list[EvaluationFlagOutcomesSchema]
 
 
+class SessionSummaryPublicSchema(BaseModel):
+    queued: int
+    grading: int
+    graded: int
+    failed: int
+    reviewed: int
@@ -0,0 +1,107 @@
+"""
+Set based recomputation of the grading totals.
+
+An exercise submission totals the scores of its test case and evaluation flag
+results, weighted by their `score_percentage` when graded or set by hand when
+adjusted, and a submission averages the totals of its graded exercise
+submissions. Both are recomputed by two `UPDATE` statements with correlated
+aggregates, for a whole session or for a few submissions, so a recomputation
+costs the same statements whatever the number of rows.
+
+The statements do not synchronize the loaded objects, callers commit before
+reading the totals again, and bump the submission versions themselves.
+"""
+
+import uuid
+from collections.abc import Collection
+
+from sqlalchemy import ColumnElement, Update, func
+from sqlmodel import Session as DbSession
+from sqlmodel import col, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models import (
+    EvaluationFlagResult,
+    ExerciseSubmission,
+    Submission,
+    TestCaseResult,
+)
+
+
+def _scope(
+    session_id: uuid.UUID | None, submission_ids: Collection[uuid.UUID] | None
+) -> ColumnElement[bool]:
+    if (session_id is None) == (submission_ids is None):
+        raise ValueError("Either a session or submissions must be given")
+    if session_id is not None:
+        return col(Submission.session_id) == session_id
+    return col(Submission.id).in_(submission_ids)  # type: ignore[arg-type]
+
+
+def total_statements(
+    session_id: uuid.UUID | None = None,
+    submission_ids: Collection[uuid.UUID] | None = None,
+) -> tuple[Update, Update]:
+    """Get the statements recomputing the totals of a session or of submissions."""
+    scope = _scope(session_id, submission_ids)
+
+    results_total = (
+        select(func.coalesce(func.sum(TestCaseResult.score), 0.0))
+        .where(col(TestCaseResult.submission_id) == col(ExerciseSubmission.id))
+        .scalar_subquery()
+        + select(func.coalesce(func.sum(EvaluationFlagResult.score), 0.0))
+        .where(col(EvaluationFlagResult.submission_id) == col(ExerciseSubmission.id))
+        .scalar_subquery()
+    )
+    exercise_totals = (
+        update(ExerciseSubmission)
+        .where(
+            col(ExerciseSubmission.graded),
+            col(ExerciseSubmission.submission_id).in_(
+                select(Submission.id).where(scope)
+            ),
+        )
+        .values(total_score=results_total)
+        .execution_options(synchronize_session=False)
+    )
+
+    graded_exercise_submissions = select(ExerciseSubmission.total_score).where(
+        col(ExerciseSubmission.submission_id) == col(Submission.id),
+        col(ExerciseSubmission.graded),
+    )
+    submission_totals = (
+        update(Submission)
+        # submissions never graded keep no total
+        .where(scope, graded_exercise_submissions.exists())
+        .values(
+            overrall_total=select(func.avg(ExerciseSubmission.total_score))
+            .where(
+                col(ExerciseSubmission.submission_id) == col(Submission.id),
+                col(ExerciseSubmission.graded),
+            )
+            .scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # the exercise totals first, the submission totals average them
+    return exercise_totals, submission_totals
+
+
+def recompute_totals(
+    db_session: DbSession,
+    session_id: uuid.UUID | None = None,
+    submission_ids: Collection[uuid.UUID] | None = None,
+) -> None:
+    """Recompute the totals of every submission of a session, or of some submissions."""
+    for statement in total_statements(session_id, submission_ids):
+        db_session.exec(statement)  # type: ignore
+
+
+async def arecompute_totals(
+    db_session: AsyncSession,
+    session_id: uuid.UUID | None = None,
+    submission_ids: Collection[uuid.UUID] | None = None,
+) -> None:
+    """Recompute the totals like `recompute_totals`, on an async session."""
+    for statement in total_statements(session_id, submission_ids):
+        await db_session.exec(statement)  # type: ignore
@@ -1,24 +1,161 @@
+import json
 import uuid
-from fastapi import Body, HTTPException, Path, Depends
-from typing import Annotated
+from collections import Counter
+from celery import chord
+from datetime import datetime, timezone
+from fastapi import Body, HTTPException, Path, Depends, Query
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from typing import Annotated, Literal, cast
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from sqlalchemy import ColumnElement, func
+from sqlalchemy.orm import aliased, load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+from sqlalchemy.orm.strategy_options import _AbstractLoad
 from sqlmodel import (
+    and_,
+    col,
+    or_,
     select,
-    Session as DbSession
+    update,
 )
-from src.models import EvaluationFlagResult, ExerciseSubmission, Session, Submission, TestCaseResult
-from src.core.dependecies import require_authenticated_service, require_db_session
-from src.grading.schemas import EvaluationFlagResultUpdateSchema, ExerciseSubmissionUpdateSchema, SubmissionPublicSchema, ExerciseSubmissionPublicSchema, TestCaseResultPublicSchema, TestCaseResultUpdateSchema
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.core.config import settings
+from src.models import EvaluationFlagResult, ExerciseSubmission, Session, SessionSummary, Submission, TestCaseResult, User
+from src.core.dependecies import require_async_db_session, require_authenticated_service
+from src.grading.analytics import session_statistics
+from src.grading.cache import cached_response, response_cache
+from src.grading.progress import progress_broker
+from src.grading.exports import close_iterators, iter_csv, iter_gradebook_rows, iter_ndjson
+from src.grading.reports import archive_path, claim_build, report_path, session_reports_version, session_version, submission_version
+from src.grading.scoring import arecompute_totals
+from src.grading.summary import rebuild_session_summary, record_changes
+from src.grading.schemas import EvaluationFlagResultUpdateSchema, ExerciseSubmissionUpdateSchema, SessionStatisticsSchema, SessionSummaryPublicSchema, SubmissionListQuerySchema, SubmissionPageSchema, SubmissionPublicSchema, ExerciseSubmissionPublicSchema, SubmissionSummarySchema, TestCaseResultPublicSchema, TestCaseResultUpdateSchema
+from src.worker import celery_app
+
+
+# Loader options matching the public schemas, every relationship walked while
+# serializing is fetched up front with one `SELECT ... IN` per level so a
+# response costs a constant number of queries however many rows it holds. The
+# nested ones are typed as loads, the type `.options` of a load accepts.
+TEST_CASE_RESULT_LOADER_OPTIONS: tuple[_AbstractLoad, ...] = (
+    selectinload(TestCaseResult.test_case),  # type: ignore
+)
+
+EXERCISE_SUBMISSION_LOADER_OPTIONS: tuple[_AbstractLoad, ...] = (
+    selectinload(ExerciseSubmission.exercise),  # type: ignore
+    selectinload(ExerciseSubmission.test_case_results).options(  # type: ignore
+        *TEST_CASE_RESULT_LOADER_OPTIONS
+    ),
+    selectinload(ExerciseSubmission.evaluation_flag_results).selectinload(  # type: ignore
+        EvaluationFlagResult.evaluation_flag  # type: ignore
+    ),
+)
+
+SUBMISSION_LOADER_OPTIONS: tuple[LoaderOption, ...] = (
+    selectinload(Submission.user).selectinload(User.group),  # type: ignore
+    selectinload(Submission.group),  # type: ignore
+    selectinload(Submission.exercise_submissions).options(  # type: ignore
+        *EXERCISE_SUBMISSION_LOADER_OPTIONS
+    ),
+)
+
+# submission columns the summary view reads, the other ones are never loaded
+SUBMISSION_SUMMARY_FIELDS = set(SubmissionSummarySchema.model_fields) - {"user_external_id"}
+
+
+async def _touch_submission(db_session: AsyncSession, submission_id: uuid.UUID) -> None:
+    """
+    Bump the submission version after one of its results changed.
+
+    The timestamp is set from Python rather than the database so consecutive
+    updates within the same second still produce distinct versions.
+    """
+    await db_session.exec(
+        update(Submission)  # type: ignore
+        .where(col(Submission.id) == submission_id)
+        .values(updated_at=datetime.now(timezone.utc).replace(tzinfo=None))
+    )
+
+
+async def _get_submission_version(
+    db_session: AsyncSession, session: Session, submission_id: uuid.UUID
+) -> str | None:
+    """Get the current version of a session submission, `None` when it does not exist."""
+    row = (await db_session.exec(
+        select(Submission.id, Submission.created_at, Submission.updated_at)
+        .where(
+            Submission.session_id == session.id,
+            Submission.id == submission_id,
+        )
+    )).first()
+
+    return submission_version(*row) if row else None
+
+
+async def _get_submission_versions(
+    db_session: AsyncSession, session: Session
+) -> dict[uuid.UUID, str]:
+    """Get the current version of every submission of the session."""
+    rows = (await db_session.exec(
+        select(Submission.id, Submission.created_at, Submission.updated_at)
+        .where(Submission.session_id == session.id)
+    )).all()
+
+    return {row[0]: submission_version(*row) for row in rows}
+
 
+async def _get_session_version(db_session: AsyncSession, session: Session) -> str:
+    """Get the version of the session submissions, from one aggregate over them."""
+    submissions, updated_at = cast(tuple[int, datetime | None], (await db_session.exec(
+        select(
+            func.count(),
+            func.max(func.coalesce(Submission.updated_at, Submission.created_at)),
+        ).where(Submission.session_id == session.id)
+    )).one())
 
-def get_session_by_external_id_service(
+    return session_version(session.id, submissions, updated_at)
+
+
+async def _cached_json_response(
+    submission_id: uuid.UUID,
+    version: str,
+    resource: str,
+    if_none_match: str | None,
+    build: Callable[[], Awaitable[BaseModel]],
+) -> Response:
+    """
+    Serve a submission resource from the response cache.
+
+    On a miss the resource is built, serialized once and cached under the
+    submission version. The ETag is the hash of the serialized body, so a
+    client revalidating an unchanged resource gets a `304` without a body.
+    """
+
+    cached = await response_cache.aget(submission_id, version, resource)
+    if cached is None:
+        schema = await build()
+        cached = cached_response(schema.model_dump_json().encode())
+        await response_cache.aset(submission_id, version, resource, cached)
+
+    headers = {"ETag": f'"{cached.etag}"'}
+    if _matches_etag(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+
+async def get_session_by_external_id_service(
     _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
     external_session_id: Annotated[str, Path()],
 ) -> Session:
     """Get session by external ID."""
-    session = db_session.exec(
+    session = (await db_session.exec(
         select(Session).where(Session.external_id == external_session_id)
-    ).first()
+    )).first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -26,94 +163,206 @@ def get_session_by_external_id_service(
     return session
 
 
-def list_submissions_services(
-    _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
-    session: Annotated[Session, Depends(get_session_by_external_id_service)],
-) -> list[SubmissionPublicSchema]:
-    """List submissions for a given session."""
-    
-    submissions = db_session.exec(
-        select(Submission).where(Submission.session_id == session.id)
-    ).all()
-
-    return [
-        SubmissionPublicSchema.model_validate(submission, from_attributes=True) 
-        for submission in submissions
-    ]
-
-
-def get_submission_by_id_services(
+async def list_submissions_services(
     _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
     session: Annotated[Session, Depends(get_session_by_external_id_service)],
-    submission_id: Annotated[uuid.UUID, Path()],
-) -> SubmissionPublicSchema:
-    """Get submission by ID."""
-    
-    submission = db_session.exec(
-        select(Submission).where(
-            Submission.session_id == session.id,
-            Submission.id == submission_id,
+    query: Annotated[SubmissionListQuerySchema, Query()],
+) -> SubmissionPageSchema:
+    """
+    List submissions for a given session.
+
+    Pages are keyset paginated on `(created_at, id)`: the cursor is the ID of
+    the last submission of the previous page and the next page starts right
+    after its position, so deep pages cost the same as the first one.
+    """
+
+    filters: list[ColumnElement[bool]] = [col(Submission.session_id) == session.id]
+    if query.status is not None:
+        filters.append(col(Submission.status) == query.status)
+    if query.reviewed is not None:
+        filters.append(col(Submission.reviewed) == query.reviewed)
+    if query.group_id is not None:
+        filters.append(col(Submission.group_id) == query.group_id)
+    if query.min_score is not None:
+        filters.append(col(Submission.overrall_total) >= query.min_score)
+    if query.max_score is not None:
+        filters.append(col(Submission.overrall_total) <= query.max_score)
+    if query.cursor is not None:
+        # an unknown cursor would silently produce an empty last page
+        cursor_exists = (await db_session.exec(
+            select(Submission.id).where(
+                Submission.session_id == session.id,
+                Submission.id == query.cursor,
+            )
+        )).first()
+        if not cursor_exists:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        # compare against the values stored for the cursor row so the
+        # database never has to round trip timestamps through Python
+        cursor = aliased(Submission)
+        cursor_created_at = (
+            select(cursor.created_at).where(cursor.id == query.cursor).scalar_subquery()
+        )
+        filters.append(
+            or_(
+                col(Submission.created_at) > cursor_created_at,
+                and_(
+                    col(Submission.created_at) == cursor_created_at,
+                    col(Submission.id) > query.cursor,
+                ),
+            )
         )
-    ).first()
 
-    if not submission:
+    ordering = (col(Submission.created_at), col(Submission.id))
+    items: list[SubmissionPublicSchema] | list[SubmissionSummarySchema]
+    if query.view == "summary":
+        rows = (await db_session.exec(
+            select(Submission, col(User.external_id))
+            .join(User, col(User.id) == Submission.user_id)
+            .where(*filters)
+            .order_by(*ordering)
+            .limit(query.limit + 1)
+            .options(
+                load_only(*(getattr(Submission, field) for field in SUBMISSION_SUMMARY_FIELDS))
+            )
+        )).all()
+        has_more = len(rows) > query.limit
+        items = [
+            SubmissionSummarySchema.model_validate(
+                {
+                    **submission.model_dump(include=SUBMISSION_SUMMARY_FIELDS),
+                    "user_external_id": user_external_id,
+                }
+            )
+            for submission, user_external_id in rows[: query.limit]
+        ]
+    else:
+        submissions = (await db_session.exec(
+            select(Submission)
+            .where(*filters)
+            .order_by(*ordering)
+            .limit(query.limit + 1)
+            .options(*SUBMISSION_LOADER_OPTIONS)
+        )).all()
+        has_more = len(submissions) > query.limit
+        items = [
+            SubmissionPublicSchema.model_validate(submission, from_attributes=True)
+            for submission in submissions[: query.limit]
+        ]
+
+    return SubmissionPageSchema(
+        items=items,
+        next_cursor=items[-1].id if has_more else None,
+    )
+
+
+async def get_submission_by_id_services(
+    db_session: AsyncSession,
+    session: Session,
+    submission_id: uuid.UUID,
+    if_none_match: str | None,
+) -> Response:
+    """
+    Get submission by ID, served from the response cache when unchanged.
+
+    Like the report services, it returns a response and so is called by its
+    route directly rather than injected through `Depends`.
+    """
+
+    version = await _get_submission_version(db_session, session, submission_id)
+    if not version:
         raise HTTPException(status_code=404, detail="Submission not found")
 
-    return SubmissionPublicSchema.model_validate(submission, from_attributes=True)
+    async def _build() -> SubmissionPublicSchema:
+        submission = (await db_session.exec(
+            select(Submission)
+            .where(Submission.id == submission_id)
+            .options(*SUBMISSION_LOADER_OPTIONS)
+        )).one()
+        return SubmissionPublicSchema.model_validate(submission, from_attributes=True)
 
+    return await _cached_json_response(
+        submission_id, version, "submission", if_none_match, _build
+    )
 
-def mark_submission_as_reviewed_services(
+
+async def mark_submission_as_reviewed_services(
     _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
     session: Annotated[Session, Depends(get_session_by_external_id_service)],
     submission_id: Annotated[uuid.UUID, Path()],
 ) -> SubmissionPublicSchema:
     """Mark submission as reviewed."""
     
-    submission = db_session.exec(
+    submission = (await db_session.exec(
         select(Submission).where(
             Submission.session_id == session.id,
             Submission.id == submission_id,
         )
-    ).first()
+    )).first()
 
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
 
-    submission.reviewed = True
-    db_session.commit()
-    db_session.refresh(submission)
+    # checked and set in one statement, concurrent requests count the review once
+    reviewed = await db_session.exec(
+        update(Submission)  # type: ignore
+        .where(col(Submission.id) == submission_id, ~col(Submission.reviewed))
+        .values(reviewed=True)
+        .execution_options(synchronize_session=False)
+    )
+    if reviewed.rowcount == 1:
+        await db_session.run_sync(record_changes, session.id, Counter(reviewed=1))  # type: ignore[arg-type]
+    await _touch_submission(db_session, submission_id)
+    await db_session.commit()
+    await response_cache.ainvalidate(submission_id)
+
+    submission = (await db_session.exec(
+        select(Submission)
+        .where(Submission.id == submission_id)
+        .options(*SUBMISSION_LOADER_OPTIONS)
+    )).one()
     return SubmissionPublicSchema.model_validate(submission, from_attributes=True)
 
 
-def get_exercise_submission_by_id_service(
-    _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
-    session: Annotated[Session, Depends(get_session_by_external_id_service)],
-    submission_id: Annotated[uuid.UUID, Path()],
-    exercise_id: Annotated[uuid.UUID, Path()],
-) -> ExerciseSubmissionPublicSchema:
-    """Get exercise submission by ID."""
-
-    exercise_submission = db_session.exec(
-        select(ExerciseSubmission).where(
-            Submission.session_id == session.id,
-            Submission.id == submission_id,
-            ExerciseSubmission.exercise_id == exercise_id,
-        )
-    ).first()
+async def get_exercise_submission_by_id_service(
+    db_session: AsyncSession,
+    session: Session,
+    submission_id: uuid.UUID,
+    exercise_id: uuid.UUID,
+    if_none_match: str | None,
+) -> Response:
+    """Get exercise submission by ID, served from the response cache when unchanged."""
 
-    if not exercise_submission:
+    version = await _get_submission_version(db_session, session, submission_id)
+    if not version:
         raise HTTPException(status_code=404, detail="Exercise submission not found")
 
-    return ExerciseSubmissionPublicSchema.model_validate(exercise_submission, from_attributes=True)
+    async def _build() -> ExerciseSubmissionPublicSchema:
+        exercise_submission = (await db_session.exec(
+            select(ExerciseSubmission)
+            .where(
+                ExerciseSubmission.submission_id == submission_id,
+                ExerciseSubmission.exercise_id == exercise_id,
+            )
+            .options(*EXERCISE_SUBMISSION_LOADER_OPTIONS)
+        )).first()
+
+        if not exercise_submission:
+            raise HTTPException(status_code=404, detail="Exercise submission not found")
 
+        return ExerciseSubmissionPublicSchema.model_validate(exercise_submission, from_attributes=True)
 
-def update_exercise_submission_service(
+    return await _cached_json_response(
+        submission_id, version, f"exercise:{exercise_id}", if_none_match, _build
+    )
+
+
+async def update_exercise_submission_service(
     _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
     session: Annotated[Session, Depends(get_session_by_external_id_service)],
     submission_id: Annotated[uuid.UUID, Path()],
     exercise_id: Annotated[uuid.UUID, Path()],
@@ -121,26 +370,33 @@ def update_exercise_submission_service(
 )  -> ExerciseSubmissionPublicSchema:
     """Update exercise submission."""
 
-    exercise_submission = db_session.exec(
+    exercise_submission = (await db_session.exec(
         select(ExerciseSubmission).where(
             ExerciseSubmission.submission_id == submission_id,
             ExerciseSubmission.id == exercise_id,
         )
-    ).first()
+    )).first()
 
     if not exercise_submission:
         raise HTTPException(status_code=404, detail="Exercise submission not found")
 
     exercise_submission.manual_feedback = update_data.manual_feedback
     db_session.add(exercise_submission)
-    db_session.commit()
-    db_session.refresh(exercise_submission)
+    await _touch_submission(db_session, submission_id)
+    await db_session.commit()
+    await response_cache.ainvalidate(submission_id)
+
+    exercise_submission = (await db_session.exec(
+        select(ExerciseSubmission)
+        .where(ExerciseSubmission.id == exercise_id)
+        .options(*EXERCISE_SUBMISSION_LOADER_OPTIONS)
+    )).one()
     return ExerciseSubmissionPublicSchema.model_validate(exercise_submission, from_attributes=True)
 
 
-def update_testcases_result_service(
+async def update_testcases_result_service(
     _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
     session: Annotated[Session, Depends(get_session_by_external_id_service)],
     submission_id: Annotated[uuid.UUID, Path()],
     testcase_id: Annotated[uuid.UUID, Path()],
@@ -148,12 +404,15 @@ def update_testcases_result_service(
 ) -> TestCaseResultPublicSchema:
     """Update testcase result."""
 
-    testcase_result = db_session.exec(
-        select(TestCaseResult).where(
-            TestCaseResult.submission_id == submission_id,
+    # results belong to the exercise submissions of the submission
+    testcase_result = (await db_session.exec(
+        select(TestCaseResult)
+        .join(ExerciseSubmission, col(ExerciseSubmission.id) == TestCaseResult.submission_id)
+        .where(
+            ExerciseSubmission.submission_id == submission_id,
             TestCaseResult.id == testcase_id,
         )
-    ).first()
+    )).first()
 
     if not testcase_result:
         raise HTTPException(status_code=404, detail="Testcase result not found")
@@ -161,14 +420,24 @@ def update_testcases_result_service(
     testcase_result.sqlmodel_update(update_data.model_dump(exclude_unset=True))
     testcase_result.adjusted = True
     db_session.add(testcase_result)
-    db_session.commit()
-    db_session.refresh(testcase_result)
+    # flushed first, the totals are recomputed from the stored scores
+    await db_session.flush()
+    await arecompute_totals(db_session, submission_ids=[submission_id])
+    await _touch_submission(db_session, submission_id)
+    await db_session.commit()
+    await response_cache.ainvalidate(submission_id)
+
+    testcase_result = (await db_session.exec(
+        select(TestCaseResult)
+        .where(TestCaseResult.id == testcase_id)
+        .options(*TEST_CASE_RESULT_LOADER_OPTIONS)
+    )).one()
     return TestCaseResultPublicSchema.model_validate(testcase_result, from_attributes=True)
 
 
-def update_execution_flag_result_service(
+async def update_execution_flag_result_service(
     _: Annotated[bool, Depends(require_authenticated_service)],
-    db_session: Annotated[DbSession, Depends(require_db_session)],
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
     session: Annotated[Session, Depends(get_session_by_external_id_service)],
     submission_id: Annotated[uuid.UUID, Path()],
     executionflag_id: Annotated[uuid.UUID, Path()],
@@ -176,12 +445,14 @@ def update_execution_flag_result_service(
 ) -> EvaluationFlagResultUpdateSchema:
     """Update testcase result."""
 
-    evaluation_flag_result = db_session.exec(
-        select(EvaluationFlagResult).where(
-            EvaluationFlagResult.submission_id == submission_id,
+    evaluation_flag_result = (await db_session.exec(
+        select(EvaluationFlagResult)
+        .join(ExerciseSubmission, col(ExerciseSubmission.id) == EvaluationFlagResult.submission_id)
+        .where(
+            ExerciseSubmission.submission_id == submission_id,
             EvaluationFlagResult.id == executionflag_id,
         )
-    ).first()
+    )).first()
 
     if not evaluation_flag_result:
         raise HTTPException(status_code=404, detail="Result not found")
@@ -189,6 +460,235 @@ def update_execution_flag_result_service(
     evaluation_flag_result.sqlmodel_update(update_data.model_dump(exclude_unset=True))
     evaluation_flag_result.adjusted = True
     db_session.add(evaluation_flag_result)
-    db_session.commit()
-    db_session.refresh(evaluation_flag_result)
+    # flushed first, the totals are recomputed from the stored scores
+    await db_session.flush()
+    await arecompute_totals(db_session, submission_ids=[submission_id])
+    await _touch_submission(db_session, submission_id)
+    await db_session.commit()
+    await response_cache.ainvalidate(submission_id)
+    await db_session.refresh(evaluation_flag_result)
     return EvaluationFlagResultUpdateSchema.model_validate(evaluation_flag_result, from_attributes=True)
+
+
+async def get_session_statistics_service(
+    db_session: AsyncSession,
+    session: Session,
+    if_none_match: str | None,
+) -> Response:
+    """
+    Get the grading statistics of the session, served from the response cache
+    until one of its submissions changes.
+
+    The statistics are cached under the session ID, which no submission
+    shares, and the version of its submissions.
+    """
+
+    version = await _get_session_version(db_session, session)
+
+    async def _build() -> SessionStatisticsSchema:
+        return await session_statistics(db_session, session.id)
+
+    return await _cached_json_response(
+        session.id, version, "statistics", if_none_match, _build
+    )
+
+
+async def get_session_summary_service(
+    _: Annotated[bool, Depends(require_authenticated_service)],
+    db_session: Annotated[AsyncSession, Depends(require_async_db_session)],
+    session: Annotated[Session, Depends(get_session_by_external_id_service)],
+) -> SessionSummaryPublicSchema:
+    """Get the submission counters of the session."""
+
+    summary = (await db_session.exec(
+        select(SessionSummary).where(SessionSummary.session_id == session.id)
+    )).first()
+    if summary:
+        return SessionSummaryPublicSchema.model_validate(summary, from_attributes=True)
+
+    # a session older than the counters, built once, read before the commit expires them
+    summary = await db_session.run_sync(rebuild_session_summary, session.id)  # type: ignore[arg-type]
+    counters = SessionSummaryPublicSchema.model_validate(summary, from_attributes=True)
+    await db_session.commit()
+    return counters
+
+
+def export_gradebook_service(
+    session: Session,
+    export_format: Literal["ndjson", "csv"],
+) -> StreamingResponse:
+    """
+    Stream the session gradebook, one row per exercise submission.
+
+    FastAPI cannot inject a response through `Depends`, so unlike the other
+    services this one is called by its route directly.
+    """
+
+    rows = iter_gradebook_rows(session.id)
+    if export_format == "csv":
+        content, media_type = iter_csv(rows), "text/csv"
+    else:
+        content, media_type = iter_ndjson(rows), "application/x-ndjson"
+
+    filename = f"{session.external_id}-gradebook.{export_format}"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        # runs even when the client disconnects mid stream
+        background=BackgroundTask(close_iterators, content, rows),
+    )
+
+
+async def _iter_progress_events(session_id: uuid.UUID) -> AsyncIterator[str]:
+    """Format the session progress messages as Server-Sent Events."""
+    async for message in progress_broker.listen(
+        session_id, settings.PROGRESS_KEEPALIVE_INTERVAL
+    ):
+        if message is None:
+            # a comment, ignored by the clients but flushing the connection
+            yield ": keep-alive\n\n"
+            continue
+
+        event = json.loads(message)
+        yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def stream_progress_service(session: Session) -> StreamingResponse:
+    """
+    Stream the grading progress of the session as Server-Sent Events.
+
+    Every status and score the grading workers write is sent as a
+    `submission` event with the submission ID, status and total, and the end
+    of the session grading as a `session` event. Dashboards apply these deltas
+    instead of polling the submissions list. Called by its route directly,
+    like the gradebook export.
+    """
+    return StreamingResponse(
+        _iter_progress_events(session.id),
+        media_type="text/event-stream",
+        # proxies must neither cache nor buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _matches_etag(if_none_match: str | None, version: str) -> bool:
+    """Check whether the client already holds the given version."""
+    if not if_none_match:
+        return False
+
+    tags = {tag.strip().removeprefix('W/').strip('"') for tag in if_none_match.split(',')}
+    return version in tags or '*' in tags
+
+
+def _report_pending_response(version: str) -> JSONResponse:
+    """Tell the client the report is being generated and to poll again."""
+    return JSONResponse(
+        status_code=202,
+        content={"status": "pending", "version": version},
+        headers={"Retry-After": "5"},
+    )
+
+
+def _send_submission_report_task(submission_id: uuid.UUID, version: str) -> None:
+    """
+    Queue the report generation of the submission version.
+
+    Celery does not dedupe task IDs, concurrent requests are deduped by the
+    in flight marker claimed before calling this.
+    """
+    celery_app.send_task(
+        "generate_submission_report_task",
+        args=(str(submission_id),),
+        queue=settings.CELERY_REPORTS_QUEUE,
+        task_id=f"report-{version}",
+    )
+
+
+def _send_session_reports_tasks(session: Session, submission_ids: Iterable[uuid.UUID], version: str) -> None:
+    """Fan out the reports of the submissions and zip them once they are all done."""
+    chord(
+        celery_app.signature(
+            "generate_submission_report_task",
+            args=(str(submission_id),),
+            queue=settings.CELERY_REPORTS_QUEUE,
+        )
+        for submission_id in submission_ids
+    )(
+        celery_app.signature(
+            "build_session_reports_archive_task",
+            kwargs={"session_id": str(session.id), "version": version},
+            queue=settings.CELERY_REPORTS_QUEUE,
+        )
+    )
+
+
+async def get_submission_report_service(
+    db_session: AsyncSession,
+    session: Session,
+    submission_id: uuid.UUID,
+    if_none_match: str | None,
+) -> Response:
+    """
+    Serve the PDF report of a submission.
+
+    Reports are stored under the submission version, so a stored report is
+    served as is and the client revalidates it with its ETag. When the current
+    version has no report yet it is generated by the reports worker and the
+    client is asked to come back later.
+    """
+
+    version = await _get_submission_version(db_session, session, submission_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    headers = {"ETag": f'"{version}"'}
+    if _matches_etag(if_none_match, version):
+        return Response(status_code=304, headers=headers)
+
+    path = report_path(submission_id, version)
+    if not path.is_file():
+        if claim_build(path):
+            await run_in_threadpool(_send_submission_report_task, submission_id, version)
+        return _report_pending_response(version)
+
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename=f"{submission_id}.pdf",
+        headers=headers,
+    )
+
+
+async def get_session_reports_service(
+    db_session: AsyncSession,
+    session: Session,
+    if_none_match: str | None,
+) -> Response:
+    """
+    Serve a zip archive with the reports of every submission of the session.
+
+    The archive is keyed by the versions of all the submissions it bundles.
+    When it is missing, one report task per submission is fanned out on the
+    reports queue and a callback zips them once they are all done. The fan out
+    happens once per version, later polls find its in flight marker.
+    """
+
+    versions = await _get_submission_versions(db_session, session)
+    version = session_reports_version(versions.values())
+    headers = {"ETag": f'"{version}"'}
+    if _matches_etag(if_none_match, version):
+        return Response(status_code=304, headers=headers)
+
+    path = archive_path(session.id, version)
+    if not path.is_file():
+        if claim_build(path):
+            await run_in_threadpool(_send_session_reports_tasks, session, versions, version)
+        return _report_pending_response(version)
+
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"{session.external_id}-reports.zip",
+        headers=headers,
+    )
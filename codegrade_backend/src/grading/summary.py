@@ -0,0 +1,105 @@
+"""
+Submission counters of the sessions.
+
+Every change of a submission status or review flag moves the counters of its
+session in the transaction making the change, with a single `UPDATE`, so the
+UI reads them from one row rather than counting the submissions. A session
+without its row, created before the counters existed, gets it rebuilt from
+its submissions by its next change or read.
+
+`reconcile_session_summaries_task` rebuilds every row from scratch and logs
+the ones that drifted.
+"""
+
+import uuid
+from collections import Counter
+from collections.abc import Iterable
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session as DbSession
+from sqlmodel import col, select, update
+
+from src.enums import SubmissionStatus
+from src.models import SessionSummary, Submission
+
+COUNTERS = (*(status.value for status in SubmissionStatus), "reviewed")
+
+
+def status_changes(
+    transitions: Iterable[tuple[SubmissionStatus | None, SubmissionStatus]],
+) -> Counter[str]:
+    """Get the counter changes of submissions moving from a status to another, `None` for new ones."""
+    changes: Counter[str] = Counter()
+    for previous, status in transitions:
+        if previous is not None:
+            changes[SubmissionStatus(previous).value] -= 1
+        changes[SubmissionStatus(status).value] += 1
+    return changes
+
+
+def count_submissions(db_session: DbSession, session_id: uuid.UUID) -> dict[str, int]:
+    """Count the submissions of the session, the way the counters do."""
+    counts = dict.fromkeys(COUNTERS, 0)
+    for status, count, reviewed in db_session.exec(
+        select(
+            Submission.status,
+            func.count(),
+            func.sum(case((col(Submission.reviewed), 1), else_=0)),
+        )
+        .where(Submission.session_id == session_id)
+        .group_by(col(Submission.status))
+    ).all():
+        counts[SubmissionStatus(status).value] = count
+        counts["reviewed"] += reviewed
+    return counts
+
+
+def rebuild_session_summary(
+    db_session: DbSession, session_id: uuid.UUID
+) -> SessionSummary:
+    """Set the counters of the session from its submissions."""
+    # locked first, so no change is counted and then applied again
+    summary = db_session.exec(
+        select(SessionSummary)
+        .where(SessionSummary.session_id == session_id)
+        .with_for_update()
+    ).first() or SessionSummary(session_id=session_id)
+
+    summary.sqlmodel_update(count_submissions(db_session, session_id))
+    db_session.add(summary)
+    db_session.flush()
+    return summary
+
+
+def record_changes(
+    db_session: DbSession, session_id: uuid.UUID, changes: Counter[str]
+) -> None:
+    """
+    Move the counters of the session, in the transaction of the changes.
+
+    The changes must be written already, a session without its row gets it
+    rebuilt from its submissions, changes included.
+    """
+    values = {
+        counter: getattr(SessionSummary, counter) + change
+        for counter, change in changes.items()
+        if change
+    }
+    if not values:
+        return
+
+    statement = (
+        update(SessionSummary)
+        .where(col(SessionSummary.session_id) == session_id)
+        .values(values)
+    )
+    if db_session.exec(statement).rowcount:  # type: ignore
+        return
+
+    try:
+        with db_session.begin_nested():
+            rebuild_session_summary(db_session, session_id)
+    except IntegrityError:
+        # rebuilt by a concurrent change, which could not count this one
+        db_session.exec(statement)  # type: ignore
@@ -0,0 +1,103 @@
+import uuid
+
+from sqlmodel import Session, select
+
+from src.core.config import settings
+from src.core.db import engine
+from src.grading.reports import (
+    build_reports_archive,
+    build_submission_report,
+    submission_version,
+)
+from src.grading.schemas import SubmissionPublicSchema
+from src.grading.services import SUBMISSION_LOADER_OPTIONS
+from src.grading.summary import COUNTERS, rebuild_session_summary
+from src.log import logger
+from src.models import Session as SessionModel
+from src.models import SessionSummary, Submission
+from src.worker import celery_app
+
+
+@celery_app.task(
+    name="generate_submission_report_task", queue=settings.CELERY_REPORTS_QUEUE
+)
+def generate_submission_report_task(submission_id: str) -> list[str] | None:
+    """Build the PDF report of a submission, returns its path and archive name."""
+
+    with Session(engine) as session:
+        submission = session.exec(
+            select(Submission)
+            .where(Submission.id == uuid.UUID(submission_id))
+            .options(*SUBMISSION_LOADER_OPTIONS)
+        ).first()
+
+        if not submission:
+            logger.error(
+                "src:grading:tasks:generate_submission_report_task:: Submission not found",
+                extra={"submission_id": submission_id},
+            )
+            return None
+
+        version = submission_version(
+            submission.id, submission.created_at, submission.updated_at
+        )
+        path = build_submission_report(
+            SubmissionPublicSchema.model_validate(submission, from_attributes=True),
+            version,
+        )
+        return [str(path), f"{submission.user.external_id}.pdf"]
+
+
+@celery_app.task(
+    name="build_session_reports_archive_task", queue=settings.CELERY_REPORTS_QUEUE
+)
+def build_session_reports_archive_task(
+    reports: list[list[str] | None], session_id: str, version: str
+) -> str:
+    """Bundle the reports generated for a session in a zip archive."""
+
+    path = build_reports_archive(
+        ((report[0], report[1]) for report in reports if report),
+        uuid.UUID(session_id),
+        version,
+    )
+    return str(path)
+
+
+@celery_app.task(name="reconcile_session_summaries_task")
+def reconcile_session_summaries_task() -> int:
+    """
+    Rebuild the submission counters of every session from their submissions,
+    returns how many had drifted.
+
+    Each session is rebuilt in its own short transaction, holding its row so
+    the changes made meanwhile are counted once.
+    """
+
+    drifted = 0
+    with Session(engine) as session:
+        session_ids = session.exec(select(SessionModel.id)).all()
+        for session_id in session_ids:
+            summary = session.exec(
+                select(SessionSummary)
+                .where(SessionSummary.session_id == session_id)
+                .with_for_update()
+            ).first()
+            before = summary.model_dump(include=set(COUNTERS)) if summary else None
+            after = rebuild_session_summary(session, session_id).model_dump(
+                include=set(COUNTERS)
+            )
+            session.commit()
+
+            if before != after:
+                drifted += 1
+                logger.warning(
+                    "src:grading:tasks:reconcile_session_summaries_task:: Session summary drifted",
+                    extra={
+                        "session_id": str(session_id),
+                        "stored": before,
+                        "counted": after,
+                    },
+                )
+
+    return drifted
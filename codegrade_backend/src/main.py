@@ -1,9 +1,11 @@
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.routing import APIRoute
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from starlette.middleware.cors import CORSMiddleware
 
 from src.core.config import settings
+from src.core.metrics import MetricsMiddleware, metrics_registry
 from src.routes import router as main_router
 
 
@@ -30,5 +32,11 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(main_router, prefix=settings.API_V1_STR)
+
+
+@app.get("/metrics", tags=["metrics"], include_in_schema=False)
+def metrics() -> Response:
+    return Response(generate_latest(metrics_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -1,5 +1,3 @@
-from __future__ import annotations
-
 import uuid
 from datetime import datetime
 
@@ -7,6 +5,7 @@ from pydantic import PositiveFloat
 from sqlmodel import (
     TIMESTAMP,
     Field,
+    Index,
     Relationship,
     SQLModel,
     UniqueConstraint,
@@ -40,6 +39,13 @@ class Session(BaseModel, table=True):
     title: str | None = Field(default=None, nullable=True)
     description: str | None = Field(default=None, nullable=True)
     is_active: bool
+    # set once every submission of the session has been through grading
+    graded_at: datetime | None = Field(
+        default=None,
+        nullable=True,
+        # SQLModel does not have an overload for this but it'll work in SQLAlchemy
+        sa_type=TIMESTAMP(),  # type: ignore
+    )
 
 
 class User(BaseModel, table=True):
@@ -47,8 +53,10 @@ class User(BaseModel, table=True):
         UniqueConstraint(
             "session_id",
             "external_id",
-            name="session_id_unique_together_with_external_id",
+            name="user_session_id_unique_together_with_external_id",
         ),
+        # the students of a group, see `_get_group_students`
+        Index("ix_user_group_id", "group_id"),
     )
     external_id: str = Field(index=True)
     fullname: str | None = Field(default=None, nullable=True)
@@ -57,7 +65,7 @@ class User(BaseModel, table=True):
     session: Session = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
     group_id: uuid.UUID | None = Field(foreign_key="group.id", nullable=True)
-    group: Group = Relationship(sa_relationship_kwargs={"lazy": "select"})
+    group: "Group" = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
 
 class Group(BaseModel, table=True):
@@ -65,7 +73,7 @@ class Group(BaseModel, table=True):
         UniqueConstraint(
             "session_id",
             "external_id",
-            name="session_id_unique_together_with_external_id",
+            name="group_session_id_unique_together_with_external_id",
         ),
     )
 
@@ -79,7 +87,7 @@ class Exercise(BaseModel, table=True):
         UniqueConstraint(
             "session_id",
             "external_id",
-            name="session_id_unique_together_with_external_id",
+            name="exercise_session_id_unique_together_with_external_id",
         ),
     )
 
@@ -91,6 +99,8 @@ class Exercise(BaseModel, table=True):
 
 
 class EvaluationFlag(BaseModel, table=True):
+    __table_args__ = (Index("ix_evaluationflag_exercise_id", "exercise_id"),)
+
     exercise_id: uuid.UUID = Field(foreign_key="exercise.id")
     exercise: Exercise = Relationship(sa_relationship_kwargs={"lazy": "select"})
     flag: EvaluationFlagEnum
@@ -116,6 +126,16 @@ class TestCase(BaseModel, table=True):
 
 
 class Submission(BaseModel, table=True):
+    __table_args__ = (
+        # one submission per user and session, which the lifecycle handlers
+        # rely on when creating the missing ones
+        Index("ix_submission_session_id_user_id", "session_id", "user_id", unique=True),
+        # the keyset pagination order of the session submissions
+        Index("ix_submission_session_id_created_at_id", "session_id", "created_at", "id"),
+        # the submissions still queued when a session ends
+        Index("ix_submission_session_id_status", "session_id", "status"),
+    )
+
     session_id: uuid.UUID = Field(foreign_key="session.id")
     session: Session = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
@@ -126,14 +146,23 @@ class Submission(BaseModel, table=True):
     group: Group = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
     status: SubmissionStatus
-    overrall_total: PositiveFloat | None
+    overrall_total: PositiveFloat | None = Field(default=None)
     reviewed: bool = Field(default=False)
-    auto_generated_feedback: str | None = Field(max_length=5000, nullable=False)
-    manual_feedback: str | None = Field(max_length=5000, nullable=False)
-    exercise_submissions: list[ExerciseSubmission] = Relationship(back_populates='submission')
+    auto_generated_feedback: str | None = Field(default=None, max_length=5000, nullable=True)
+    manual_feedback: str | None = Field(default=None, max_length=5000, nullable=True)
+    exercise_submissions: list["ExerciseSubmission"] = Relationship(back_populates='submission')
 
 
 class ExerciseSubmission(BaseModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_exercisesubmission_submission_id_exercise_id",
+            "submission_id",
+            "exercise_id",
+            unique=True,
+        ),
+    )
+
     submission_id: uuid.UUID = Field(foreign_key="submission.id")
     submission: Submission = Relationship(
         back_populates='exercise_submissions',
@@ -144,15 +173,24 @@ class ExerciseSubmission(BaseModel, table=True):
     exercise: Exercise = Relationship(sa_relationship_kwargs={"lazy": "select"})
 
     graded: bool = Field(default=False)
-    total_score: PositiveFloat | None
-    auto_generated_feedback: str | None = Field(max_length=5000, nullable=False)
-    manual_feedback: str | None = Field(max_length=5000, nullable=False)
+    total_score: PositiveFloat | None = Field(default=None)
+    auto_generated_feedback: str | None = Field(default=None, max_length=5000, nullable=True)
+    manual_feedback: str | None = Field(default=None, max_length=5000, nullable=True)
 
-    test_case_results: list[TestCaseResult] = Relationship(back_populates='submission')
-    evaluation_flag_results: list[EvaluationFlagResult] = Relationship(back_populates='submission')
+    test_case_results: list["TestCaseResult"] = Relationship(back_populates='submission')
+    evaluation_flag_results: list["EvaluationFlagResult"] = Relationship(back_populates='submission')
 
 
 class TestCaseResult(BaseModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_testcaseresult_submission_id_test_case_id",
+            "submission_id",
+            "test_case_id",
+            unique=True,
+        ),
+    )
+
     submission_id: uuid.UUID = Field(foreign_key="exercisesubmission.id")
     submission: ExerciseSubmission = Relationship(
         back_populates='test_case_results',
@@ -170,6 +208,15 @@ class TestCaseResult(BaseModel, table=True):
 
 
 class EvaluationFlagResult(BaseModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_evaluationflagresult_submission_id_evaluation_flag_id",
+            "submission_id",
+            "evaluation_flag_id",
+            unique=True,
+        ),
+    )
+
     submission_id: uuid.UUID = Field(foreign_key="exercisesubmission.id")
     submission: ExerciseSubmission = Relationship(
         back_populates='evaluation_flag_results',
@@ -182,3 +229,28 @@ class EvaluationFlagResult(BaseModel, table=True):
     passed: bool
     score: PositiveFloat
     adjusted: bool = Field(default=False)
+
+
+class ProcessedEvent(BaseModel, table=True):
+    """Lifecycle events already handled, keyed by their event ID."""
+
+    # pruned by age, see `prune_processed_events_task`
+    __table_args__ = (Index("ix_processedevent_created_at", "created_at"),)
+
+    event: str
+
+
+class SessionSummary(BaseModel, table=True):
+    """Submission counters of a session, maintained by `src.grading.summary`."""
+
+    __table_args__ = (
+        Index("ix_sessionsummary_session_id", "session_id", unique=True),
+    )
+
+    session_id: uuid.UUID = Field(foreign_key="session.id")
+    # one counter per `SubmissionStatus`, named after its value
+    queued: int = Field(default=0)
+    grading: int = Field(default=0)
+    graded: int = Field(default=0)
+    failed: int = Field(default=0)
+    reviewed: int = Field(default=0)
@@ -7,7 +7,17 @@ from fastapi.testclient import TestClient
 from sqlalchemy.exc import ProgrammingError
 from sqlmodel import Session, SQLModel
 
-patch.dict(os.environ, {"ENVIRONMENT": "staging"}).start()  # noqa
+patch.dict(
+    os.environ,
+    {
+        "ENVIRONMENT": "staging",
+        "DATABASE_BACKEND": "sqlite",
+        "DATABASE_ASYNC_POOL": "false",
+        "RESPONSE_CACHE_BACKEND": "memory",
+        "PROGRESS_BROKER": "memory",
+        "GRADING_EXECUTION_CACHE_REDIS_URL": "",
+    },
+).start()  # noqa
 from sqlalchemy import orm  # noqa
 
 from src.core.db import engine, init_db  # noqa
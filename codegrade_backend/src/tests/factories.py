@@ -5,8 +5,10 @@ from factory import LazyAttribute, Sequence
 from factory.alchemy import SQLAlchemyModelFactory
 from faker import Faker
 
-from src.enums import ExerciseDificulty, ExerciseStatus, UserRole
+from src.enums import EvaluationFlagEnum, SubmissionStatus
 from src.models import (
+    EvaluationFlag,
+    EvaluationFlagResult,
     Exercise,
     ExerciseSubmission,
     Session,
@@ -39,7 +41,6 @@ class GroupFactory(SQLAlchemyModelFactory):
 
     external_id = LazyAttribute(lambda o: str(uuid.uuid4()))
     session = LazyAttribute(lambda o: SessionFactory())
-    group_title = Sequence(lambda n: f"test group {n}")
 
 
 class UserFactory(SQLAlchemyModelFactory):
@@ -49,10 +50,7 @@ class UserFactory(SQLAlchemyModelFactory):
 
     external_id = LazyAttribute(lambda o: str(uuid.uuid4()))
     session = LazyAttribute(lambda o: SessionFactory())
-    first_name = LazyAttribute(lambda o: fake.first_name())
-    last_name = LazyAttribute(lambda o: fake.last_name())
-    email = LazyAttribute(lambda o: fake.email())
-    role = UserRole.STUDENT
+    fullname = LazyAttribute(lambda o: fake.name())
     group = LazyAttribute(lambda o: GroupFactory(session=o.session))
 
 
@@ -63,11 +61,8 @@ class ExerciseFactory(SQLAlchemyModelFactory):
 
     external_id = LazyAttribute(lambda o: str(uuid.uuid4()))
     session = LazyAttribute(lambda o: SessionFactory())
-    title = Sequence(lambda n: f"test exercise {n}")
     question = LazyAttribute(lambda o: fake.text())
-    difficulty = ExerciseDificulty.EASY
-    status = ExerciseStatus.COMPLEMENTARY
-    max_score = 100
+    instructions = None
 
 
 class TestCaseFactory(SQLAlchemyModelFactory):
@@ -77,10 +72,20 @@ class TestCaseFactory(SQLAlchemyModelFactory):
 
     external_id = LazyAttribute(lambda o: str(uuid.uuid4()))
     exercise = LazyAttribute(lambda o: ExerciseFactory())
+    title = Sequence(lambda n: f"test case {n}")
     test_input = LazyAttribute(lambda o: fake.text())
     expected_output = LazyAttribute(lambda o: fake.text())
-    percentage_score = 1.0
-    max_score = 100
+    score_percentage = 50.0
+
+
+class EvaluationFlagFactory(SQLAlchemyModelFactory):
+    class Meta:
+        model = EvaluationFlag
+        sqlalchemy_session = TestDBSession
+
+    exercise = LazyAttribute(lambda o: ExerciseFactory())
+    flag = EvaluationFlagEnum.execution
+    score_percentage = 10.0
 
 
 class SubmissionFactory(SQLAlchemyModelFactory):
@@ -89,10 +94,9 @@ class SubmissionFactory(SQLAlchemyModelFactory):
         sqlalchemy_session = TestDBSession
 
     session = LazyAttribute(lambda o: SessionFactory())
-    external_id = LazyAttribute(lambda o: str(uuid.uuid4()))
-    user = LazyAttribute(lambda o: UserFactory())
-    exercise = LazyAttribute(lambda o: ExerciseFactory())
-    graded = False
+    user = LazyAttribute(lambda o: UserFactory(session=o.session))
+    group = LazyAttribute(lambda o: o.user.group)
+    status = SubmissionStatus.QUEUED
 
 
 class ExerciseSubmissionFactory(SQLAlchemyModelFactory):
@@ -100,7 +104,6 @@ class ExerciseSubmissionFactory(SQLAlchemyModelFactory):
         model = ExerciseSubmission
         sqlalchemy_session = TestDBSession
 
-    external_id = LazyAttribute(lambda o: str(uuid.uuid4()))
     submission = LazyAttribute(lambda o: SubmissionFactory())
     exercise = LazyAttribute(lambda o: ExerciseFactory())
     total_score = LazyAttribute(lambda o: float(random.randint(1, 100) / 100))
@@ -111,9 +114,20 @@ class TestCaseResultFactory(SQLAlchemyModelFactory):
         model = TestCaseResult
         sqlalchemy_session = TestDBSession
 
-    external_id = LazyAttribute(lambda o: str(uuid.uuid4()))
     test_case = LazyAttribute(lambda o: TestCaseFactory())
     submission = LazyAttribute(lambda o: ExerciseSubmissionFactory())
     passed = True
-    std_out = LazyAttribute(lambda o: fake.text())
-    exit_code = LazyAttribute(lambda o: float(random.randint(0, 200)))
+    score = LazyAttribute(lambda o: o.test_case.score_percentage)
+    std_out = LazyAttribute(lambda o: fake.text(max_nb_chars=200))
+    exit_code = LazyAttribute(lambda o: random.randint(0, 200))
+
+
+class EvaluationFlagResultFactory(SQLAlchemyModelFactory):
+    class Meta:
+        model = EvaluationFlagResult
+        sqlalchemy_session = TestDBSession
+
+    evaluation_flag = LazyAttribute(lambda o: EvaluationFlagFactory())
+    submission = LazyAttribute(lambda o: ExerciseSubmissionFactory())
+    passed = True
+    score = LazyAttribute(lambda o: o.evaluation_flag.score_percentage)
@@ -0,0 +1,166 @@
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.enums import SubmissionStatus
+from src.grading.analytics import percentile, score_distribution
+from src.grading.scoring import recompute_totals
+from src.main import app
+from src.models import Submission
+from src.tests.factories import SubmissionFactory, UserFactory
+from src.tests.test_scoring import ScoringTestCase
+from src.tests.utils import CustomTestCase, count_queries
+
+
+class ScoreDistributionTests(CustomTestCase):
+    def test_percentile_interpolates_between_ranks(self) -> None:
+        values = [10.0, 20.0, 30.0, 40.0]
+
+        self.assertEqual(percentile(values, 0), 10.0)
+        self.assertEqual(percentile(values, 50), 25.0)
+        self.assertEqual(percentile(values, 90), 37.0)
+        self.assertEqual(percentile(values, 100), 40.0)
+        self.assertEqual(percentile([42.0], 25), 42.0)
+
+    def test_histogram_covers_every_bin_up_to_the_highest_total(self) -> None:
+        distribution = score_distribution([25.0, 5.0, 29.0])
+
+        self.assertEqual(distribution.count, 3)
+        self.assertEqual((distribution.minimum, distribution.maximum), (5.0, 29.0))
+        self.assertEqual(distribution.median, 25.0)
+        self.assertEqual(
+            [(bin.lower, bin.upper, bin.count) for bin in distribution.histogram],
+            [(0.0, 10.0, 1), (10.0, 20.0, 0), (20.0, 30.0, 2)],
+        )
+
+    def test_empty_distribution(self) -> None:
+        distribution = score_distribution([])
+
+        self.assertEqual(distribution.count, 0)
+        self.assertIsNone(distribution.mean)
+        self.assertEqual(distribution.histogram, [])
+
+
+class SessionStatisticsTests(ScoringTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        self.url = (
+            f"{settings.API_V1_STR}/grading/"
+            f"{self.session_record.external_id}/statistics/"
+        )
+
+    def _grade(self, failed: int = 0) -> Submission:
+        submission = self._create_submission(failed=failed)
+        submission.status = SubmissionStatus.GRADED
+        recompute_totals(self.session, submission_ids=[submission.id])
+        self.session.commit()
+        return submission
+
+    def _get(self, etag: str | None = None):  # type: ignore[no-untyped-def]
+        headers = {**self.headers, "If-None-Match": etag} if etag else self.headers
+        with count_queries() as statements:
+            response = self.client.get(self.url, headers=headers)
+        return response, statements
+
+    def test_statistics(self) -> None:
+        self._grade()
+        self._grade(failed=1)
+        SubmissionFactory(
+            session=self.session_record, user=UserFactory(session=self.session_record)
+        )
+        self.session.commit()
+
+        response, _ = self._get()
+
+        self.assertEqual(response.status_code, 200, response.text)
+        statistics = response.json()
+        self.assertEqual(
+            statistics["submissions"],
+            {"queued": 1, "grading": 0, "graded": 2, "failed": 0},
+        )
+        scores = statistics["scores"]
+        self.assertEqual(scores["count"], 2)
+        self.assertEqual((scores["mean"], scores["median"]), (85.0, 85.0))
+        self.assertEqual(scores["percentiles"]["p10"], 65.0)
+        self.assertEqual(
+            [bin["count"] for bin in scores["histogram"]],
+            [0, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0, 1],
+        )
+
+        self.assertEqual(len(statistics["exercises"]), 2)
+        for exercise in statistics["exercises"]:
+            self.assertEqual(
+                (exercise["graded"], exercise["passed"], exercise["pass_rate"]),
+                (2, 1, 0.5),
+            )
+            self.assertEqual(exercise["mean_score"], 85.0)
+
+        failure_rates = {
+            test_case["id"]: test_case["failure_rate"]
+            for test_case in statistics["test_cases"]
+        }
+        for test_cases in self.test_cases.values():
+            self.assertEqual(failure_rates[str(test_cases[0].id)], 0.5)
+            self.assertEqual(failure_rates[str(test_cases[1].id)], 0.0)
+
+        self.assertEqual(
+            statistics["evaluation_flags"],
+            [
+                {"flag": "execution", "passed": 4, "failed": 0},
+                {"flag": "compilation", "passed": 0, "failed": 0},
+                {"flag": "code_quality", "passed": 0, "failed": 0},
+            ],
+        )
+
+    def test_failed_flags_are_counted(self) -> None:
+        submission = self._grade()
+        flag_result = submission.exercise_submissions[0].evaluation_flag_results[0]
+        flag_result.passed, flag_result.score = False, 0.0
+        self.session.commit()
+
+        response, _ = self._get()
+
+        self.assertEqual(
+            response.json()["evaluation_flags"][0],
+            {"flag": "execution", "passed": 1, "failed": 1},
+        )
+
+    def test_statement_count_is_constant(self) -> None:
+        counts = []
+        for size in (1, 10):
+            for _ in range(size):
+                self._grade(failed=1)
+            # a new version each time, the statistics are computed again
+            _, statements = self._get()
+            counts.append(len(statements))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_statistics_are_served_from_cache_until_a_submission_changes(self) -> None:
+        submission = self._grade()
+        response, statements = self._get()
+        etag = response.headers["etag"]
+
+        cached, cached_statements = self._get()
+        self.assertEqual(cached.json(), response.json())
+        # only the session and the submission versions are read
+        self.assertEqual(len(cached_statements), 2)
+        self.assertLess(len(cached_statements), len(statements))
+
+        not_modified, _ = self._get(etag=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        result = submission.exercise_submissions[0].test_case_results[0]
+        adjusted = self.client.patch(
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}"
+            f"/submissions/{submission.id}"
+            f"/exercises/{self.exercises[0].id}/testcases/{result.id}",
+            json={"passed": False, "score": 0},
+            headers=self.headers,
+        )
+        self.assertEqual(adjusted.status_code, 200, adjusted.text)
+
+        response, _ = self._get(etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["scores"]["mean"], 85.0)
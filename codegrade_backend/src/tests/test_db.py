@@ -0,0 +1,178 @@
+import asyncio
+import uuid
+from unittest.mock import patch
+
+from sqlalchemy import Select, text
+from sqlalchemy.pool import QueuePool
+from sqlmodel import col, create_engine, select
+
+from src.core.config import settings
+from src.core.db import (
+    async_engine,
+    engine,
+    postgres_connect_args,
+    postgres_pool_options,
+)
+from src.enums import SubmissionStatus
+from src.models import (
+    EvaluationFlag,
+    EvaluationFlagResult,
+    ExerciseSubmission,
+    Group,
+    Submission,
+    TestCaseResult,
+    User,
+)
+from src.tests.utils import CustomTestCase
+from src.worker import _reset_db_pool
+
+PRAGMAS = ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size")
+
+
+class SQLiteProfileTests(CustomTestCase):
+    def test_sync_engine_applies_pragmas(self) -> None:
+        with engine.connect() as connection:
+            pragmas = {
+                name: connection.execute(text(f"PRAGMA {name}")).scalar()
+                for name in PRAGMAS
+            }
+
+        self.assertEqual(pragmas["journal_mode"], settings.SQLITE_JOURNAL_MODE.lower())
+        # synchronous is reported as its level, NORMAL being 1
+        self.assertEqual(pragmas["synchronous"], 1)
+        self.assertEqual(pragmas["busy_timeout"], settings.SQLITE_BUSY_TIMEOUT)
+        self.assertEqual(pragmas["mmap_size"], settings.SQLITE_MMAP_SIZE)
+        self.assertEqual(pragmas["cache_size"], settings.SQLITE_CACHE_SIZE)
+
+    def test_async_engine_applies_pragmas(self) -> None:
+        async def _pragmas() -> dict[str, int]:
+            async with async_engine.connect() as connection:
+                return {
+                    name: (await connection.execute(text(f"PRAGMA {name}"))).scalar()
+                    for name in ("busy_timeout", "mmap_size", "cache_size")
+                }
+
+        self.assertEqual(
+            asyncio.run(_pragmas()),
+            {
+                "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+                "mmap_size": settings.SQLITE_MMAP_SIZE,
+                "cache_size": settings.SQLITE_CACHE_SIZE,
+            },
+        )
+
+    def test_sync_engine_pool_policy(self) -> None:
+        self.assertIsInstance(engine.pool, QueuePool)
+        self.assertEqual(engine.pool.size(), settings.SQLITE_POOL_SIZE)
+        self.assertEqual(engine.pool._max_overflow, settings.SQLITE_MAX_OVERFLOW)  # type: ignore
+        self.assertEqual(engine.pool._recycle, settings.SQLITE_POOL_RECYCLE)
+
+    def test_worker_child_drops_inherited_connections(self) -> None:
+        with patch.object(engine, "dispose") as dispose_mock:
+            _reset_db_pool()
+
+        dispose_mock.assert_called_once_with(close=False)
+
+
+class PostgresProfileTests(CustomTestCase):
+    def test_database_uris(self) -> None:
+        postgres_settings = settings.model_copy(
+            update={
+                "DATABASE_BACKEND": "postgresql",
+                "POSTGRES_SERVER": "db",
+                "POSTGRES_USER": "codegrade",
+                "POSTGRES_PASSWORD": "secret",
+            }
+        )
+
+        expected = "postgresql+psycopg://codegrade:secret@db:5432/codegrade"
+        self.assertEqual(postgres_settings.SQLALCHEMY_DATABASE_URI, expected)
+        self.assertEqual(postgres_settings.SQLALCHEMY_ASYNC_DATABASE_URI, expected)
+
+    def test_pool_policy(self) -> None:
+        postgres_engine = create_engine(
+            "postgresql+psycopg://codegrade@db/codegrade",
+            poolclass=QueuePool,
+            connect_args=postgres_connect_args(),
+            **postgres_pool_options(),
+        )
+
+        pool = postgres_engine.pool
+        self.assertEqual(pool.size(), settings.POSTGRES_POOL_SIZE)  # type: ignore
+        self.assertEqual(pool._max_overflow, settings.POSTGRES_MAX_OVERFLOW)  # type: ignore
+        self.assertEqual(pool._timeout, settings.POSTGRES_POOL_TIMEOUT)  # type: ignore
+        self.assertEqual(pool._recycle, settings.POSTGRES_POOL_RECYCLE)
+        self.assertEqual(pool._pre_ping, settings.POSTGRES_POOL_PRE_PING)
+        self.assertEqual(
+            postgres_connect_args()["options"],
+            f"-c statement_timeout={settings.POSTGRES_STATEMENT_TIMEOUT}",
+        )
+
+
+class QueryPlanTests(CustomTestCase):
+    """The lookups of the services, handlers and grading engine use an index."""
+
+    def _plan(self, statement: Select) -> list[str]:  # type: ignore[type-arg]
+        compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+        with engine.connect() as connection:
+            return [
+                row[3]
+                for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+            ]
+
+    def assertUsesIndexes(self, statement: Select) -> None:  # type: ignore[type-arg]
+        plan = self._plan(statement)
+        self.assertFalse(
+            [step for step in plan if step.startswith("SCAN") or "TEMP B-TREE" in step],
+            plan,
+        )
+
+    def test_session_submissions_page(self) -> None:
+        self.assertUsesIndexes(
+            select(Submission)
+            .where(
+                Submission.session_id == uuid.uuid4(),
+                col(Submission.reviewed) == False,  # noqa: E712
+            )
+            .order_by(col(Submission.created_at), col(Submission.id))
+            .limit(50)
+        )
+
+    def test_existing_submissions_of_users(self) -> None:
+        self.assertUsesIndexes(
+            select(Submission.user_id).where(
+                Submission.session_id == uuid.uuid4(),
+                col(Submission.user_id).in_([uuid.uuid4(), uuid.uuid4()]),
+            )
+        )
+
+    def test_queued_submissions_of_session(self) -> None:
+        self.assertUsesIndexes(
+            select(Submission).where(
+                Submission.session_id == uuid.uuid4(),
+                Submission.status == SubmissionStatus.QUEUED,
+            )
+        )
+
+    def test_group_students(self) -> None:
+        self.assertUsesIndexes(
+            select(User.id, User.group_id)
+            .join(Group, col(User.group_id) == Group.id)
+            .where(Group.session_id == uuid.uuid4(), Group.external_id == "group")
+        )
+
+    def test_submission_results(self) -> None:
+        for model in (ExerciseSubmission, TestCaseResult, EvaluationFlagResult):
+            with self.subTest(model=model.__name__):
+                self.assertUsesIndexes(
+                    select(model).where(
+                        col(model.submission_id).in_([uuid.uuid4(), uuid.uuid4()])
+                    )
+                )
+
+    def test_exercise_evaluation_flags(self) -> None:
+        self.assertUsesIndexes(
+            select(EvaluationFlag).where(
+                col(EvaluationFlag.exercise_id).in_([uuid.uuid4(), uuid.uuid4()])
+            )
+        )
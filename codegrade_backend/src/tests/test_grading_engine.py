@@ -0,0 +1,553 @@
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import redis
+from sqlmodel import col, select, update
+
+from src.core.config import settings
+from src.enums import EvaluationFlagEnum, SubmissionStatus
+from src.events.tasks import grading_submissions_batch_task
+from src.grading.engine import GradingEngine, outputs_match
+from src.grading.executors import ExecutionResult, SourceCode
+from src.grading.executors.cache import CachingExecutor, ExecutionCache
+from src.grading.executors.local_executor import (
+    MAX_OUTPUT_BYTES,
+    LocalSubprocessExecutor,
+)
+from src.grading.summary import rebuild_session_summary
+from src.models import (
+    EvaluationFlagResult,
+    ExerciseSubmission,
+    Submission,
+    TestCaseResult,
+)
+from src.tests.factories import (
+    EvaluationFlagFactory,
+    ExerciseFactory,
+    GroupFactory,
+    SessionFactory,
+    SubmissionFactory,
+    TestCaseFactory,
+    UserFactory,
+)
+from src.tests.utils import CustomTestCase, count_queries
+
+SOURCE = "a, b = map(int, input().split())\nprint(a + b)\n"
+
+
+class LocalSubprocessExecutorTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.executor = LocalSubprocessExecutor(workspace_path="", timeout=2)
+
+    def test_execute(self) -> None:
+        result = self.executor.execute(
+            SourceCode(language="python", code=SOURCE), "2 3\n"
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(result.std_out.strip(), "5")
+        self.assertFalse(result.timed_out)
+
+    def test_execute_timeout(self) -> None:
+        result = self.executor.execute(
+            SourceCode(language="python", code="while True:\n    pass\n"), ""
+        )
+        self.assertNotEqual(result.exit_code, 0)
+
+    def test_execute_caps_output(self) -> None:
+        result = self.executor.execute(
+            SourceCode(
+                language="python",
+                code="import sys\nwhile True:\n    sys.stdout.write('x' * 100000)\n",
+            ),
+            "",
+        )
+        self.assertEqual(len(result.std_out), MAX_OUTPUT_BYTES)
+        self.assertFalse(result.timed_out)
+
+    def test_execute_kills_forked_children(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            marker = Path(directory) / "marker"
+            code = (
+                "import os, time\n"
+                "if os.fork() == 0:\n"
+                "    time.sleep(1.5)\n"
+                f"    open({str(marker)!r}, 'w').write('alive')\n"
+            )
+            executor = LocalSubprocessExecutor(workspace_path="", timeout=0.5)
+            result = executor.execute(SourceCode(language="python", code=code), "")
+
+            self.assertTrue(result.timed_out)
+            time.sleep(1.5)
+            self.assertFalse(marker.exists())
+
+    def test_refuses_production(self) -> None:
+        with patch.object(settings, "ENVIRONMENT", "production"):
+            with self.assertRaises(RuntimeError):
+                LocalSubprocessExecutor()
+
+    def test_check_compilation(self) -> None:
+        self.assertTrue(
+            self.executor.check_compilation(SourceCode(language="python", code=SOURCE))
+        )
+        self.assertFalse(
+            self.executor.check_compilation(
+                SourceCode(language="python", code="print(")
+            )
+        )
+
+    def test_outputs_match(self) -> None:
+        self.assertTrue(outputs_match("5  \n\n", "5"))
+        self.assertFalse(outputs_match("6\n", "5"))
+
+
+class GradingEngineTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.workspace = tempfile.TemporaryDirectory()
+        self.session_record = SessionFactory()
+        self.user = UserFactory(session=self.session_record, group=None)
+        self.exercise = ExerciseFactory(session=self.session_record)
+        self.test_cases = [
+            TestCaseFactory(
+                exercise=self.exercise,
+                test_input="2 3\n",
+                expected_output="5\n",
+                score_percentage=40.0,
+            ),
+            TestCaseFactory(
+                exercise=self.exercise,
+                test_input="10 -4\n",
+                expected_output="7\n",
+                score_percentage=40.0,
+            ),
+        ]
+        self.flag = EvaluationFlagFactory(
+            exercise=self.exercise,
+            flag=EvaluationFlagEnum.compilation,
+            score_percentage=20.0,
+        )
+        self.submission = SubmissionFactory(
+            session=self.session_record, user=self.user, group=None
+        )
+        self.session.commit()
+
+        self.engine = GradingEngine(
+            db_session=self.session,
+            executor=LocalSubprocessExecutor(
+                workspace_path=self.workspace.name, timeout=5
+            ),
+            max_workers=4,
+        )
+
+    def tearDown(self) -> None:
+        self.workspace.cleanup()
+        super().tearDown()
+
+    def _write_source(self, code: str) -> None:
+        directory = (
+            Path(self.workspace.name)
+            / self.session_record.external_id
+            / self.user.external_id
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{self.exercise.external_id}.py").write_text(code)
+
+    def test_grade(self) -> None:
+        self._write_source(SOURCE)
+
+        submission = self.engine.grade(self.submission.id)
+
+        assert submission is not None
+        self.assertEqual(submission.status, SubmissionStatus.GRADED)
+        self.assertEqual(submission.overrall_total, 60.0)
+
+        exercise_submission = self.session.exec(select(ExerciseSubmission)).one()
+        self.assertTrue(exercise_submission.graded)
+        self.assertEqual(exercise_submission.total_score, 60.0)
+
+        results = self.session.exec(select(TestCaseResult)).all()
+        self.assertEqual(sorted(result.passed for result in results), [False, True])
+
+        flag_result = self.session.exec(select(EvaluationFlagResult)).one()
+        self.assertTrue(flag_result.passed)
+
+    @patch("src.grading.engine.progress_broker")
+    def test_grade_publishes_progress(self, broker_mock) -> None:
+        self._write_source(SOURCE)
+
+        self.engine.grade(self.submission.id)
+
+        self.assertEqual(
+            [call.args for call in broker_mock.publish.call_args_list],
+            [
+                (
+                    self.session_record.id,
+                    "submission",
+                    {
+                        "id": str(self.submission.id),
+                        "status": status,
+                        "overrall_total": total,
+                    },
+                )
+                for status, total in (
+                    (SubmissionStatus.GRADING.value, None),
+                    (SubmissionStatus.GRADED.value, 60.0),
+                )
+            ],
+        )
+
+    def test_grade_without_source(self) -> None:
+        submission = self.engine.grade(self.submission.id)
+
+        assert submission is not None
+        self.assertEqual(submission.status, SubmissionStatus.GRADED)
+        self.assertEqual(submission.overrall_total, 0.0)
+        self.assertEqual(len(self.session.exec(select(TestCaseResult)).all()), 2)
+
+    def test_grade_skips_submission_not_queued(self) -> None:
+        self.submission.status = SubmissionStatus.GRADED
+        self.session.commit()
+
+        self.assertIsNone(self.engine.grade(self.submission.id))
+        self.assertEqual(len(self.session.exec(select(ExerciseSubmission)).all()), 0)
+
+    def test_grade_keeps_adjusted_results(self) -> None:
+        self._write_source(SOURCE)
+        self.engine.grade(self.submission.id)
+
+        result = self.session.exec(
+            select(TestCaseResult).where(TestCaseResult.passed == False)
+        ).one()
+        result.passed, result.score, result.adjusted = True, 40.0, True
+        self.submission.status = SubmissionStatus.QUEUED
+        self.session.commit()
+
+        submission = self.engine.grade(self.submission.id)
+
+        assert submission is not None
+        self.assertEqual(submission.overrall_total, 100.0)
+
+
+class CachingExecutorTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.local_executor = LocalSubprocessExecutor(workspace_path="", timeout=2)
+        self.executor = CachingExecutor(self.local_executor, ExecutionCache(maxsize=8))
+        self.source = SourceCode(language="python", code=SOURCE)
+
+    def test_identical_execution_runs_once(self) -> None:
+        with patch.object(
+            self.local_executor, "execute", wraps=self.local_executor.execute
+        ) as execute_mock:
+            first = self.executor.execute(self.source, "2 3\n")
+            second = self.executor.execute(
+                SourceCode(language="python", code=SOURCE), "2 3\n"
+            )
+            self.executor.execute(self.source, "1 1\n")
+
+        self.assertEqual(first, second)
+        self.assertEqual(second.std_out.strip(), "5")
+        self.assertEqual(execute_mock.call_count, 2)
+
+    def test_executor_configuration_is_part_of_the_key(self) -> None:
+        other = LocalSubprocessExecutor(workspace_path="", timeout=3)
+
+        self.assertNotEqual(
+            ExecutionCache.key(self.local_executor.fingerprint(), self.source, ""),
+            ExecutionCache.key(other.fingerprint(), self.source, ""),
+        )
+
+    def test_timed_out_execution_is_not_cached(self) -> None:
+        timed_out = ExecutionResult(exit_code=-1, std_out="", timed_out=True)
+        with patch.object(
+            self.local_executor, "execute", return_value=timed_out
+        ) as execute_mock:
+            self.executor.execute(self.source, "")
+            self.executor.execute(self.source, "")
+
+        self.assertEqual(execute_mock.call_count, 2)
+
+    def test_least_recently_used_result_is_evicted(self) -> None:
+        cache = ExecutionCache(maxsize=2)
+        result = ExecutionResult(exit_code=0, std_out="")
+        for key in ("a", "b", "a", "c"):
+            if cache.get(key) is None:
+                cache.set(key, result)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_redis_tier(self) -> None:
+        result = ExecutionResult(exit_code=0, std_out="5\n")
+        client = MagicMock()
+        client.get.return_value = result.model_dump_json().encode()
+        cache = ExecutionCache(maxsize=2, client=client, ttl=60)
+
+        self.assertEqual(cache.get("key"), result)
+        self.assertEqual(cache.get("key"), result)
+        # the second read is served from memory
+        client.get.assert_called_once()
+
+        cache.set("other", result)
+        client.set.assert_called_once_with(
+            f"{settings.GRADING_EXECUTION_CACHE_KEY_PREFIX}:other",
+            result.model_dump_json(),
+            ex=60,
+        )
+
+    def test_unreachable_redis_is_a_miss(self) -> None:
+        client = MagicMock()
+        client.get.side_effect = client.set.side_effect = redis.ConnectionError()
+        cache = ExecutionCache(maxsize=2, client=client, ttl=60)
+
+        self.assertIsNone(cache.get("key"))
+        cache.set("key", ExecutionResult(exit_code=0, std_out=""))
+        self.assertIsNotNone(cache.get("key"))
+
+    def test_group_sharing_one_solution_runs_it_once(self) -> None:
+        session_record = SessionFactory()
+        exercise = ExerciseFactory(session=session_record)
+        for test_input in ("2 3\n", "10 -4\n"):
+            TestCaseFactory(
+                exercise=exercise, test_input=test_input, expected_output="5\n"
+            )
+        users = [UserFactory(session=session_record, group=None) for _ in range(3)]
+        submissions = [
+            SubmissionFactory(session=session_record, user=user, group=None)
+            for user in users
+        ]
+        self.session.commit()
+
+        with tempfile.TemporaryDirectory() as workspace:
+            for user in users:
+                directory = (
+                    Path(workspace) / session_record.external_id / user.external_id
+                )
+                directory.mkdir(parents=True)
+                (directory / f"{exercise.external_id}.py").write_text(SOURCE)
+
+            self.local_executor.workspace_path = Path(workspace)
+            engine = GradingEngine(db_session=self.session, executor=self.executor)
+            with patch.object(
+                self.local_executor, "execute", wraps=self.local_executor.execute
+            ) as execute_mock:
+                for submission in submissions:
+                    engine.grade(submission.id)
+
+        self.assertEqual(execute_mock.call_count, 2)
+        exit_codes = [
+            result.exit_code for result in self.session.exec(select(TestCaseResult))
+        ]
+        self.assertEqual(exit_codes, [0] * 6)
+
+
+class GroupGradingTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.workspace = tempfile.TemporaryDirectory()
+        self.session_record = SessionFactory()
+        self.group = GroupFactory(session=self.session_record)
+        self.exercise = ExerciseFactory(session=self.session_record)
+        for test_input, expected_output in (("2 3\n", "5\n"), ("10 -4\n", "6\n")):
+            TestCaseFactory(
+                exercise=self.exercise,
+                test_input=test_input,
+                expected_output=expected_output,
+                score_percentage=40.0,
+            )
+        EvaluationFlagFactory(
+            exercise=self.exercise,
+            flag=EvaluationFlagEnum.compilation,
+            score_percentage=20.0,
+        )
+        self.users = [
+            UserFactory(session=self.session_record, group=self.group) for _ in range(3)
+        ]
+        self.submissions = [
+            SubmissionFactory(session=self.session_record, user=user, group=self.group)
+            for user in self.users
+        ]
+        self.session.commit()
+        self.submission_ids = [submission.id for submission in self.submissions]
+        for user in self.users:
+            self._write_source(user, SOURCE)
+
+        self.executor = LocalSubprocessExecutor(
+            workspace_path=self.workspace.name, timeout=5
+        )
+        self.engine = GradingEngine(
+            db_session=self.session, executor=self.executor, max_workers=4
+        )
+
+    def tearDown(self) -> None:
+        self.workspace.cleanup()
+        super().tearDown()
+
+    def _write_source(self, user, code: str) -> None:  # type: ignore
+        directory = (
+            Path(self.workspace.name)
+            / self.session_record.external_id
+            / user.external_id
+        )
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{self.exercise.external_id}.py").write_text(code)
+
+    def _totals(self) -> dict:  # type: ignore
+        return dict(
+            self.session.exec(select(Submission.id, Submission.overrall_total)).all()
+        )
+
+    def test_group_is_graded_once_for_every_member(self) -> None:
+        with patch.object(
+            self.executor, "execute", wraps=self.executor.execute
+        ) as execute_mock:
+            graded = self.engine.grade_with_group(self.submission_ids[1])
+
+        self.assertEqual(graded[0], self.submission_ids[1])
+        self.assertEqual(sorted(graded), sorted(self.submission_ids))
+        self.assertEqual(execute_mock.call_count, 2)
+        self.assertEqual(len(self.session.exec(select(ExerciseSubmission)).all()), 3)
+        self.assertEqual(len(self.session.exec(select(TestCaseResult)).all()), 6)
+        self.assertEqual(len(self.session.exec(select(EvaluationFlagResult)).all()), 3)
+        for submission in self.session.exec(select(Submission)):
+            self.assertEqual(submission.status, SubmissionStatus.GRADED)
+            self.assertEqual(submission.overrall_total, 100.0)
+
+    def test_statements_do_not_grow_with_the_group(self) -> None:
+        # built up front, as by the session created event
+        rebuild_session_summary(self.session, self.session_record.id)
+        self.session.commit()
+        with count_queries() as small:
+            self.engine.grade(self.submission_ids[0])
+
+        group = GroupFactory(session=self.session_record)
+        users = [
+            UserFactory(session=self.session_record, group=group) for _ in range(6)
+        ]
+        submissions = [
+            SubmissionFactory(session=self.session_record, user=user, group=group)
+            for user in users
+        ]
+        self.session.commit()
+        submission_id = submissions[0].id
+        for user in users:
+            self._write_source(user, SOURCE)
+
+        with count_queries() as large:
+            self.engine.grade(submission_id)
+
+        self.assertEqual(len(small), len(large))
+
+    def test_member_with_another_program_is_run_separately(self) -> None:
+        self._write_source(self.users[2], "print(input())\n")
+
+        with patch.object(
+            self.executor, "execute", wraps=self.executor.execute
+        ) as execute_mock:
+            self.engine.grade(self.submission_ids[0])
+
+        self.assertEqual(execute_mock.call_count, 4)
+        totals = self._totals()
+        self.assertEqual(totals[self.submission_ids[0]], 100.0)
+        self.assertEqual(totals[self.submission_ids[2]], 20.0)
+
+    def test_member_adjustments_stay_independent(self) -> None:
+        self._write_source(self.users[0], "print(5)\n")
+        self._write_source(self.users[1], "print(5)\n")
+        self._write_source(self.users[2], "print(5)\n")
+        self.engine.grade(self.submission_ids[0])
+
+        failed = self.session.exec(
+            select(TestCaseResult)
+            .join(ExerciseSubmission)
+            .where(
+                ExerciseSubmission.submission_id == self.submission_ids[0],
+                TestCaseResult.passed == False,  # noqa: E712
+            )
+        ).one()
+        failed.passed, failed.score, failed.adjusted = True, 40.0, True
+        for submission in self.session.exec(select(Submission)):
+            submission.status = SubmissionStatus.QUEUED
+        self.session.commit()
+
+        self.engine.grade(self.submission_ids[2])
+
+        totals = self._totals()
+        self.assertEqual(totals[self.submission_ids[0]], 100.0)
+        self.assertEqual(totals[self.submission_ids[1]], 60.0)
+        self.assertEqual(totals[self.submission_ids[2]], 60.0)
+
+    def test_members_not_queued_are_left_alone(self) -> None:
+        self.submissions[2].status = SubmissionStatus.GRADED
+        self.session.commit()
+
+        graded = self.engine.grade_with_group(self.submission_ids[0])
+
+        self.assertEqual(sorted(graded), sorted(self.submission_ids[:2]))
+        self.assertEqual(len(self.session.exec(select(ExerciseSubmission)).all()), 2)
+
+    def test_members_claimed_meanwhile_are_left_alone(self) -> None:
+        get_group_mates = self.engine._get_queued_group_mates
+
+        def claimed_by_another_worker(submission: Submission) -> list[Submission]:
+            group_mates = get_group_mates(submission)
+            self.session.exec(
+                update(Submission)  # type: ignore
+                .where(col(Submission.id) == self.submission_ids[2])
+                .values(status=SubmissionStatus.GRADING)
+            )
+            return group_mates
+
+        with patch.object(
+            self.engine,
+            "_get_queued_group_mates",
+            side_effect=claimed_by_another_worker,
+        ):
+            graded = self.engine.grade_with_group(self.submission_ids[0])
+
+        self.assertEqual(graded, self.submission_ids[:2])
+        self.assertEqual(len(self.session.exec(select(ExerciseSubmission)).all()), 2)
+        self.assertEqual(
+            self.session.get(Submission, self.submission_ids[2]).status,  # type: ignore
+            SubmissionStatus.GRADING,
+        )
+
+    def test_submission_claimed_meanwhile_is_skipped(self) -> None:
+        get_submission = self.engine._get_submission
+
+        def claimed_by_another_worker(submission_id: uuid.UUID) -> Submission | None:
+            submission = get_submission(submission_id)
+            self.session.exec(
+                update(Submission)  # type: ignore
+                .where(col(Submission.id).in_(self.submission_ids))
+                .values(status=SubmissionStatus.GRADING)
+            )
+            return submission
+
+        with patch.object(
+            self.engine, "_get_submission", side_effect=claimed_by_another_worker
+        ):
+            graded = self.engine.grade_with_group(self.submission_ids[0])
+
+        self.assertEqual(graded, [])
+        self.assertEqual(self.session.exec(select(ExerciseSubmission)).all(), [])
+
+    def test_batch_grades_the_group_once(self) -> None:
+        batch = [str(submission_id) for submission_id in self.submission_ids]
+
+        with (
+            patch("src.events.tasks.get_executor", return_value=self.executor),
+            patch(
+                "src.events.tasks.GradingEngine.grade_with_group",
+                autospec=True,
+                side_effect=GradingEngine.grade_with_group,
+            ) as grade_mock,
+        ):
+            graded = grading_submissions_batch_task(batch)
+
+        self.assertEqual(sorted(graded), sorted(batch))
+        grade_mock.assert_called_once()
@@ -0,0 +1,443 @@
+import asyncio
+import csv
+import inspect
+import io
+import json
+import uuid
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import redis
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from src.core.config import settings
+from src.core.db import engine
+from src.enums import SubmissionStatus
+from src.events.tasks import (
+    grading_submissions_batch_task,
+    grading_user_submission_task,
+)
+from src.grading.cache import MemoryResponseCache, RedisResponseCache, cached_response
+from src.grading.exports import GRADEBOOK_COLUMNS
+from src.grading.progress import MemoryProgressBroker
+from src.grading.routers import router
+from src.grading.services import export_gradebook_service, stream_progress_service
+from src.main import app
+from src.models import Submission
+from src.tests.factories import (
+    EvaluationFlagFactory,
+    EvaluationFlagResultFactory,
+    ExerciseFactory,
+    ExerciseSubmissionFactory,
+    GroupFactory,
+    SessionFactory,
+    SubmissionFactory,
+    TestCaseFactory,
+    TestCaseResultFactory,
+    UserFactory,
+)
+from src.tests.utils import CustomTestCase, count_queries
+
+# statements allowed for a submissions listing, whatever the session size
+LIST_SUBMISSIONS_QUERY_BUDGET = 12
+
+
+class ListSubmissionsTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        self.session_record = SessionFactory()
+        self.exercises = [
+            ExerciseFactory(session=self.session_record) for _ in range(2)
+        ]
+        self.test_cases = {
+            exercise.id: [TestCaseFactory(exercise=exercise) for _ in range(2)]
+            for exercise in self.exercises
+        }
+        self.flags = {
+            exercise.id: EvaluationFlagFactory(exercise=exercise)
+            for exercise in self.exercises
+        }
+        self.session.commit()
+
+    def _create_submissions(self, count: int) -> None:
+        group = GroupFactory(session=self.session_record)
+        for _ in range(count):
+            user = UserFactory(session=self.session_record, group=group)
+            submission = SubmissionFactory(
+                session=self.session_record, user=user, group=group
+            )
+            for exercise in self.exercises:
+                exercise_submission = ExerciseSubmissionFactory(
+                    submission=submission, exercise=exercise
+                )
+                for test_case in self.test_cases[exercise.id]:
+                    TestCaseResultFactory(
+                        submission=exercise_submission, test_case=test_case
+                    )
+                EvaluationFlagResultFactory(
+                    submission=exercise_submission,
+                    evaluation_flag=self.flags[exercise.id],
+                )
+        self.session.commit()
+
+    def _list_submissions(self, **params: Any) -> tuple[list[dict], list[str]]:  # type: ignore
+        page, statements = self._get_page(limit=200, **params)
+        return page["items"], statements
+
+    def _get_page(self, **params: Any) -> tuple[dict, list[str]]:  # type: ignore
+        url = (
+            f"{settings.API_V1_STR}/grading/"
+            f"{self.session_record.external_id}/submissions/"
+        )
+        with count_queries() as statements:
+            response = self.client.get(url, params=params, headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json(), statements
+
+    def test_list_submissions(self) -> None:
+        self._create_submissions(2)
+
+        submissions, _ = self._list_submissions()
+
+        self.assertEqual(len(submissions), 2)
+        for submission in submissions:
+            self.assertEqual(len(submission["exercise_submissions"]), 2)
+            for exercise_submission in submission["exercise_submissions"]:
+                self.assertEqual(len(exercise_submission["test_case_results"]), 2)
+                self.assertEqual(len(exercise_submission["evaluation_flag_results"]), 1)
+
+    def test_list_submissions_query_count_is_constant(self) -> None:
+        self._create_submissions(2)
+        _, small = self._list_submissions()
+
+        self._create_submissions(10)
+        submissions, large = self._list_submissions()
+
+        self.assertEqual(len(submissions), 12)
+        self.assertEqual(len(small), len(large), large)
+        self.assertLessEqual(len(large), LIST_SUBMISSIONS_QUERY_BUDGET)
+
+    def test_list_submissions_query_budget(self) -> None:
+        self._create_submissions(12)
+
+        with self.assertQueryBudget(LIST_SUBMISSIONS_QUERY_BUDGET) as reports:
+            self._list_submissions()
+
+        (report,) = reports
+        self.assertEqual(report.unit, "request")
+        self.assertEqual(report.repeated, {})
+
+    def test_list_submissions_keyset_pagination(self) -> None:
+        self._create_submissions(7)
+
+        seen: list[str] = []
+        cursor, pages = None, 0
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            page, _ = self._get_page(**params)
+            seen.extend(item["id"] for item in page["items"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_list_submissions_rejects_unknown_cursor(self) -> None:
+        self._create_submissions(2)
+        other_submission = SubmissionFactory()
+        self.session.commit()
+
+        url = (
+            f"{settings.API_V1_STR}/grading/"
+            f"{self.session_record.external_id}/submissions/"
+        )
+        for cursor in (uuid.uuid4(), other_submission.id):
+            response = self.client.get(
+                url, params={"cursor": str(cursor)}, headers=self.headers
+            )
+            self.assertEqual(response.status_code, 400, response.text)
+
+    def test_list_submissions_filters(self) -> None:
+        self._create_submissions(4)
+        submissions = self.session.exec(select(Submission)).all()
+        submissions[0].reviewed = True
+        submissions[0].status = SubmissionStatus.GRADED
+        submissions[0].overrall_total = 80.0
+        submissions[1].status = SubmissionStatus.GRADED
+        submissions[1].overrall_total = 30.0
+        self.session.commit()
+
+        graded, _ = self._list_submissions(status="graded")
+        self.assertEqual(len(graded), 2)
+
+        reviewed, _ = self._list_submissions(reviewed=True)
+        self.assertEqual([item["id"] for item in reviewed], [str(submissions[0].id)])
+
+        scored, _ = self._list_submissions(min_score=50, max_score=100)
+        self.assertEqual([item["id"] for item in scored], [str(submissions[0].id)])
+
+        other_group, _ = self._list_submissions(group_id=str(uuid.uuid4()))
+        self.assertEqual(other_group, [])
+
+    def test_list_submissions_summary_view(self) -> None:
+        self._create_submissions(3)
+
+        submissions, statements = self._list_submissions(view="summary")
+
+        self.assertEqual(len(submissions), 3)
+        self.assertNotIn("exercise_submissions", submissions[0])
+        self.assertIn("user_external_id", submissions[0])
+        self.assertLessEqual(len(statements), 3)
+
+
+class ExportGradebookTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        self.session_record = SessionFactory()
+        self.exercises = [
+            ExerciseFactory(session=self.session_record) for _ in range(2)
+        ]
+        for _ in range(3):
+            submission = SubmissionFactory(session=self.session_record)
+            for exercise in self.exercises:
+                ExerciseSubmissionFactory(submission=submission, exercise=exercise)
+        # a submission that has not been graded yet
+        SubmissionFactory(session=self.session_record)
+        self.session.commit()
+        self.url = (
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}/export/"
+        )
+
+    def test_export_ndjson(self) -> None:
+        response = self.client.get(self.url, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertTrue(
+            response.headers["content-type"].startswith("application/x-ndjson")
+        )
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(
+            sum(1 for row in rows if row["exercise_external_id"] is None), 1
+        )
+
+    def test_export_releases_connection_when_client_disconnects(self) -> None:
+        checked_out = engine.pool.checkedout()  # type: ignore
+        with patch("src.grading.exports.EXPORT_BATCH_SIZE", 1):
+            response = export_gradebook_service(self.session_record, "ndjson")
+            asyncio.run(response.body_iterator.__anext__())  # type: ignore
+
+        # the client went away, the suspended stream still holds a connection
+        self.assertEqual(engine.pool.checkedout(), checked_out + 1)  # type: ignore
+
+        assert response.background is not None
+        asyncio.run(response.background())
+
+        self.assertEqual(engine.pool.checkedout(), checked_out)  # type: ignore
+
+    def test_export_csv(self) -> None:
+        response = self.client.get(
+            self.url, params={"format": "csv"}, headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, 200, response.text)
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(list(rows[0]), list(GRADEBOOK_COLUMNS))
+
+
+class SubmissionResponseCacheTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        session_record = SessionFactory()
+        self.exercise = ExerciseFactory(session=session_record)
+        self.submission = SubmissionFactory(session=session_record)
+        exercise_submission = ExerciseSubmissionFactory(
+            submission=self.submission, exercise=self.exercise
+        )
+        TestCaseResultFactory(
+            submission=exercise_submission,
+            test_case=TestCaseFactory(exercise=self.exercise),
+        )
+        self.session.commit()
+        self.url = (
+            f"{settings.API_V1_STR}/grading/{session_record.external_id}"
+            f"/submissions/{self.submission.id}/"
+        )
+
+    def _get(self, url: str, etag: str | None = None) -> tuple[Any, list[str]]:
+        headers = {**self.headers, "If-None-Match": etag} if etag else self.headers
+        with count_queries() as statements:
+            response = self.client.get(url, headers=headers)
+        return response, statements
+
+    def test_submission_is_served_from_cache(self) -> None:
+        response, statements = self._get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["etag"]
+
+        cached, cached_statements = self._get(self.url)
+        self.assertEqual(cached.json(), response.json())
+        self.assertEqual(cached.headers["etag"], etag)
+        # only the session and the submission version are read
+        self.assertEqual(len(cached_statements), 2)
+        self.assertLess(len(cached_statements), len(statements))
+
+        not_modified, _ = self._get(self.url, etag=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b"")
+
+    def test_exercise_submission_is_served_from_cache(self) -> None:
+        url = f"{self.url}exercises/{self.exercise.id}/"
+        response, _ = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["exercise"]["id"], str(self.exercise.id))
+
+        not_modified, statements = self._get(url, etag=response.headers["etag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(len(statements), 2)
+
+        missing, _ = self._get(f"{self.url}exercises/{uuid.uuid4()}/")
+        self.assertEqual(missing.status_code, 404)
+
+    def test_write_invalidates_cached_submission(self) -> None:
+        response, _ = self._get(self.url)
+        etag = response.headers["etag"]
+
+        reviewed = self.client.post(self.url, headers=self.headers)
+        self.assertEqual(reviewed.status_code, 200)
+
+        response, _ = self._get(self.url, etag=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+        self.assertTrue(response.json()["reviewed"])
+
+    @patch("src.events.tasks.response_cache")
+    def test_grading_invalidates_cached_responses(self, cache_mock) -> None:
+        submission_id = uuid.uuid4()
+
+        grading_user_submission_task(str(submission_id))
+        grading_submissions_batch_task([str(submission_id)])
+
+        self.assertEqual(
+            cache_mock.invalidate.call_args_list,
+            [((submission_id,),), ((submission_id,),)],
+        )
+
+
+class MemoryResponseCacheTests(CustomTestCase):
+    def test_new_version_supersedes_cached_responses(self) -> None:
+        cache = MemoryResponseCache(maxsize=1)
+        submission_id = uuid.uuid4()
+        cache.set(submission_id, "v1", "submission", cached_response(b"{}"))
+        cache.set(submission_id, "v2", "exercise", cached_response(b"[]"))
+
+        self.assertIsNone(cache.get(submission_id, "v1", "submission"))
+        self.assertEqual(cache.get(submission_id, "v2", "exercise").body, b"[]")  # type: ignore
+
+        cache.set(uuid.uuid4(), "v1", "submission", cached_response(b"{}"))
+        self.assertIsNone(cache.get(submission_id, "v2", "exercise"))
+
+
+class RedisResponseCacheTests(CustomTestCase):
+    def test_response_is_written_by_the_script_replacing_other_versions(
+        self,
+    ) -> None:
+        client = MagicMock()
+        cache = RedisResponseCache(client, ttl=60)
+        submission_id = uuid.uuid4()
+        response = cached_response(b"{}")
+
+        cache.set(submission_id, "v2", "statistics", response)
+
+        client.register_script.assert_called_once_with(RedisResponseCache.SET_SCRIPT)
+        client.register_script.return_value.assert_called_once_with(
+            keys=[f"{settings.RESPONSE_CACHE_KEY_PREFIX}:{submission_id}"],
+            args=[
+                "v2",
+                "v2:statistics:etag",
+                response.etag,
+                "v2:statistics:body",
+                b"{}",
+                60,
+            ],
+        )
+
+    def test_unreachable_redis_is_a_miss(self) -> None:
+        client = MagicMock()
+        client.hmget.side_effect = redis.ConnectionError()
+        client.register_script.return_value.side_effect = redis.ConnectionError()
+        cache = RedisResponseCache(client, ttl=60)
+
+        cache.set(uuid.uuid4(), "v1", "statistics", cached_response(b"{}"))
+        self.assertIsNone(cache.get(uuid.uuid4(), "v1", "statistics"))
+
+
+class ProgressStreamTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        self.session_record = SessionFactory()
+        self.session.commit()
+
+    def test_progress_is_streamed_as_server_sent_events(self) -> None:
+        broker = MemoryProgressBroker()
+        submission_id = str(uuid.uuid4())
+
+        async def _stream() -> list[str]:
+            response = stream_progress_service(self.session_record)
+            self.assertEqual(response.media_type, "text/event-stream")
+            events = response.body_iterator
+            chunks = [await events.__anext__()]  # type: ignore
+            # published from a grading thread, as the engine does
+            await asyncio.to_thread(
+                broker.publish,
+                self.session_record.id,
+                "submission",
+                {"id": submission_id, "status": "GRADED", "overrall_total": 80.0},
+            )
+            chunks.append(await events.__anext__())  # type: ignore
+            await events.aclose()  # type: ignore
+            return chunks
+
+        with patch("src.grading.services.progress_broker", broker):
+            chunks = asyncio.run(_stream())
+
+        self.assertEqual(chunks[0], ": keep-alive\n\n")
+        self.assertEqual(
+            chunks[1],
+            "event: submission\ndata: "
+            + json.dumps(
+                {"id": submission_id, "status": "GRADED", "overrall_total": 80.0}
+            )
+            + "\n\n",
+        )
+        # the client went away, the stream unsubscribed
+        self.assertEqual(broker._subscribers, {})
+
+    def test_progress_of_unknown_session(self) -> None:
+        response = self.client.get(
+            f"{settings.API_V1_STR}/grading/unknown/progress/", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class GradingRouterTests(CustomTestCase):
+    def test_routes_run_on_the_event_loop(self) -> None:
+        sync_routes = [
+            route.path  # type: ignore[attr-defined]
+            for route in router.routes
+            if not inspect.iscoroutinefunction(route.endpoint)  # type: ignore[attr-defined]
+        ]
+        self.assertEqual(sync_routes, [])
@@ -0,0 +1,186 @@
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+from sqlalchemy.exc import NoResultFound
+from sqlmodel import select
+
+from src.enums import SubmissionStatus
+from src.events.cache import LookupCache, lookup_cache
+from src.events.handlers import (
+    IndividualSubmissionEventHandler,
+    SessionEndedEventHandler,
+    UserJoinedSessionEventHandler,
+)
+from src.events.handlers.schemas import (
+    InidividualSubmissionEventData,
+    SessionEndedEventData,
+    UserJoinedSessionEventData,
+)
+from src.models import Submission
+from src.tests.factories import (
+    GroupFactory,
+    SessionFactory,
+    SubmissionFactory,
+    UserFactory,
+)
+from src.tests.utils import CustomTestCase, count_queries
+
+
+class IndividualSubmissionEventHandlerTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.session_record = SessionFactory()
+        self.group = GroupFactory(session=self.session_record)
+        self.students = [
+            UserFactory(session=self.session_record, group=self.group) for _ in range(6)
+        ]
+        SubmissionFactory(
+            session=self.session_record, user=self.students[0], group=self.group
+        )
+        self.session.commit()
+        self.external_session_id = self.session_record.external_id
+        self.external_student_ids = [student.external_id for student in self.students]
+
+    def _handle_event(self, **event_data: str) -> None:
+        IndividualSubmissionEventHandler(db_session=self.session).handle_event(
+            external_session_id=self.external_session_id,
+            event_data=InidividualSubmissionEventData(**event_data),
+        )
+
+    def test_group_submissions_are_created_in_one_transaction(self) -> None:
+        with patch.object(
+            self.session, "commit", wraps=self.session.commit
+        ) as commit_mock:
+            self._handle_event(external_group_id=self.group.external_id)
+
+        self.assertEqual(commit_mock.call_count, 1)
+        submissions = self.session.exec(select(Submission)).all()
+        self.assertEqual(
+            sorted(submission.user_id for submission in submissions),
+            sorted(student.id for student in self.students),
+        )
+        for submission in submissions:
+            self.assertEqual(submission.group_id, self.group.id)
+            self.assertEqual(submission.status, SubmissionStatus.QUEUED)
+
+    def test_group_submission_is_idempotent(self) -> None:
+        self._handle_event(external_group_id=self.group.external_id)
+
+        with patch.object(
+            self.session, "commit", wraps=self.session.commit
+        ) as commit_mock:
+            self._handle_event(external_group_id=self.group.external_id)
+
+        commit_mock.assert_not_called()
+        self.assertEqual(len(self.session.exec(select(Submission)).all()), 6)
+
+    def test_student_submission(self) -> None:
+        self._handle_event(external_student_id=self.external_student_ids[1])
+
+        submission = self.session.exec(
+            select(Submission).where(Submission.user_id == self.students[1].id)
+        ).one()
+        self.assertEqual(submission.session_id, self.session_record.id)
+
+    def test_unknown_group_is_ignored(self) -> None:
+        self._handle_event(external_group_id="unknown")
+
+        self.assertEqual(len(self.session.exec(select(Submission)).all()), 1)
+
+    def test_lookups_are_cached(self) -> None:
+        self._handle_event(external_student_id=self.external_student_ids[1])
+
+        with count_queries() as statements:
+            self._handle_event(external_student_id=self.external_student_ids[1])
+
+        # only the existing submissions check is left
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(lookup_cache.stats(), {"hits": 2, "misses": 2, "size": 2})
+
+    @patch("src.events.handlers.session_ended_event.chord")
+    def test_ended_session_is_not_served_from_cache(self, _) -> None:
+        self._handle_event(external_student_id=self.external_student_ids[1])
+
+        SessionEndedEventHandler(db_session=self.session).handle_event(
+            external_session_id=self.session_record.external_id,
+            event_data=SessionEndedEventData(),
+        )
+        self.assertEqual(lookup_cache.stats()["size"], 0)
+
+        with count_queries() as statements:
+            self._handle_event(external_student_id=self.external_student_ids[2])
+        self.assertEqual(len(statements), 1)
+
+    def test_user_joined_session_invalidates_the_session_lookups(self) -> None:
+        self._handle_event(external_group_id=self.group.external_id)
+
+        UserJoinedSessionEventHandler(db_session=self.session).handle_event(
+            external_session_id=self.session_record.external_id,
+            event_data=UserJoinedSessionEventData(
+                external_user_id=self.students[0].external_id, fullname="Ada"
+            ),
+        )
+
+        self.assertEqual(lookup_cache.stats()["size"], 0)
+        self.session.refresh(self.students[0])
+        self.assertEqual(self.students[0].fullname, "Ada")
+
+
+class LookupCacheTests(CustomTestCase):
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache = LookupCache(maxsize=2, ttl=60)
+        cache.get_or_load(("session-1", "session"), lambda: 1)
+        cache.get_or_load(("session-2", "session"), lambda: 2)
+        cache.get_or_load(("session-1", "session"), lambda: 1)
+        cache.get_or_load(("session-3", "session"), lambda: 3)
+
+        self.assertEqual(cache.get_or_load(("session-1", "session"), lambda: 0), 1)
+        self.assertEqual(cache.get_or_load(("session-2", "session"), lambda: 0), 0)
+
+    def test_lookups_are_exported_per_kind(self) -> None:
+        def sample(result: str) -> float:
+            return (
+                REGISTRY.get_sample_value(
+                    "codegrade_event_lookup_cache_lookups_total",
+                    {"lookup": "user", "result": result},
+                )
+                or 0
+            )
+
+        hits, misses = sample("hit"), sample("miss")
+        cache = LookupCache(maxsize=2, ttl=60)
+        for _ in range(3):
+            cache.get_or_load(("session-1", "user", "student-1"), lambda: 1)
+
+        self.assertEqual(sample("hit") - hits, 2)
+        self.assertEqual(sample("miss") - misses, 1)
+
+    def test_expired_entry_is_loaded_again(self) -> None:
+        cache = LookupCache(maxsize=2, ttl=60)
+        with patch("src.events.cache.time.monotonic", return_value=0):
+            cache.get_or_load(("session-1", "session"), lambda: 1)
+        with patch("src.events.cache.time.monotonic", return_value=61):
+            value = cache.get_or_load(("session-1", "session"), lambda: 2)
+
+        self.assertEqual(value, 2)
+        self.assertEqual(cache.stats(), {"hits": 0, "misses": 2, "size": 1})
+
+    def test_failed_lookup_is_not_cached(self) -> None:
+        cache = LookupCache(maxsize=2, ttl=60)
+
+        def _load() -> int:
+            raise NoResultFound()
+
+        with self.assertRaises(NoResultFound):
+            cache.get_or_load(("session-1", "session"), _load)
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_invalidate_session(self) -> None:
+        cache = LookupCache(maxsize=4, ttl=60)
+        cache.get_or_load(("session-1", "session"), lambda: 1)
+        cache.get_or_load(("session-1", "user", "student-1"), lambda: 1)
+        cache.get_or_load(("session-2", "session"), lambda: 2)
+
+        cache.invalidate_session("session-1")
+
+        self.assertEqual(cache.stats()["size"], 1)
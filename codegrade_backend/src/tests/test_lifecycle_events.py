@@ -0,0 +1,231 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from src.core.config import settings
+from src.events.services import event_queue
+from src.events.tasks import (
+    lifecycle_event_handler_task,
+    lifecycle_events_batch_handler_task,
+    prune_processed_events_task,
+)
+from src.main import app
+from src.models import ProcessedEvent, Session
+from src.tests.test_session_created_event import build_event_data
+from src.tests.utils import CustomTestCase
+
+
+def session_created_event(external_session_id: str) -> dict:
+    return {
+        "event": "session_created",
+        "external_session_id": external_session_id,
+        "event_data": build_event_data(groups=1, students_per_group=1).model_dump(
+            mode="json"
+        ),
+    }
+
+
+def user_joined_event(external_session_id: str, external_id: str) -> dict:
+    return {
+        "event": "user_joined_session",
+        "external_session_id": external_session_id,
+        "event_data": {"external_user_id": external_id, "fullname": "Student"},
+    }
+
+
+class LifeCycleEventsBatchTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.url = f"{settings.API_V1_STR}/events/lifecycle/batch/"
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+
+    @patch("src.events.services.lifecycle_events_batch_handler_task.apply_async")
+    def test_batch_reports_each_event_and_publishes_once(self, publish_mock) -> None:
+        events = [
+            session_created_event("session-1"),
+            {"event": "unknown", "external_session_id": "session-1", "event_data": {}},
+            user_joined_event("session-1", "student-new"),
+        ]
+
+        response = self.client.post(self.url, json=events, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body["accepted"], body["rejected"]), (2, 1))
+        self.assertEqual(
+            [result["accepted"] for result in body["results"]], [True, False, True]
+        )
+        self.assertEqual(body["results"][1]["errors"][0]["loc"], ["event"])
+
+        publish_mock.assert_called_once()
+        _, kwargs = publish_mock.call_args
+        (published,) = kwargs["args"]
+        self.assertEqual(kwargs["queue"], event_queue("session-1"))
+        self.assertEqual(
+            [event["event"] for event in published],
+            ["session_created", "user_joined_session"],
+        )
+
+    @patch("src.events.services.lifecycle_events_batch_handler_task.apply_async")
+    def test_batch_without_valid_events_publishes_nothing(self, publish_mock) -> None:
+        response = self.client.post(
+            self.url, json=[{"event": "session_ended"}], headers=self.headers
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rejected"], 1)
+        publish_mock.assert_not_called()
+
+    @patch("src.events.services.lifecycle_events_batch_handler_task.apply_async")
+    def test_batch_size_is_bounded(self, publish_mock) -> None:
+        events = [user_joined_event("session-1", "student")] * (
+            settings.EVENTS_MAX_BATCH_SIZE + 1
+        )
+
+        response = self.client.post(self.url, json=events, headers=self.headers)
+
+        self.assertEqual(response.status_code, 422)
+        publish_mock.assert_not_called()
+
+    def test_batch_task_keeps_going_after_a_failed_event(self) -> None:
+        lifecycle_events_batch_handler_task(
+            [
+                session_created_event("session-1"),
+                # fails on the session unique constraint
+                session_created_event("session-1"),
+                session_created_event("session-2"),
+            ]
+        )
+
+        self.assertEqual(
+            set(self.session.exec(select(Session.external_id)).all()),
+            {"session-1", "session-2"},
+        )
+
+
+class LifeCycleEventsRoutingTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+
+    def test_sessions_are_spread_over_stable_partitions(self) -> None:
+        sessions = [f"session-{index}" for index in range(100)]
+        queues = {session: event_queue(session) for session in sessions}
+
+        self.assertEqual(
+            queues, {session: event_queue(session) for session in sessions}
+        )
+        self.assertEqual(
+            set(queues.values()),
+            {
+                f"{settings.CELERY_EVENTS_QUEUE_PREFIX}-{partition}"
+                for partition in range(settings.CELERY_EVENTS_PARTITIONS)
+            },
+        )
+
+    @patch("src.events.services.lifecycle_event_handler_task.apply_async")
+    def test_event_is_published_to_its_session_queue(self, publish_mock) -> None:
+        response = self.client.post(
+            f"{settings.API_V1_STR}/events/lifecycle/",
+            json=session_created_event("session-1"),
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        _, kwargs = publish_mock.call_args
+        self.assertEqual(kwargs["queue"], event_queue("session-1"))
+
+    @patch("src.events.services.lifecycle_events_batch_handler_task.apply_async")
+    def test_batch_is_split_per_queue_in_order(self, publish_mock) -> None:
+        sessions = ["session-1", "session-2", "session-3", "session-4", "session-5"]
+        events = [
+            user_joined_event(session, f"student-{index}")
+            for index in range(3)
+            for session in sessions
+        ]
+
+        self.client.post(
+            f"{settings.API_V1_STR}/events/lifecycle/batch/",
+            json=events,
+            headers=self.headers,
+        )
+
+        published = {
+            kwargs["queue"]: kwargs["args"][0]
+            for _, kwargs in publish_mock.call_args_list
+        }
+        self.assertEqual(len(published), len(publish_mock.call_args_list))
+        self.assertEqual(set(published), {event_queue(session) for session in sessions})
+        for queue, queue_events in published.items():
+            for session in sessions:
+                if event_queue(session) != queue:
+                    continue
+                self.assertEqual(
+                    [
+                        event["event_data"]["external_user_id"]
+                        for event in queue_events
+                        if event["external_session_id"] == session
+                    ],
+                    ["student-0", "student-1", "student-2"],
+                )
+
+
+class LifeCycleEventsLedgerTests(CustomTestCase):
+    def test_redelivered_event_is_dropped(self) -> None:
+        event = {**session_created_event("session-1"), "event_id": str(uuid.uuid4())}
+
+        lifecycle_event_handler_task(event)
+        with patch(
+            "src.events.handlers.SessionCreatedEventHandler.handle_event"
+        ) as handle_mock:
+            # would fail on the session unique constraint if handled again
+            lifecycle_event_handler_task(event)
+
+        handle_mock.assert_not_called()
+        self.assertEqual(len(self.session.exec(select(Session)).all()), 1)
+        ledger = self.session.exec(select(ProcessedEvent)).one()
+        self.assertEqual(str(ledger.id), event["event_id"])
+        self.assertEqual(ledger.event, "session_created")
+
+    def test_duplicates_in_a_batch_are_dropped(self) -> None:
+        event = {**session_created_event("session-1"), "event_id": str(uuid.uuid4())}
+
+        with patch("src.events.tasks.logger") as logger_mock:
+            lifecycle_events_batch_handler_task([event, event])
+
+        logger_mock.exception.assert_not_called()
+        self.assertEqual(len(self.session.exec(select(Session)).all()), 1)
+
+    def test_failed_event_is_not_recorded(self) -> None:
+        event = {**session_created_event("session-1"), "event_id": str(uuid.uuid4())}
+        with patch(
+            "src.events.handlers.SessionCreatedEventHandler.handle_event",
+            side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                lifecycle_event_handler_task(event)
+
+        self.assertEqual(self.session.exec(select(ProcessedEvent)).all(), [])
+
+        lifecycle_event_handler_task(event)
+        self.assertEqual(len(self.session.exec(select(Session)).all()), 1)
+
+    def test_prune_forgets_events_past_retention(self) -> None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        retention = timedelta(days=settings.EVENTS_LEDGER_RETENTION_DAYS)
+        stale = ProcessedEvent(
+            event="session_created", created_at=now - retention - timedelta(hours=1)
+        )
+        fresh = ProcessedEvent(
+            event="session_created", created_at=now - retention + timedelta(hours=1)
+        )
+        self.session.add_all([stale, fresh])
+        self.session.commit()
+
+        self.assertEqual(prune_processed_events_task(), 1)
+        self.assertEqual(self.session.exec(select(ProcessedEvent.id)).all(), [fresh.id])
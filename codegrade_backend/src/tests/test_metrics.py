@@ -0,0 +1,117 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlmodel import Session, select
+
+from src.core.config import settings
+from src.core.db import engine
+from src.events.tasks import lifecycle_event_handler_task
+from src.main import app
+from src.models import ProcessedEvent
+from src.tests.factories import SessionFactory
+from src.tests.test_lifecycle_events import session_created_event
+from src.tests.utils import CustomTestCase
+from src.worker import (
+    _observe_task_metrics,
+    _stamp_task_publication,
+    _start_task_metrics,
+)
+
+ROUTE = f"{settings.API_V1_STR}/grading/{{external_session_id}}/submissions/"
+
+
+def sample(metric: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(metric, labels) or 0
+
+
+class RequestMetricsTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        self.session_record = SessionFactory()
+        self.session.commit()
+        self.url = (
+            f"{settings.API_V1_STR}/grading/"
+            f"{self.session_record.external_id}/submissions/"
+        )
+
+    def test_request_is_timed_per_route_template(self) -> None:
+        labels = {"method": "GET", "route": ROUTE, "status": "200"}
+        before = sample("codegrade_http_request_duration_seconds_count", **labels)
+        queries_before = sample("codegrade_db_queries_sum", unit="request", name=ROUTE)
+
+        response = self.client.get(self.url, headers=self.headers)
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(
+            sample("codegrade_http_request_duration_seconds_count", **labels),
+            before + 1,
+        )
+        self.assertGreater(
+            sample("codegrade_db_queries_sum", unit="request", name=ROUTE),
+            queries_before,
+        )
+
+    def test_unmatched_path_shares_one_series(self) -> None:
+        labels = {"method": "GET", "route": "unmatched", "status": "404"}
+        before = sample("codegrade_http_request_duration_seconds_count", **labels)
+
+        self.client.get(f"/unknown/{uuid.uuid4()}")
+
+        self.assertEqual(
+            sample("codegrade_http_request_duration_seconds_count", **labels),
+            before + 1,
+        )
+
+    def test_metrics_endpoint(self) -> None:
+        self.client.get(self.url, headers=self.headers)
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn("codegrade_http_request_duration_seconds_bucket", response.text)
+
+
+class TaskMetricsTests(CustomTestCase):
+    def test_task_is_timed_with_its_queue_wait_and_statements(self) -> None:
+        headers: dict[str, float] = {}
+        with patch("src.worker.time.time", return_value=100.0):
+            _stamp_task_publication(headers=headers)
+        task = SimpleNamespace(
+            name="metrics_test_task", request=SimpleNamespace(**headers)
+        )
+
+        with patch("src.worker.time.time", return_value=102.5):
+            _start_task_metrics(task_id="task-1", task=task)
+        with Session(engine) as session:
+            session.exec(select(ProcessedEvent)).all()
+        _observe_task_metrics(task_id="task-1", task=task, state="SUCCESS")
+
+        name = "metrics_test_task"
+        self.assertEqual(
+            sample("codegrade_celery_task_queue_wait_seconds_sum", task=name), 2.5
+        )
+        self.assertEqual(
+            sample(
+                "codegrade_celery_task_duration_seconds_count",
+                task=name,
+                state="SUCCESS",
+            ),
+            1,
+        )
+        self.assertEqual(sample("codegrade_db_queries_sum", unit="task", name=name), 1)
+
+    def test_lifecycle_event_handler_is_timed(self) -> None:
+        name = "codegrade_lifecycle_event_handler_duration_seconds_count"
+        before = sample(name, event="session_created")
+
+        lifecycle_event_handler_task(
+            {**session_created_event("session-1"), "event_id": str(uuid.uuid4())}
+        )
+
+        self.assertEqual(sample(name, event="session_created"), before + 1)
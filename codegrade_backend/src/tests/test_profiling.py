@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from src.core.config import settings
+from src.core.db import engine
+from src.core.metrics import track_queries
+from src.core.profiling import collect_reports, fingerprint
+from src.main import app
+from src.models import User
+from src.tests.factories import GroupFactory, SessionFactory, UserFactory
+from src.tests.utils import CustomTestCase
+
+
+class FingerprintTests(CustomTestCase):
+    def test_parameter_lists_are_collapsed(self) -> None:
+        self.assertEqual(
+            fingerprint("SELECT *\n  FROM user WHERE id IN (?, ?, ?) AND group_id = ?"),
+            "SELECT * FROM user WHERE id IN (?) AND group_id = ?",
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM user WHERE id IN (%(id_1_1)s, %(id_1_2)s)"),
+            fingerprint("SELECT * FROM user WHERE id IN (%(id_1_1)s)"),
+        )
+
+
+class QueryProfilingTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.session_record = SessionFactory()
+        self.group = GroupFactory(session=self.session_record)
+        for _ in range(6):
+            UserFactory(session=self.session_record, group=self.group)
+        self.session.commit()
+
+    def _load_users_one_by_one(self) -> None:
+        with Session(engine) as session, track_queries() as stats:
+            for user_id in session.exec(select(User.id)).all():
+                session.exec(select(User).where(User.id == user_id)).one()
+        stats.observe("task", "profiling_test_task")
+
+    def test_repeated_statement_is_reported(self) -> None:
+        with (
+            collect_reports() as reports,
+            patch("src.core.profiling.logger") as logger_mock,
+        ):
+            self._load_users_one_by_one()
+
+        (report,) = reports
+        self.assertEqual(
+            (report.unit, report.name, report.count), ("task", "profiling_test_task", 7)
+        )
+        self.assertEqual(list(report.repeated.values()), [6])
+        logger_mock.warning.assert_called_once()
+        self.assertIn("N+1", logger_mock.warning.call_args.args[0])
+        self.assertEqual(
+            logger_mock.warning.call_args.kwargs["extra"]["task"], "profiling_test_task"
+        )
+
+    def test_slow_statement_is_reported(self) -> None:
+        with (
+            patch.object(settings, "SQL_SLOW_QUERY_THRESHOLD", 0),
+            collect_reports() as reports,
+        ):
+            self._load_users_one_by_one()
+
+        self.assertEqual(len(reports[0].slow), 7)
+
+    def test_profiling_is_opt_in(self) -> None:
+        with patch("src.core.profiling.logger") as logger_mock:
+            self._load_users_one_by_one()
+
+        logger_mock.info.assert_not_called()
+
+        with (
+            patch.object(settings, "SQL_PROFILING", True),
+            patch("src.core.profiling.logger") as logger_mock,
+        ):
+            self._load_users_one_by_one()
+
+        logger_mock.info.assert_called_once()
+
+    def test_request_over_budget_fails(self) -> None:
+        client = TestClient(app)
+        url = (
+            f"{settings.API_V1_STR}/grading/"
+            f"{self.session_record.external_id}/submissions/"
+        )
+        headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+
+        with self.assertRaises(AssertionError) as context:
+            with self.assertQueryBudget(0):
+                client.get(url, headers=headers)
+
+        self.assertIn("{external_session_id}/submissions/", str(context.exception))
@@ -0,0 +1,205 @@
+import io
+import os
+import tempfile
+import time
+import zipfile
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.grading.reports import archive_path, report_path
+from src.grading.tasks import (
+    build_session_reports_archive_task,
+    generate_submission_report_task,
+)
+from src.main import app
+from src.tests.factories import (
+    ExerciseFactory,
+    ExerciseSubmissionFactory,
+    SessionFactory,
+    SubmissionFactory,
+    TestCaseFactory,
+    TestCaseResultFactory,
+)
+from src.tests.utils import CustomTestCase
+
+
+def fake_html_to_pdf(html: str) -> bytes:
+    return b"%PDF-" + html.encode()
+
+
+@patch("src.grading.reports.html_to_pdf", fake_html_to_pdf)
+class ReportsTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+
+        storage = tempfile.TemporaryDirectory()
+        self.addCleanup(storage.cleanup)
+        settings_patch = patch.object(settings, "REPORTS_STORAGE_PATH", storage.name)
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+        self.session_record = SessionFactory()
+        exercise = ExerciseFactory(session=self.session_record)
+        test_case = TestCaseFactory(exercise=exercise)
+        self.submissions = [
+            SubmissionFactory(session=self.session_record) for _ in range(2)
+        ]
+        for submission in self.submissions:
+            exercise_submission = ExerciseSubmissionFactory(
+                submission=submission, exercise=exercise
+            )
+            TestCaseResultFactory(submission=exercise_submission, test_case=test_case)
+        self.session.commit()
+        self.submission = self.submissions[0]
+
+    def _report_url(self) -> str:
+        return (
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}"
+            f"/submissions/{self.submission.id}/report"
+        )
+
+    @patch("src.grading.services.celery_app.send_task")
+    def test_report_is_generated_then_served_from_cache(self, send_task_mock) -> None:
+        response = self.client.get(self._report_url(), headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+        version = response.json()["version"]
+        _, kwargs = send_task_mock.call_args
+        self.assertEqual(kwargs["queue"], settings.CELERY_REPORTS_QUEUE)
+        self.assertEqual(kwargs["task_id"], f"report-{version}")
+
+        generate_submission_report_task(str(self.submission.id))
+
+        response = self.client.get(self._report_url(), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/pdf")
+        self.assertEqual(response.headers["etag"], f'"{version}"')
+        self.assertTrue(response.content.startswith(b"%PDF-"))
+
+        response = self.client.get(
+            self._report_url(),
+            headers={**self.headers, "If-None-Match": f'"{version}"'},
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(send_task_mock.call_count, 1)
+
+    @patch("src.grading.services.celery_app.send_task")
+    def test_report_version_changes_after_review(self, send_task_mock) -> None:
+        version = self.client.get(self._report_url(), headers=self.headers).json()[
+            "version"
+        ]
+        generate_submission_report_task(str(self.submission.id))
+
+        self.client.post(
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}"
+            f"/submissions/{self.submission.id}/",
+            headers=self.headers,
+        )
+
+        response = self.client.get(
+            self._report_url(),
+            headers={**self.headers, "If-None-Match": f'"{version}"'},
+        )
+        self.assertEqual(response.status_code, 202)
+        new_version = response.json()["version"]
+        self.assertNotEqual(new_version, version)
+
+        generate_submission_report_task(str(self.submission.id))
+
+        self.assertTrue(report_path(self.submission.id, new_version).is_file())
+        self.assertFalse(report_path(self.submission.id, version).exists())
+
+    @patch("src.grading.services.celery_app.send_task")
+    def test_marker_of_a_superseded_version_is_evicted(self, send_task_mock) -> None:
+        version = self.client.get(self._report_url(), headers=self.headers).json()[
+            "version"
+        ]
+        marker = report_path(self.submission.id, version).with_suffix(".pdf.pending")
+        self.assertTrue(marker.is_file())
+
+        # reviewed before the queued build ran, which builds the new version
+        self.client.post(
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}"
+            f"/submissions/{self.submission.id}/",
+            headers=self.headers,
+        )
+        generate_submission_report_task(str(self.submission.id))
+
+        self.assertFalse(marker.exists())
+        # only the report of the new version is left
+        self.assertEqual([path.suffix for path in marker.parent.iterdir()], [".pdf"])
+
+    @patch("src.grading.services.celery_app.send_task")
+    def test_report_is_enqueued_once_while_pending(self, send_task_mock) -> None:
+        for _ in range(3):
+            response = self.client.get(self._report_url(), headers=self.headers)
+            self.assertEqual(response.status_code, 202)
+        self.assertEqual(send_task_mock.call_count, 1)
+
+        generate_submission_report_task(str(self.submission.id))
+
+        response = self.client.get(self._report_url(), headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(send_task_mock.call_count, 1)
+
+    @patch("src.grading.services.celery_app.send_task")
+    def test_stale_pending_report_is_enqueued_again(self, send_task_mock) -> None:
+        version = self.client.get(self._report_url(), headers=self.headers).json()[
+            "version"
+        ]
+        marker = report_path(self.submission.id, version).with_suffix(".pdf.pending")
+        stale = time.time() - settings.REPORTS_PENDING_TTL - 1
+        os.utime(marker, (stale, stale))
+
+        self.client.get(self._report_url(), headers=self.headers)
+
+        self.assertEqual(send_task_mock.call_count, 2)
+
+    @patch("src.grading.services.chord")
+    def test_session_reports_archive(self, chord_mock) -> None:
+        url = (
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}/reports/"
+        )
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+        version = response.json()["version"]
+
+        (reports,), _ = chord_mock.call_args
+        reports = list(reports)
+        self.assertEqual(
+            {report.args[0] for report in reports},
+            {str(submission.id) for submission in self.submissions},
+        )
+        (callback,), _ = chord_mock.return_value.call_args
+        self.assertEqual(callback.name, "build_session_reports_archive_task")
+        self.assertEqual(callback.kwargs["version"], version)
+        self.assertEqual(callback.kwargs["session_id"], str(self.session_record.id))
+
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(chord_mock.call_count, 1)
+
+        build_session_reports_archive_task(
+            [generate_submission_report_task(report.args[0]) for report in reports],
+            **callback.kwargs,
+        )
+        self.assertFalse(
+            archive_path(self.session_record.id, version)
+            .with_suffix(".zip.pending")
+            .exists()
+        )
+
+        response = self.client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], f'"{version}"')
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            self.assertEqual(
+                set(archive.namelist()),
+                {
+                    f"{submission.user.external_id}.pdf"
+                    for submission in self.submissions
+                },
+            )
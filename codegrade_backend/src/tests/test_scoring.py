@@ -0,0 +1,171 @@
+from fastapi.testclient import TestClient
+
+from src.core.config import settings
+from src.grading.scoring import recompute_totals
+from src.main import app
+from src.models import ExerciseSubmission, Submission
+from src.tests.factories import (
+    EvaluationFlagFactory,
+    EvaluationFlagResultFactory,
+    ExerciseFactory,
+    ExerciseSubmissionFactory,
+    SessionFactory,
+    SubmissionFactory,
+    TestCaseFactory,
+    TestCaseResultFactory,
+    UserFactory,
+)
+from src.tests.utils import CustomTestCase, count_queries
+
+
+class ScoringTestCase(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.session_record = SessionFactory()
+        self.exercises = [
+            ExerciseFactory(session=self.session_record) for _ in range(2)
+        ]
+        # 50 per test case and 10 per flag, so 110 for a perfect exercise
+        self.test_cases = {
+            exercise.id: [TestCaseFactory(exercise=exercise) for _ in range(2)]
+            for exercise in self.exercises
+        }
+        self.flags = {
+            exercise.id: EvaluationFlagFactory(exercise=exercise)
+            for exercise in self.exercises
+        }
+        self.session.commit()
+
+    def _create_submission(self, failed: int = 0, graded: bool = True) -> Submission:
+        """Create a graded submission, failing the first `failed` test cases."""
+        submission = SubmissionFactory(
+            session=self.session_record,
+            user=UserFactory(session=self.session_record),
+            overrall_total=None,
+        )
+        for exercise in self.exercises:
+            exercise_submission = ExerciseSubmissionFactory(
+                submission=submission, exercise=exercise, graded=graded
+            )
+            for index, test_case in enumerate(self.test_cases[exercise.id]):
+                TestCaseResultFactory(
+                    submission=exercise_submission,
+                    test_case=test_case,
+                    passed=index >= failed,
+                    score=test_case.score_percentage if index >= failed else 0.0,
+                )
+            EvaluationFlagResultFactory(
+                submission=exercise_submission,
+                evaluation_flag=self.flags[exercise.id],
+            )
+        self.session.commit()
+        return submission
+
+    def _totals(
+        self, submission: Submission
+    ) -> tuple[float | None, list[float | None]]:
+        self.session.expire_all()
+        submission = self.session.get_one(Submission, submission.id)
+        return submission.overrall_total, sorted(
+            exercise_submission.total_score
+            for exercise_submission in submission.exercise_submissions
+        )
+
+
+class RecomputeTotalsTests(ScoringTestCase):
+    def test_recompute_session_totals(self) -> None:
+        perfect = self._create_submission()
+        partial = self._create_submission(failed=1)
+        ungraded = self._create_submission(graded=False)
+
+        recompute_totals(self.session, session_id=self.session_record.id)
+        self.session.commit()
+
+        self.assertEqual(self._totals(perfect), (110.0, [110.0, 110.0]))
+        self.assertEqual(self._totals(partial), (60.0, [60.0, 60.0]))
+        overrall_total, totals = self._totals(ungraded)
+        self.assertIsNone(overrall_total)
+        self.assertNotIn(110.0, totals)
+
+    def test_recompute_submission_totals_leaves_the_others(self) -> None:
+        touched = self._create_submission(failed=2)
+        other = self._create_submission(failed=2)
+        other_totals = self._totals(other)
+
+        recompute_totals(self.session, submission_ids=[touched.id])
+        self.session.commit()
+
+        self.assertEqual(self._totals(touched), (10.0, [10.0, 10.0]))
+        self.assertEqual(self._totals(other), other_totals)
+
+    def test_recompute_statement_count_is_constant(self) -> None:
+        session_id = self.session_record.id
+        counts = []
+        for size in (1, 10):
+            for _ in range(size):
+                self._create_submission()
+            with count_queries() as statements:
+                recompute_totals(self.session, session_id=session_id)
+            self.session.commit()
+            counts.append(len(statements))
+
+        self.assertEqual(counts, [2, 2])
+
+    def test_scope_is_required(self) -> None:
+        with self.assertRaises(ValueError):
+            recompute_totals(self.session)
+
+
+class AdjustmentTests(ScoringTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        self.submission = self._create_submission()
+        recompute_totals(self.session, submission_ids=[self.submission.id])
+        self.session.commit()
+        self.exercise_submission = self.session.get_one(
+            ExerciseSubmission, self.submission.exercise_submissions[0].id
+        )
+        self.url = (
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}"
+            f"/submissions/{self.submission.id}"
+            f"/exercises/{self.exercise_submission.exercise_id}"
+        )
+
+    def test_test_case_adjustment_recomputes_totals(self) -> None:
+        result = self.exercise_submission.test_case_results[0]
+
+        response = self.client.patch(
+            f"{self.url}/testcases/{result.id}",
+            json={"passed": False, "score": 0},
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertTrue(response.json()["adjusted"])
+        self.assertEqual(self._totals(self.submission), (85.0, [60.0, 110.0]))
+
+    def test_flag_adjustment_recomputes_totals(self) -> None:
+        result = self.exercise_submission.evaluation_flag_results[0]
+
+        response = self.client.patch(
+            f"{self.url}/flags/{result.id}",
+            json={"score": 30},
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(self._totals(self.submission), (120.0, [110.0, 130.0]))
+
+    def test_adjustment_of_another_submission_result_is_not_found(self) -> None:
+        other = self._create_submission()
+        result = other.exercise_submissions[0].test_case_results[0]
+
+        response = self.client.patch(
+            f"{self.url}/testcases/{result.id}",
+            json={"score": 0},
+            headers=self.headers,
+        )
+
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,94 @@
+from unittest.mock import patch
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+
+from src.events.handlers import SessionCreatedEventHandler
+from src.events.handlers.schemas import (
+    ExerciseCreationSchema,
+    GroupCreationSchema,
+    SessionCreationEventData,
+    TestCaseCreationSchema,
+    UserCreationSchema,
+)
+from src.models import Exercise, Group, Session, TestCase, User
+from src.tests.utils import CustomTestCase
+
+
+def build_event_data(
+    groups: int = 3, students_per_group: int = 4
+) -> SessionCreationEventData:
+    return SessionCreationEventData(
+        session_title="session",
+        exercises=[
+            ExerciseCreationSchema(
+                external_id=f"exercise-{exercise}",
+                title=f"exercise {exercise}",
+                question="question",
+                test_cases=[
+                    TestCaseCreationSchema(
+                        external_id=f"test-case-{test_case}",
+                        title=f"test case {test_case}",
+                        test_input="input",
+                        expected_output="output",
+                        score_percentage=50,
+                    )
+                    for test_case in range(2)
+                ],
+            )
+            for exercise in range(2)
+        ],
+        groups=[
+            GroupCreationSchema(
+                external_id=f"group-{group}",
+                students=[
+                    UserCreationSchema(external_id=f"student-{group}-{student}")
+                    for student in range(students_per_group)
+                ],
+            )
+            for group in range(groups)
+        ],
+    )
+
+
+class SessionCreatedEventHandlerTests(CustomTestCase):
+    def test_handle_event(self) -> None:
+        with patch.object(
+            self.session, "commit", wraps=self.session.commit
+        ) as commit_mock:
+            SessionCreatedEventHandler(db_session=self.session).handle_event(
+                external_session_id="session-1", event_data=build_event_data()
+            )
+
+        self.assertEqual(commit_mock.call_count, 1)
+
+        session = self.session.exec(select(Session)).one()
+        self.assertEqual(session.external_id, "session-1")
+        self.assertTrue(session.is_active)
+        self.assertEqual(len(self.session.exec(select(Exercise)).all()), 2)
+        self.assertEqual(len(self.session.exec(select(TestCase)).all()), 4)
+
+        groups = {group.id: group for group in self.session.exec(select(Group))}
+        users = self.session.exec(select(User)).all()
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(len(users), 12)
+        for user in users:
+            self.assertEqual(user.session_id, session.id)
+            self.assertEqual(
+                groups[user.group_id].external_id,  # type: ignore
+                f"group-{user.external_id.split('-')[1]}",
+            )
+
+    def test_handle_event_is_atomic(self) -> None:
+        event_data = build_event_data()
+        assert event_data.groups
+        event_data.groups[1].students.append(event_data.groups[0].students[0])
+
+        with self.assertRaises(IntegrityError):
+            SessionCreatedEventHandler(db_session=self.session).handle_event(
+                external_session_id="session-1", event_data=event_data
+            )
+        self.session.rollback()
+
+        self.assertEqual(len(self.session.exec(select(Session)).all()), 0)
+        self.assertEqual(len(self.session.exec(select(Exercise)).all()), 0)
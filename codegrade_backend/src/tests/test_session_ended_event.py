@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+from sqlmodel import select
+
+from src.core.config import settings
+from src.events.handlers import SessionEndedEventHandler
+from src.events.handlers.schemas import SessionEndedEventData
+from src.enums import SubmissionStatus
+from src.events.tasks import (
+    grading_submissions_batch_task,
+    session_grading_completed_task,
+)
+from src.models import Session, Submission
+from src.tests.factories import SessionFactory, SubmissionFactory, UserFactory
+from src.tests.utils import CustomTestCase
+
+
+class SessionEndedEventHandlerTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.session_record = SessionFactory()
+        self.users = [
+            UserFactory(session=self.session_record, group=None) for _ in range(5)
+        ]
+        SubmissionFactory(session=self.session_record, user=self.users[0], group=None)
+        self.session.commit()
+
+    @patch("src.events.handlers.session_ended_event.chord")
+    def test_handle_event_sends_submissions_in_batches(self, chord_mock) -> None:
+        with patch.object(settings, "GRADING_BATCH_SIZE", 2):
+            SessionEndedEventHandler(db_session=self.session).handle_event(
+                external_session_id=self.session_record.external_id,
+                event_data=SessionEndedEventData(),
+            )
+
+        submissions = self.session.exec(select(Submission)).all()
+        self.assertEqual(len(submissions), 5)
+
+        (batches,), _ = chord_mock.call_args
+        self.assertEqual([len(batch.args[0]) for batch in batches], [2, 2, 1])
+        self.assertEqual(
+            {submission_id for batch in batches for submission_id in batch.args[0]},
+            {str(submission.id) for submission in submissions},
+        )
+
+        (callback,), _ = chord_mock.return_value.call_args
+        self.assertEqual(callback.name, "session_grading_completed_task")
+        self.assertEqual(callback.kwargs["session_id"], str(self.session_record.id))
+
+        self.session.refresh(self.session_record)
+        self.assertFalse(self.session_record.is_active)
+
+    def test_session_grading_completed_task(self) -> None:
+        session_grading_completed_task([["a", "b"], ["c"]], str(self.session_record.id))
+
+        session_record = self.session.exec(select(Session)).one()
+        self.session.refresh(session_record)
+        self.assertIsNotNone(session_record.graded_at)
+
+    def test_grading_batch_marks_broken_submissions_failed(self) -> None:
+        submission = self.session.exec(select(Submission)).one()
+
+        with patch(
+            "src.events.tasks.GradingEngine._get_submission",
+            side_effect=RuntimeError("database went away"),
+        ):
+            graded = grading_submissions_batch_task([str(submission.id)])
+
+        self.assertEqual(graded, [])
+        self.session.refresh(submission)
+        self.assertEqual(submission.status, SubmissionStatus.FAILED)
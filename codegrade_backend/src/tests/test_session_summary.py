@@ -0,0 +1,206 @@
+from collections import Counter
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from src.core.config import settings
+from src.enums import SubmissionStatus
+from src.events.handlers import (
+    IndividualSubmissionEventHandler,
+    SessionCreatedEventHandler,
+    SessionEndedEventHandler,
+)
+from src.events.handlers.schemas import (
+    InidividualSubmissionEventData,
+    SessionEndedEventData,
+)
+from src.events.tasks import grading_submissions_batch_task
+from src.grading.engine import GradingEngine
+from src.grading.summary import rebuild_session_summary, record_changes, status_changes
+from src.grading.tasks import reconcile_session_summaries_task
+from src.main import app
+from src.models import SessionSummary, Submission
+from src.tests.factories import SessionFactory, SubmissionFactory, UserFactory
+from src.tests.test_session_created_event import build_event_data
+from src.tests.utils import CustomTestCase, count_queries
+
+
+class SessionSummaryTests(CustomTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = TestClient(app)
+        self.headers = {"Authorization": f"Bearer {settings.EXTERNAL_API_KEY}"}
+        self.session_record = SessionFactory()
+        self.users = [
+            UserFactory(session=self.session_record, group=None) for _ in range(3)
+        ]
+        self.session.commit()
+        self.session_id = self.session_record.id
+        rebuild_session_summary(self.session, self.session_id)
+        self.session.commit()
+        self.url = (
+            f"{settings.API_V1_STR}/grading/{self.session_record.external_id}/summary/"
+        )
+
+    def _counters(self) -> dict[str, int]:
+        response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 200, response.text)
+        return response.json()
+
+    def _submit(self, user_index: int) -> Submission:
+        IndividualSubmissionEventHandler(db_session=self.session).handle_event(
+            external_session_id=self.session_record.external_id,
+            event_data=InidividualSubmissionEventData(
+                external_student_id=self.users[user_index].external_id
+            ),
+        )
+        return self.session.exec(
+            select(Submission).where(Submission.user_id == self.users[user_index].id)
+        ).one()
+
+    def _grade(self, submission: Submission) -> None:
+        executor = MagicMock()
+        executor.get_source.return_value = None
+        GradingEngine(db_session=self.session, executor=executor).grade(submission.id)
+
+    def test_status_changes(self) -> None:
+        self.assertEqual(
+            status_changes(
+                [
+                    (None, SubmissionStatus.QUEUED),
+                    (SubmissionStatus.QUEUED, SubmissionStatus.GRADING),
+                    (SubmissionStatus.GRADING, SubmissionStatus.GRADED),
+                ]
+            ),
+            Counter(queued=0, grading=0, graded=1),
+        )
+
+    def test_counters_follow_the_submissions(self) -> None:
+        graded = self._submit(0)
+        failed = self._submit(1)
+        self.assertEqual(
+            self._counters(),
+            {"queued": 2, "grading": 0, "graded": 0, "failed": 0, "reviewed": 0},
+        )
+
+        self._grade(graded)
+        with patch.object(GradingEngine, "_grade", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self._grade(failed)
+        for _ in range(2):
+            response = self.client.post(
+                f"{settings.API_V1_STR}/grading/{self.session_record.external_id}"
+                f"/submissions/{graded.id}/",
+                headers=self.headers,
+            )
+            self.assertEqual(response.status_code, 200, response.text)
+
+        with patch("src.events.handlers.session_ended_event.chord"):
+            SessionEndedEventHandler(db_session=self.session).handle_event(
+                external_session_id=self.session_record.external_id,
+                event_data=SessionEndedEventData(),
+            )
+
+        self.assertEqual(
+            self._counters(),
+            {"queued": 1, "grading": 0, "graded": 1, "failed": 1, "reviewed": 1},
+        )
+        self.assertEqual(reconcile_session_summaries_task(), 0)
+
+    def test_broken_grading_batch_moves_the_counters(self) -> None:
+        submission = self._submit(0)
+
+        with patch(
+            "src.events.tasks.GradingEngine._get_submission",
+            side_effect=RuntimeError("database went away"),
+        ):
+            grading_submissions_batch_task([str(submission.id)])
+
+        self.assertEqual(self._counters()["failed"], 1)
+        self.assertEqual(self._counters()["queued"], 0)
+
+    def test_read_is_a_single_row_lookup(self) -> None:
+        for index in range(3):
+            self._submit(index)
+
+        with count_queries() as statements:
+            self._counters()
+
+        # the session then its counters, whatever the number of submissions
+        self.assertEqual(len(statements), 2)
+
+    def test_session_without_counters_gets_them_rebuilt(self) -> None:
+        session_record = SessionFactory()
+        for _ in range(2):
+            SubmissionFactory(
+                session=session_record,
+                user=UserFactory(session=session_record),
+                status=SubmissionStatus.GRADED,
+                reviewed=True,
+            )
+        self.session.commit()
+
+        response = self.client.get(
+            f"{settings.API_V1_STR}/grading/{session_record.external_id}/summary/",
+            headers=self.headers,
+        )
+
+        self.assertEqual(
+            response.json(),
+            {"queued": 0, "grading": 0, "graded": 2, "failed": 0, "reviewed": 2},
+        )
+        self.assertIsNotNone(
+            self.session.exec(
+                select(SessionSummary).where(
+                    SessionSummary.session_id == session_record.id
+                )
+            ).first()
+        )
+
+    def test_change_of_session_without_counters_rebuilds_them(self) -> None:
+        session_record = SessionFactory()
+        submission = SubmissionFactory(
+            session=session_record, user=UserFactory(session=session_record)
+        )
+        self.session.commit()
+
+        submission.status = SubmissionStatus.GRADING
+        record_changes(
+            self.session,
+            session_record.id,
+            status_changes([(SubmissionStatus.QUEUED, SubmissionStatus.GRADING)]),
+        )
+        self.session.commit()
+
+        summary = self.session.exec(
+            select(SessionSummary).where(SessionSummary.session_id == session_record.id)
+        ).one()
+        self.assertEqual((summary.queued, summary.grading), (0, 1))
+
+    def test_reconcile_fixes_drifted_counters(self) -> None:
+        self._submit(0)
+        summary = self.session.exec(
+            select(SessionSummary).where(SessionSummary.session_id == self.session_id)
+        ).one()
+        summary.queued = 7
+        self.session.commit()
+
+        self.assertEqual(reconcile_session_summaries_task(), 1)
+        self.assertEqual(self._counters()["queued"], 1)
+        self.assertEqual(reconcile_session_summaries_task(), 0)
+
+    def test_session_created_event_creates_the_counters(self) -> None:
+        SessionCreatedEventHandler(db_session=self.session).handle_event(
+            external_session_id="summary-session",
+            event_data=build_event_data(groups=1, students_per_group=2),
+        )
+
+        response = self.client.get(
+            f"{settings.API_V1_STR}/grading/summary-session/summary/",
+            headers=self.headers,
+        )
+        self.assertEqual(
+            response.json(),
+            {"queued": 0, "grading": 0, "graded": 0, "failed": 0, "reviewed": 0},
+        )
@@ -1,12 +1,37 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any
 from unittest import TestCase
 
+from sqlalchemy import event
 from sqlalchemy.orm import close_all_sessions
 from sqlmodel import Session, SQLModel
 
-from src.core.db import engine
+from src.core.db import async_engine, engine
+from src.core.profiling import QueryReport, collect_reports
+from src.events.cache import lookup_cache
+from src.grading.executors import execution_cache
 from src.tests.conftest import TestDBSession
 
 
+@contextmanager
+def count_queries() -> Generator[list[str], None, None]:
+    """Collect the statements executed on both engines inside the block."""
+    statements: list[str] = []
+
+    def _record(*args: Any) -> None:
+        statements.append(args[2])
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", _record)
+
+
 class CustomTestCase(TestCase):
     session: Session
 
@@ -16,6 +41,18 @@ class CustomTestCase(TestCase):
     def tearDown(self) -> None:
         self.tearDownClass()
 
+    @contextmanager
+    def assertQueryBudget(
+        self, budget: int
+    ) -> Generator[list[QueryReport], None, None]:
+        """Fail when a request finished inside the block ran more than `budget` statements."""
+        with collect_reports() as reports:
+            yield reports
+
+        self.assertTrue(reports, "No request or task was profiled")
+        for report in reports:
+            self.assertLessEqual(report.count, budget, report.describe())
+
     @classmethod
     def _clear_database(cls) -> None:
         with engine.connect() as connection:
@@ -34,3 +71,5 @@ class CustomTestCase(TestCase):
         """Hook method for deconstructing the class fixture after running all tests in the class."""
         close_all_sessions()
         cls._clear_database()
+        lookup_cache.clear()
+        execution_cache.clear()
@@ -1,13 +1,44 @@
+import os
+import time
+from contextlib import ExitStack
+from typing import Any
+
 from celery import Celery, Task
-from celery.signals import task_postrun, task_prerun
+from celery.signals import (
+    before_task_publish,
+    task_postrun,
+    task_prerun,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from prometheus_client import multiprocess
 
 from src.core.config import settings
+from src.core.db import engine
+from src.core.metrics import (
+    QueryStats,
+    celery_task_duration,
+    celery_task_queue_wait,
+    track_queries,
+)
 from src.log import logger as main_logger
 
-celery_app = Celery(__name__, include=["src.worker", "src.events.tasks"])
+celery_app = Celery(
+    __name__, include=["src.worker", "src.events.tasks", "src.grading.tasks"]
+)
 celery_app.conf.broker_url = settings.CELERY_BROKER_URL
 celery_app.conf.result_backend = settings.CELERY_RESULT_BACKEND
 celery_app.conf.task_default_queue = settings.CELERY_DEFAULT_QUEUE
+celery_app.conf.beat_schedule = {
+    "prune-processed-events": {
+        "task": "prune_processed_events_task",
+        "schedule": settings.EVENTS_LEDGER_PRUNE_INTERVAL,
+    },
+    "reconcile-session-summaries": {
+        "task": "reconcile_session_summaries_task",
+        "schedule": settings.SESSION_SUMMARY_RECONCILE_INTERVAL,
+    },
+}
 
 
 @task_prerun.connect
@@ -20,3 +51,57 @@ def _log_task_before_run(task_id: str, task: Task, *args, **kwargs) -> None:  #
 def _log_task_after_run(task_id: str, task: Task, *args, **kwargs) -> None:  # type: ignore  # noqa
     """Log task after it runs."""
     main_logger.info(f"Task {task.name} finished")
+
+
+# start time, statements tracking and stats of the tasks running in this process
+_running_tasks: dict[str, tuple[float, ExitStack, QueryStats]] = {}
+
+
+@before_task_publish.connect
+def _stamp_task_publication(headers: dict, **kwargs) -> None:  # type: ignore  # noqa
+    """Stamp the task message with its publication time."""
+    headers["published_at"] = time.time()
+
+
+@task_prerun.connect
+def _start_task_metrics(task_id: str, task: Task, *args, **kwargs) -> None:  # type: ignore  # noqa
+    """Record how long the task waited and start timing it."""
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        celery_task_queue_wait.labels(task=task.name).observe(
+            max(time.time() - published_at, 0)
+        )
+
+    stack = ExitStack()
+    stats = stack.enter_context(track_queries())
+    _running_tasks[task_id] = (time.perf_counter(), stack, stats)
+
+
+@task_postrun.connect
+def _observe_task_metrics(task_id: str, task: Task, **kwargs: Any) -> None:
+    """Record the task duration and its final state and statements."""
+    running = _running_tasks.pop(task_id, None)
+    if running is None:
+        return
+
+    start, stack, stats = running
+    stack.close()
+    celery_task_duration.labels(
+        task=task.name, state=kwargs.get("state") or "UNKNOWN"
+    ).observe(time.perf_counter() - start)
+    stats.observe("task", task.name)
+
+
+@worker_process_shutdown.connect
+def _mark_metrics_process_dead(*args, **kwargs) -> None:  # type: ignore  # noqa
+    """Drop the live samples of the exiting process from the metrics directory."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
+
+
+@worker_process_init.connect
+def _reset_db_pool(*args, **kwargs) -> None:  # type: ignore  # noqa
+    """Drop the connections inherited from the parent worker process."""
+    # SQLite connections must not be shared across a fork, each child
+    # process opens its own pool instead
+    engine.dispose(close=False)